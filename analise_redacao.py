@@ -0,0 +1,130 @@
+"""
+Pré-análise local de redações (sem LLM).
+Calcula métricas estruturais em milissegundos e decide se a redação tem o
+mínimo necessário para ir ao Gemini. Redações abaixo dos limites recebem
+feedback imediato, sem custo de API.
+"""
+import os
+import re
+import unicodedata
+from collections import Counter
+
+# Limites configuráveis por variável de ambiente
+MIN_PALAVRAS = int(os.environ.get('REDACAO_MIN_PALAVRAS', 150))
+MIN_PARAGRAFOS = int(os.environ.get('REDACAO_MIN_PARAGRAFOS', 3))
+MIN_ADERENCIA_TEMA = float(os.environ.get('REDACAO_MIN_ADERENCIA_TEMA', 0.2))
+MAX_PALAVRAS_FRASE = int(os.environ.get('REDACAO_MAX_PALAVRAS_FRASE', 60))
+
+CONECTIVOS = [
+    # adição
+    'além disso', 'ademais', 'outrossim', 'também', 'bem como', 'não só', 'mas também',
+    # oposição
+    'no entanto', 'entretanto', 'todavia', 'contudo', 'porém', 'embora', 'apesar de',
+    'ainda que', 'por outro lado', 'em contrapartida', 'mesmo que',
+    # causa e consequência
+    'porque', 'pois', 'visto que', 'uma vez que', 'já que', 'dado que', 'devido a',
+    'em virtude de', 'por isso', 'consequentemente', 'por conseguinte', 'de modo que',
+    'de forma que', 'assim sendo',
+    # conclusão
+    'portanto', 'logo', 'dessa forma', 'desse modo', 'assim', 'em suma', 'em síntese',
+    'por fim', 'finalmente', 'diante disso', 'nesse sentido', 'sendo assim',
+    # exemplificação e explicação
+    'por exemplo', 'isto é', 'ou seja', 'a saber', 'como', 'conforme', 'segundo',
+    # sequência
+    'primeiramente', 'em primeiro lugar', 'em segundo lugar', 'em seguida', 'posteriormente',
+]
+
+STOPWORDS = {
+    'a', 'o', 'as', 'os', 'um', 'uma', 'uns', 'umas', 'de', 'do', 'da', 'dos', 'das', 'em',
+    'no', 'na', 'nos', 'nas', 'por', 'pelo', 'pela', 'pelos', 'pelas', 'para', 'com', 'sem',
+    'e', 'ou', 'que', 'se', 'ao', 'aos', 'à', 'às', 'é', 'são', 'foi', 'ser', 'como', 'mais',
+    'mas', 'não', 'sua', 'seu', 'suas', 'seus', 'isso', 'esse', 'essa', 'este', 'esta', 'ele',
+    'ela', 'eles', 'elas', 'há', 'já', 'também', 'sobre', 'entre', 'até', 'muito', 'quando',
+}
+
+# Palavras frequentes em títulos de temas que não indicam o assunto
+TERMOS_GENERICOS_TEMA = {'brasil', 'brasileira', 'brasileiro', 'desafios', 'impactos', 'papel', 'sociedade'}
+
+_RE_PALAVRA = re.compile(r"[a-zà-úç]+(?:-[a-zà-úç]+)*", re.IGNORECASE)
+_RE_FRASE = re.compile(r"[.!?]+(?:\s|$)")
+_RE_CONECTIVOS = re.compile(
+    r"\b(" + "|".join(re.escape(c) for c in sorted(CONECTIVOS, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE
+)
+
+
+def _sem_acento(texto):
+    return ''.join(c for c in unicodedata.normalize('NFD', texto) if unicodedata.category(c) != 'Mn')
+
+
+def palavras_chave_do_tema(tema, palavras_chave=None):
+    """Palavras-chave do tema (coluna palavras_chave) ou, na falta, termos do título."""
+    if palavras_chave:
+        termos = [t.strip() for t in palavras_chave.split(',') if t.strip()]
+    else:
+        termos = [p for p in _RE_PALAVRA.findall(tema or '')
+                  if len(p) > 3 and p.lower() not in STOPWORDS and p.lower() not in TERMOS_GENERICOS_TEMA]
+    return [_sem_acento(t.lower()) for t in termos]
+
+
+def analisar_redacao(texto, tema='', palavras_chave=None):
+    """Retorna as métricas locais da redação."""
+    texto = texto or ''
+    paragrafos = [p for p in texto.splitlines() if len(p.split()) >= 5]
+    palavras = [p.lower() for p in _RE_PALAVRA.findall(texto)]
+    frases = [f for f in _RE_FRASE.split(texto) if f.strip()]
+    tamanhos_frase = [len(f.split()) for f in frases]
+    total_palavras = len(palavras)
+
+    conectivos = Counter(c.lower() for c in _RE_CONECTIVOS.findall(texto))
+
+    conteudo = [p for p in palavras if len(p) > 3 and p not in STOPWORDS]
+    repetidas = [(p, n) for p, n in Counter(conteudo).most_common(5) if n >= 4]
+
+    termos = palavras_chave_do_tema(tema, palavras_chave)
+    texto_norm = _sem_acento(texto.lower())
+    encontrados = [t for t in termos if t in texto_norm]
+    aderencia = round(len(encontrados) / len(termos), 2) if termos else None
+
+    return {
+        'palavras': total_palavras,
+        'paragrafos': len(paragrafos),
+        'frases': len(frases),
+        'media_palavras_frase': round(total_palavras / len(frases), 1) if frases else 0,
+        'maior_frase': max(tamanhos_frase) if tamanhos_frase else 0,
+        'conectivos': sum(conectivos.values()),
+        'conectivos_distintos': len(conectivos),
+        'densidade_conectivos': round(100 * sum(conectivos.values()) / total_palavras, 2) if total_palavras else 0,
+        'diversidade_lexical': round(len(set(palavras)) / total_palavras, 2) if total_palavras else 0,
+        'palavras_repetidas': [{'palavra': p, 'ocorrencias': n} for p, n in repetidas],
+        'palavras_chave_tema': termos,
+        'palavras_chave_encontradas': encontrados,
+        'aderencia_tema': aderencia,
+    }
+
+
+def avaliar_minimos(metricas):
+    """
+    Verifica os limites mínimos. Retorna a lista de problemas que impedem a
+    correção pelo LLM (vazia = pode seguir) e a lista de alertas não bloqueantes.
+    """
+    problemas = []
+    alertas = []
+
+    if metricas['palavras'] < MIN_PALAVRAS:
+        problemas.append(f"Texto muito curto: {metricas['palavras']} palavras (mínimo {MIN_PALAVRAS}).")
+    if metricas['paragrafos'] < MIN_PARAGRAFOS:
+        problemas.append(f"Apenas {metricas['paragrafos']} parágrafo(s). Estruture em introdução, "
+                         f"desenvolvimento e conclusão (mínimo {MIN_PARAGRAFOS}).")
+    if metricas['aderencia_tema'] is not None and metricas['aderencia_tema'] < MIN_ADERENCIA_TEMA:
+        problemas.append("O texto parece fugir do tema: quase nenhuma palavra-chave do tema foi encontrada "
+                         f"({', '.join(metricas['palavras_chave_tema'])}).")
+
+    if metricas['maior_frase'] > MAX_PALAVRAS_FRASE:
+        alertas.append(f"Há frase com {metricas['maior_frase']} palavras. Períodos longos prejudicam a clareza.")
+    if metricas['palavras'] and metricas['densidade_conectivos'] < 1.0:
+        alertas.append("Poucos conectivos: use 'além disso', 'no entanto', 'portanto' para articular as ideias.")
+    for item in metricas['palavras_repetidas']:
+        alertas.append(f"A palavra '{item['palavra']}' aparece {item['ocorrencias']} vezes. Varie o vocabulário.")
+
+    return problemas, alertas
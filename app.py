@@ -1,21 +1,38 @@
 ﻿import os
 import sqlite3
 import json
-import google.generativeai as genai
 from datetime import datetime
+from collections import OrderedDict
 import logging
-import random # Adicionado para simulado_id
+import secrets
+import time
+from array import array
 import glob   # Adicionado para debug route (se ainda existir)
 from whitenoise import WhiteNoise # Adicionado para arquivos estáticos
 from flask import Flask, render_template, jsonify, request, session, send_from_directory # Imports corretos
+from redacao_ia import (MODEL_NAME, obter_modelo, corrigir_redacao, hash_redacao, buscar_cache, salvar_cache,
+                        salvar_historico_redacao, listar_historico_redacoes, obter_redacao_historico,
+                        CorrecaoInvalidaError)
+from analise_redacao import analisar_redacao, avaliar_minimos
+from estatisticas_usuario import atualizar_estatisticas_usuario, obter_estatisticas_usuario
+from respostas_fato import gravar_respostas
+from estatisticas_itens import atualizar_estatisticas_itens, listar_estatisticas_itens, IndiceEstatisticasItens
+from serie_desempenho import atualizar_serie, consultar_serie
+from catalogo import VersaoCatalogo
+from compressao import CompressaoRespostas
+from recomendacoes import CacheRecomendacoes, TOP_N as TOP_N_RECOMENDACOES
+from ranking import RankingNotas, chave_blueprint, GERAL as RANKING_GERAL
+from cat import IndiceDificuldade, SessaoAdaptativa, MAX_QUESTOES as CAT_MAX_QUESTOES
+from revisao import agendar_revisoes, questoes_para_revisar, resumo_revisao
+from questoes_compactas import CatalogoCompacto
+from prazos import AgendadorPrazos, tempo_limite_segundos, TEMPO_MAXIMO_MINUTOS
 
 # ========== CONFIGURAÇÃO INICIAL ==========
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Definir o caminho absoluto para o banco de dados
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, 'concursos.db')
+# Caminho absoluto do banco e conexões compartilhadas (banco_dados.py)
+from banco_dados import BASE_DIR, DB_PATH, get_db_connection, garantir_esquema
 logger.info(f'--- CAMINHO DO BANCO DE DADOS DEFINIDO: {DB_PATH} ---')
 
 # --- VERIFICAÇÃO DO BANCO DE DADOS (Início) ---
@@ -30,23 +47,43 @@ except Exception as e:
     logger.error(f'--- DB Check: Erro ao verificar {DB_PATH}: {e} ---')
 # --- FIM DA VERIFICAÇÃO ---
 
+# Tabelas auxiliares (cache de correções, histórico de redações)
+try:
+    _conn = get_db_connection()
+    garantir_esquema(_conn)
+    _conn.close()
+except Exception as e:
+    logger.error(f'--- DB Check: Erro ao garantir esquema auxiliar: {e} ---')
+
 app = Flask(__name__)
+app.secret_key = os.environ.get('FLASK_SECRET_KEY')
+if not app.secret_key:
+    # Sem chave fixa conhecida: um cookie forjado daria acesso ao histórico de outro aluno.
+    # A chave aleatória vale só para este processo (reinício = sessões novas).
+    app.secret_key = secrets.token_hex(32)
+    logger.warning("⚠️ FLASK_SECRET_KEY não definida: usando chave aleatória; as sessões não sobrevivem a reinícios "
+                   "nem são compartilhadas entre workers.")
 # Configurar Whitenoise para servir arquivos estáticos da pasta 'static/'
 # O prefixo '/static' é adicionado automaticamente por Whitenoise
 app.wsgi_app = WhiteNoise(app.wsgi_app, root='static/')
 logger.info("✅ Whitenoise configurado para servir arquivos estáticos.")
+# JSON dinâmico (ex.: relatório do /finalizar) comprimido com gzip/brotli conforme o Accept-Encoding
+compressao = CompressaoRespostas(app)
 
 
-# Configuração do Gemini (agora tenta configurar, mas não impede o boot se falhar)
-try:
-    api_key = os.environ.get('GEMINI_API_KEY')
-    if api_key:
-        genai.configure(api_key=api_key)
-        logger.info("✅ Gemini configurado: models/gemini-2.0-flash") # Ajuste o modelo se necessário
-    else:
-        logger.warning("⚠️ GEMINI_API_KEY não encontrada nas variáveis de ambiente.")
-except Exception as e:
-    logger.error(f"❌ Erro inicial ao configurar Gemini: {e} - Aplicação continuará, mas correção de redação falhará.")
+# Gemini: o SDK (grpc + protobuf) só é importado e configurado na primeira
+# correção de redação (redacao_ia.obter_modelo), fora do boot dos workers
+if os.environ.get('GEMINI_API_KEY'):
+    logger.info(f"✅ Gemini: models/{MODEL_NAME} (SDK carregado na primeira correção)")
+else:
+    logger.warning("⚠️ GEMINI_API_KEY não encontrada nas variáveis de ambiente.")
+
+
+def obter_user_id():
+    """Identificador anônimo do aluno, guardado no cookie de sessão."""
+    if 'user_id' not in session:
+        session['user_id'] = f"user_{secrets.token_hex(8)}" # 64 bits: dois alunos não dividem o mesmo id
+    return session['user_id']
 
 
 # ========== ROTAS PRINCIPAIS (HTML) ==========
@@ -69,29 +106,285 @@ def index():
 #    return render_template('dashboard.html')
 
 
+# ========== CACHE HTTP DO CATÁLOGO ==========
+# Matérias, temas e contagens só mudam quando o catálogo é reimportado: a
+# versão do catálogo (catalogo.py) vira ETag forte e os dados ficam em
+# memória até a versão mudar.
+
+versao_catalogo = VersaoCatalogo()
+_cache_catalogo = {}  # nome -> (versao, dados)
+
+def _dados_catalogo(nome, versao, carregar):
+    em_cache = _cache_catalogo.get(nome)
+    if em_cache and em_cache[0] == versao:
+        return em_cache[1]
+    dados = carregar()
+    _cache_catalogo[nome] = (versao, dados)
+    return dados
+
+def _resposta_catalogo(nome, carregar):
+    """JSON com ETag da versão do catálogo; If-None-Match igual responde 304 sem abrir o banco."""
+    versao = versao_catalogo.atual(get_db_connection)
+    etag = f'catalogo-{versao}-{nome}'
+    if request.if_none_match.contains_weak(etag):  # a compressão enfraquece a ETag
+        resposta = app.response_class(status=304)
+    else:
+        resposta = jsonify(_dados_catalogo(nome, versao, carregar))
+    resposta.set_etag(etag)
+    resposta.headers['Cache-Control'] = 'no-cache'  # o navegador guarda e revalida sempre
+    return resposta
+
+
 # ========== API - MATÉRIAS ==========
 
+def _carregar_materias():
+    logger.info(f'API /api/materias: Conectando ao DB em {DB_PATH}')
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    logger.info('API /api/materias: Executando query...')
+    cursor.execute("SELECT DISTINCT materia FROM questions")
+    materias = [row[0] for row in cursor.fetchall()]
+    conn.close()
+    logger.info(f'API /api/materias: ENCONTRADO {len(materias)} matérias distintas. Conexão fechada.')
+    return materias
+
 @app.route('/api/materias')
 def api_materias():
     logger.info(f'API /api/materias: Iniciando...')
     try:
-        logger.info(f'API /api/materias: Conectando ao DB em {DB_PATH}')
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        logger.info('API /api/materias: Executando query...')
-        cursor.execute("SELECT DISTINCT materia FROM questions")
-        materias = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        logger.info(f'API /api/materias: ENCONTRADO {len(materias)} matérias distintas. Conexão fechada.')
-        return jsonify(materias)
+        return _resposta_catalogo('materias', _carregar_materias)
     except Exception as e:
         logger.error(f'API /api/materias: ERRO CRÍTICO - {e}')
         return jsonify({'error': 'Erro interno ao buscar matérias'}), 500
 
 
+# ========== API - DISTRIBUIÇÃO DO CATÁLOGO ==========
+
+ORDEM_DIFICULDADES = ['Fácil', 'Médio', 'Difícil']
+
+def _carregar_distribuicao():
+    """Questões por disciplina x dificuldade numa única varredura (GROUP BY)."""
+    conn = get_db_connection()
+    try:
+        rows = conn.execute('''
+            SELECT disciplina, COALESCE(dificuldade, 'Médio'), COUNT(*)
+            FROM questions
+            GROUP BY disciplina, dificuldade
+        ''').fetchall()
+    finally:
+        conn.close()
+
+    por_disciplina = {}
+    for disciplina, dificuldade, quantidade in rows:
+        contagens = por_disciplina.setdefault(disciplina, {})
+        contagens[dificuldade] = contagens.get(dificuldade, 0) + quantidade
+    dificuldades = ORDEM_DIFICULDADES + sorted({d for c in por_disciplina.values() for d in c} - set(ORDEM_DIFICULDADES))
+    return {
+        'dificuldades': dificuldades,
+        'disciplinas': [{
+            'disciplina': disciplina,
+            'total': sum(contagens.values()),
+            'por_dificuldade': {d: contagens.get(d, 0) for d in dificuldades}
+        } for disciplina, contagens in sorted(por_disciplina.items())],
+        'total': sum(r[2] for r in rows)
+    }
+
+@app.route('/api/catalogo/distribuicao')
+def api_catalogo_distribuicao():
+    """Quantas questões há por disciplina e dificuldade (para montar o simulado antes de iniciar)."""
+    try:
+        return _resposta_catalogo('distribuicao', _carregar_distribuicao)
+    except Exception as e:
+        logger.error(f'API /api/catalogo/distribuicao: ERRO CRÍTICO - {e}', exc_info=True)
+        return jsonify({'error': 'Erro interno ao buscar distribuição do catálogo'}), 500
+
+
 # ========== API - SIMULADOS ==========
 
 simulados_ativos = {} # Atenção: Isso é perdido a cada reinício do servidor!
+agendador_prazos = AgendadorPrazos(lambda simulado_id: _expirar_simulado(simulado_id)) # Prazos no relógio do servidor
+resultados_expirados = OrderedDict() # Resultado dos finalizados por tempo, para o /finalizar que chegar depois
+MAX_RESULTADOS_EXPIRADOS = 1000
+JANELA_INICIAL = int(os.environ.get('SIMULADO_JANELA_INICIAL', 5)) # Questões completas já no /iniciar
+MAX_JANELA = 50
+indice_itens = IndiceEstatisticasItens() # Estatísticas por questão em memória (TTL)
+cache_recomendacoes = CacheRecomendacoes() # Top-N por usuário, invalidado no finalizar
+ranking = RankingNotas() # Percentil / líderes em memória, reconstruído do histórico no boot
+indice_cat = IndiceDificuldade() # Questões ordenadas por dificuldade (modo adaptativo)
+
+try:
+    _conn = get_db_connection()
+    logger.info(f"📊 Ranking reconstruído a partir de {ranking.reconstruir(_conn)} simulados.")
+    _conn.close()
+except Exception as e:
+    logger.error(f'--- Ranking: Erro ao reconstruir a partir do histórico: {e} ---')
+
+def _carregar_catalogo_questoes():
+    conn = get_db_connection()
+    try:
+        catalogo = CatalogoCompacto.carregar(conn)
+    finally:
+        conn.close()
+    logger.info(f"📚 Catálogo compacto: {len(catalogo)} questões em {catalogo.tamanho_bytes() / 2**20:.1f} MiB.")
+    return catalogo
+
+def _catalogo_questoes():
+    """
+    Questões em memória (questoes_compactas.py), recarregadas quando a versão
+    do catálogo muda. Os simulados guardam RegistroQuestao (mesma leitura dos
+    dicts: q['materia'], q.get('peso')) em vez de um dict por questão.
+    Questões com alternativas em JSON inválido não entram no catálogo.
+    """
+    return _dados_catalogo('questoes', versao_catalogo.atual(get_db_connection), _carregar_catalogo_questoes)
+
+def _novo_simulado_id():
+    # 4 dígitos aleatórios por segundo colidiam com muitos alunos iniciando juntos
+    # (um simulado sobrescrevia o outro); 64 bits aleatórios não colidem na prática
+    return f"sim_{int(datetime.now().timestamp())}_{secrets.token_hex(8)}"
+
+def _registrar_simulado(simulado_id, simulado, tempo_limite):
+    """Guarda o simulado em memória com prazo do servidor (epoch) e agenda a expiração."""
+    simulado['prazo'] = time.time() + tempo_limite
+    simulado['tempos'] = (array('I'), array('I')) # (question_id, ms) por resposta, uint32 compactos
+    simulados_ativos[simulado_id] = simulado
+    agendador_prazos.agendar(simulado_id, simulado['prazo'])
+
+def _registrar_tempo(simulado, questao_id, tempo_ms):
+    """
+    Guarda o tempo que o aluno levou na questão (ms, enviado pelo cliente).
+    Valores inválidos são ignorados; o resto fica limitado ao tempo de prova
+    (aba esquecida aberta ou valor forjado não distorcem as médias).
+    """
+    limite_ms = int(simulado['config'].get('tempo_limite_segundos') or TEMPO_MAXIMO_MINUTOS * 60) * 1000
+    try:
+        questao_id, tempo_ms = int(questao_id), min(max(int(tempo_ms), 0), limite_ms)
+    except (TypeError, ValueError):
+        return
+    if 0 <= questao_id <= 0xFFFFFFFF:
+        ids, tempos = simulado['tempos']
+        ids.append(questao_id)
+        tempos.append(tempo_ms)
+
+def _tempos_por_questao(simulado):
+    """{question_id: ms somados} (a mesma questão pode ser respondida de novo após voltar nela)."""
+    ids, tempos = simulado['tempos']
+    por_questao = {}
+    for questao_id, ms in zip(ids, tempos):
+        por_questao[questao_id] = por_questao.get(questao_id, 0) + ms
+    return por_questao
+
+def _tempo_restante(simulado):
+    return max(0, int(simulado['prazo'] - time.time()))
+
+def _expirar_simulado(simulado_id):
+    """Chamado pela thread de prazos: finaliza com o que foi respondido e guarda o resultado."""
+    resultado = _finalizar_simulado(simulado_id, tempo_esgotado=True)
+    if resultado is not None:
+        resultados_expirados[simulado_id] = resultado
+        while len(resultados_expirados) > MAX_RESULTADOS_EXPIRADOS:
+            resultados_expirados.popitem(last=False)
+        logger.info(f"⏰ Simulado {simulado_id} finalizado automaticamente (tempo esgotado).")
+
+def _questao_frontend(q):
+    # NÃO ENVIAR resposta_correta ou explicacao antes do fim
+    return {'id': q['id'], 'materia': q['materia'], 'questao': q['questao'], 'alternativas': q['alternativas']}
+
+def _inicio_simulado(simulado_id, simulado, janela=None):
+    """
+    Resposta do /iniciar: manifesto (id + matéria de todas as questões) e só as
+    primeiras `janela` questões completas; o resto vem por /questoes em janelas.
+    """
+    questoes = simulado['questoes']
+    try:
+        janela = max(1, min(int(janela or JANELA_INICIAL), MAX_JANELA))
+    except (TypeError, ValueError):
+        janela = JANELA_INICIAL
+    return {
+        'simulado_id': simulado_id,
+        'manifesto': [{'id': q['id'], 'materia': q['materia']} for q in questoes],
+        'questoes': [_questao_frontend(q) for q in questoes[:janela]], # Envia versão limpa
+        'total': len(questoes),
+        'tempo_restante_segundos': _tempo_restante(simulado)
+    }
+
+# Regras do simulado sem dependência do request: usadas pelas rotas Flask
+# abaixo e pelo serviço assíncrono (servico_async.py).
+
+def _quantidade_pedida(data):
+    """Quantidade de questões pedida no /iniciar (padrão 10); None se não for inteiro >= 1."""
+    try:
+        quantidade = int(data.get('quantidade', 10))
+    except (TypeError, ValueError):
+        return None
+    return quantidade if quantidade >= 1 else None
+
+def _sortear_questoes(materia, quantidade):
+    """Sorteia IDs no SQLite (sem as questões suspeitas) e devolve os registros do catálogo compacto."""
+    logger.info(f'API /simulado/iniciar: Conectando ao DB em {DB_PATH}')
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    query = "SELECT id FROM questions WHERE 1=1"
+    params = []
+    if materia and materia != 'todas':
+        query += " AND materia = ?"
+        params.append(materia)
+
+    # Questões com discriminação negativa (provável gabarito errado) ficam fora do sorteio
+    suspeitas = indice_itens.suspeitas(get_db_connection)
+    if suspeitas:
+        query += f" AND id NOT IN ({','.join('?' * len(suspeitas))})"
+        params.extend(suspeitas)
+
+    query += " ORDER BY RANDOM() LIMIT ?"
+    params.append(quantidade)
+    cursor.execute(query, params)
+
+    questions_raw = cursor.fetchall()
+    logger.info(f'API /simulado/iniciar: Query retornou {len(questions_raw)} linhas.')
+
+    catalogo = _catalogo_questoes()
+    questions = []
+    for row in questions_raw:
+        questao = catalogo.get(row[0])
+        if questao is None:
+            logger.warning(f"API /simulado/iniciar: Questão ID {row[0]} fora do catálogo (JSON inválido?). Pulando questão.")
+            continue # Pula esta questão se o JSON estiver ruim
+        questions.append(questao)
+
+    conn.close()
+    logger.info(f'API /simulado/iniciar: ENCONTRADO {len(questions)} questões válidas. Conexão fechada.')
+    return questions
+
+def _criar_simulado(questions, user_id, config, tempo_limite_minutos=None):
+    """Cria o simulado em memória com prazo. Retorna (simulado_id, simulado)."""
+    simulado_id = _novo_simulado_id()
+    tempo_limite = tempo_limite_segundos(len(questions), tempo_limite_minutos)
+    simulado = {
+        'questoes': questions,
+        'respostas': {}, # Usar dict para fácil acesso por ID
+        'inicio': datetime.now().isoformat(),
+        'user_id': user_id,
+        'config': {**config, 'tempo_limite_segundos': int(tempo_limite)}
+    }
+    _registrar_simulado(simulado_id, simulado, tempo_limite)
+    return simulado_id, simulado
+
+def _registrar_resposta(simulado_id, questao_id, resposta_usuario, tempo_ms=None):
+    """Registra a resposta (O(1), só memória). Retorna (payload, status HTTP)."""
+    if not simulado_id or questao_id is None or resposta_usuario is None:
+        return {'error': 'Dados incompletos'}, 400
+
+    simulado = simulados_ativos.get(simulado_id)
+    if simulado is None:
+        return {'error': 'Simulado não encontrado ou expirado'}, 404
+    if time.time() > simulado['prazo']: # a thread de prazos finaliza logo em seguida
+        return {'error': 'Tempo esgotado', 'tempo_restante_segundos': 0}, 410
+
+    simulado['respostas'][questao_id] = resposta_usuario
+    _registrar_tempo(simulado, questao_id, tempo_ms)
+    #logger.info(f"Simulado {simulado_id}: Resposta registrada para questão {questao_id}")
+    return {'status': 'resposta registrada', 'tempo_restante_segundos': _tempo_restante(simulado)}, 200
 
 @app.route('/api/simulado/iniciar', methods=['POST'])
 def api_simulado_iniciar():
@@ -99,71 +392,23 @@ def api_simulado_iniciar():
     try:
         data = request.json
         materia = data.get('materia', 'todas')
-        quantidade = int(data.get('quantidade', 10))
+        quantidade = _quantidade_pedida(data)
+        if quantidade is None:
+            return jsonify({'error': 'quantidade deve ser um inteiro maior que zero'}), 400
         logger.info(f'API /simulado/iniciar: Buscando {quantidade} questões de {materia}')
 
-        logger.info(f'API /simulado/iniciar: Conectando ao DB em {DB_PATH}')
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        if materia == 'todas' or not materia:
-            cursor.execute("SELECT id, materia, enunciado, alternativas, resposta_correta, explicacao FROM questions ORDER BY RANDOM() LIMIT ?", (quantidade,))
-        else:
-            cursor.execute("SELECT id, materia, enunciado, alternativas, resposta_correta, explicacao FROM questions WHERE materia = ? ORDER BY RANDOM() LIMIT ?", (materia, quantidade))
-
-        questions_raw = cursor.fetchall()
-        logger.info(f'API /simulado/iniciar: Query retornou {len(questions_raw)} linhas.')
-
-        questions = []
-        for row in questions_raw:
-            try:
-                alternativas_dict = json.loads(row[3]) # Índice 3 é 'alternativas'
-            except json.JSONDecodeError:
-                logger.warning(f"API /simulado/iniciar: JSON inválido para alternativas na questão ID {row[0]}. Pulando questão.")
-                continue # Pula esta questão se o JSON estiver ruim
-
-            questions.append({
-                'id': row[0],
-                'materia': row[1],
-                'questao': row[2],
-                'alternativas': alternativas_dict,
-                'resposta_correta': row[4],
-                'explicacao': row[5]
-            })
-
-        conn.close()
-        logger.info(f'API /simulado/iniciar: ENCONTRADO {len(questions)} questões válidas. Conexão fechada.')
-
+        questions = _sortear_questoes(materia, quantidade)
         if not questions:
              logger.error(f'API /simulado/iniciar: Nenhuma questão encontrada para os critérios!')
              return jsonify({'error': 'Nenhuma questão encontrada para esta matéria/quantidade'}), 404
 
-
         # Criar simulado (simples, em memória)
-        simulado_id = f"sim_{int(datetime.now().timestamp())}_{random.randint(1000, 9999)}"
-        simulados_ativos[simulado_id] = {
-            'questoes': questions,
-            'respostas': {}, # Usar dict para fácil acesso por ID
-            'inicio': datetime.now().isoformat()
-        }
-
+        simulado_id, simulado = _criar_simulado(
+            questions, obter_user_id(), {'materia': materia, 'quantidade': quantidade}, data.get('tempo_limite_minutos'))
         logger.info(f"🎯 Simulado {simulado_id} iniciado com {len(questions)} questões.")
 
         # Retornar apenas os dados necessários para o frontend iniciar
-        questoes_frontend = [{
-            'id': q['id'],
-            'materia': q['materia'],
-            'questao': q['questao'],
-            'alternativas': q['alternativas'] # Frontend precisa das alternativas
-            # NÃO ENVIAR resposta_correta ou explicacao agora
-         } for q in questions]
-
-
-        return jsonify({
-            'simulado_id': simulado_id,
-            'questoes': questoes_frontend, # Envia versão limpa
-            'total': len(questoes_frontend)
-        })
+        return jsonify(_inicio_simulado(simulado_id, simulado, data.get('janela')))
 
     except Exception as e:
         logger.error(f"API /api/simulado/iniciar: ERRO CRÍTICO - {e}", exc_info=True) # Log completo do erro
@@ -174,25 +419,343 @@ def api_simulado_responder():
     # Simplesmente registra a resposta, sem validação imediata
     try:
         data = request.json
-        simulado_id = data.get('simulado_id')
-        questao_id = data.get('questao_id')
-        resposta_usuario = data.get('resposta')
+        payload, status = _registrar_resposta(
+            data.get('simulado_id'), data.get('questao_id'), data.get('resposta'), data.get('tempo_ms'))
+        return jsonify(payload), status
+
+    except Exception as e:
+        logger.error(f"API /api/simulado/responder: ERRO CRÍTICO - {e}", exc_info=True)
+        return jsonify({'error': 'Erro interno ao registrar resposta'}), 500
 
-        if not simulado_id or questao_id is None or resposta_usuario is None:
-             return jsonify({'error': 'Dados incompletos'}), 400
 
-        if simulado_id not in simulados_ativos:
+def _janela_simulado(simulado_id, simulado, inicio, quantidade):
+    """(etag, tempo restante, corpo) da janela de questões. ValueError se inicio/quantidade não forem inteiros."""
+    inicio = max(0, int(inicio))
+    quantidade = max(1, min(int(quantidade), MAX_JANELA))
+    questoes = simulado['questoes'][inicio:inicio + quantidade]
+    restante = _tempo_restante(simulado)
+    # Fraca: tempo_restante_segundos muda no corpo, as questões não
+    etag = f'{simulado_id}-{inicio}-{inicio + len(questoes)}'
+    return etag, restante, {
+        'inicio': inicio,
+        'questoes': [_questao_frontend(q) for q in questoes],
+        'total': len(simulado['questoes']),
+        'tempo_restante_segundos': restante
+    }
+
+@app.route('/api/simulado/<simulado_id>/questoes')
+def api_simulado_questoes(simulado_id):
+    """
+    Questões [inicio, inicio + quantidade) do simulado. O conteúdo não muda
+    durante o simulado: ETag por (simulado, faixa) e cache privado até o prazo.
+    """
+    try:
+        simulado = simulados_ativos.get(simulado_id)
+        if simulado is None:
             return jsonify({'error': 'Simulado não encontrado ou expirado'}), 404
+        etag, restante, corpo = _janela_simulado(
+            simulado_id, simulado, request.args.get('inicio', 0), request.args.get('quantidade', JANELA_INICIAL))
+        if request.if_none_match.contains_weak(etag):
+            resposta = app.response_class(status=304)
+        else:
+            resposta = jsonify(corpo)
+        resposta.set_etag(etag, weak=True)
+        resposta.headers['Cache-Control'] = f'private, max-age={restante}'
+        return resposta
+    except ValueError:
+        return jsonify({'error': 'inicio e quantidade devem ser inteiros'}), 400
+    except Exception as e:
+        logger.error(f"API /api/simulado/questoes: ERRO CRÍTICO - {e}", exc_info=True)
+        return jsonify({'error': 'Erro interno ao buscar questões'}), 500
 
-        simulados_ativos[simulado_id]['respostas'][questao_id] = resposta_usuario
-        #logger.info(f"Simulado {simulado_id}: Resposta registrada para questão {questao_id}")
-        return jsonify({'status': 'resposta registrada'})
 
+# ========== API - REVISÃO ESPAÇADA ==========
+
+@app.route('/api/revisao/resumo')
+def api_revisao_resumo():
+    try:
+        conn = get_db_connection()
+        try:
+            return jsonify(resumo_revisao(conn, obter_user_id()))
+        finally:
+            conn.close()
     except Exception as e:
-        logger.error(f"API /api/simulado/responder: ERRO CRÍTICO - {e}", exc_info=True)
+        logger.error(f"API /api/revisao/resumo: ERRO CRÍTICO - {e}", exc_info=True)
+        return jsonify({'error': 'Erro interno ao buscar revisões'}), 500
+
+@app.route('/api/revisao/iniciar', methods=['POST'])
+def api_revisao_iniciar():
+    """Simulado com as questões vencidas na agenda SM-2 (mais atrasadas primeiro)."""
+    try:
+        data = request.json or {}
+        quantidade = max(1, min(100, int(data.get('quantidade', 20))))
+        user_id = obter_user_id()
+
+        conn = get_db_connection()
+        try:
+            ids = questoes_para_revisar(conn, user_id, quantidade)
+        finally:
+            conn.close()
+
+        catalogo = _catalogo_questoes()
+        questions = [catalogo[i] for i in ids if i in catalogo]  # mantém a ordem de atraso
+        if not questions:
+            return jsonify({'error': 'Nenhuma questão para revisar agora'}), 404
+
+        simulado_id = _novo_simulado_id()
+        tempo_limite = tempo_limite_segundos(len(questions), data.get('tempo_limite_minutos'))
+        simulado = {
+            'questoes': questions,
+            'respostas': {},
+            'inicio': datetime.now().isoformat(),
+            'user_id': user_id,
+            'config': {'materia': 'todas', 'quantidade': len(questions), 'modo': 'revisao',
+                       'tempo_limite_segundos': int(tempo_limite)}
+        }
+        _registrar_simulado(simulado_id, simulado, tempo_limite)
+        logger.info(f"🔁 Revisão {simulado_id} iniciada com {len(questions)} questões.")
+        return jsonify(_inicio_simulado(simulado_id, simulado, data.get('janela')))
+    except ValueError:
+        return jsonify({'error': 'quantidade deve ser inteiro'}), 400
+    except Exception as e:
+        logger.error(f"API /api/revisao/iniciar: ERRO CRÍTICO - {e}", exc_info=True)
+        return jsonify({'error': 'Erro interno ao iniciar revisão'}), 500
+
+
+# ========== API - SIMULADO ADAPTATIVO (CAT) ==========
+
+def _proxima_questao_adaptativa(simulado):
+    """Escolhe, carrega e anexa ao simulado a próxima questão. None se acabaram."""
+    sessao = simulado['adaptativo']
+    while True:
+        questao_id = indice_cat.proxima(sessao.materia, sessao.theta, sessao.aplicadas)
+        if questao_id is None:
+            return None
+        sessao.aplicadas.add(questao_id)
+        questao = _catalogo_questoes().get(questao_id)
+        if questao is not None:
+            simulado['questoes'].append(questao)
+            return questao
+
+@app.route('/api/simulado/adaptativo/iniciar', methods=['POST'])
+def api_simulado_adaptativo_iniciar():
+    try:
+        data = request.json or {}
+        materia = data.get('materia') or 'todas'
+        indice_cat.garantir(get_db_connection, versao_catalogo.atual(get_db_connection),
+                            indice_itens.suspeitas(get_db_connection))
+        if indice_cat.tamanho(materia) == 0:
+            return jsonify({'error': 'Nenhuma questão encontrada para esta matéria'}), 404
+
+        simulado_id = _novo_simulado_id()
+        simulado = {
+            'questoes': [],
+            'respostas': {},
+            'inicio': datetime.now().isoformat(),
+            'user_id': obter_user_id(),
+            'config': {'materia': materia, 'modo': 'adaptativo'},
+            'adaptativo': SessaoAdaptativa(materia)
+        }
+        questao = _proxima_questao_adaptativa(simulado)
+        if questao is None:
+            return jsonify({'error': 'Nenhuma questão válida para esta matéria'}), 404
+        max_questoes = min(CAT_MAX_QUESTOES, indice_cat.tamanho(materia))
+        tempo_limite = tempo_limite_segundos(max_questoes, data.get('tempo_limite_minutos'))
+        simulado['config']['tempo_limite_segundos'] = int(tempo_limite)
+        _registrar_simulado(simulado_id, simulado, tempo_limite)
+        logger.info(f"🎯 Simulado adaptativo {simulado_id} iniciado ({materia}).")
+
+        return jsonify({
+            'simulado_id': simulado_id,
+            'questao': _questao_frontend(questao),
+            'habilidade': simulado['adaptativo'].resumo(),
+            'max_questoes': max_questoes,
+            'tempo_restante_segundos': _tempo_restante(simulado)
+        })
+    except Exception as e:
+        logger.error(f"API /api/simulado/adaptativo/iniciar: ERRO CRÍTICO - {e}", exc_info=True)
+        return jsonify({'error': 'Erro interno ao iniciar simulado adaptativo'}), 500
+
+@app.route('/api/simulado/adaptativo/responder', methods=['POST'])
+def api_simulado_adaptativo_responder():
+    """Corrige a resposta, atualiza θ e devolve a próxima questão ou o resultado final."""
+    try:
+        data = request.json or {}
+        simulado_id = data.get('simulado_id')
+        questao_id = data.get('questao_id')
+        resposta_usuario = data.get('resposta')
+        if not simulado_id or questao_id is None or resposta_usuario is None:
+            return jsonify({'error': 'Dados incompletos'}), 400
+
+        simulado = simulados_ativos.get(simulado_id)
+        if simulado is None or 'adaptativo' not in simulado:
+            return jsonify({'error': 'Simulado adaptativo não encontrado ou expirado'}), 404
+        if time.time() > simulado['prazo']:
+            return jsonify({'error': 'Tempo esgotado', 'tempo_restante_segundos': 0}), 410
+        atual = simulado['questoes'][-1]
+        if questao_id != atual['id'] or questao_id in simulado['respostas']:
+            return jsonify({'error': 'Questão não é a atual deste simulado'}), 409
+
+        sessao = simulado['adaptativo']
+        acertou = resposta_usuario == atual['resposta_correta']
+        simulado['respostas'][questao_id] = resposta_usuario
+        _registrar_tempo(simulado, questao_id, data.get('tempo_ms'))
+        sessao.registrar(questao_id, indice_cat.dificuldade(questao_id), acertou)
+
+        proxima = None
+        if not sessao.concluida(indice_cat.tamanho(sessao.materia)):
+            proxima = _proxima_questao_adaptativa(simulado)
+        if proxima is None:
+            simulado['config']['quantidade'] = len(simulado['questoes'])
+            resultado = _finalizar_simulado(simulado_id)
+            if resultado is None: # a thread de prazos finalizou antes
+                return jsonify({'error': 'Tempo esgotado', 'tempo_restante_segundos': 0}), 410
+            resultado['habilidade'] = sessao.resumo()
+            return jsonify({'concluido': True, 'acertou': acertou, 'resultado': resultado})
+
+        return jsonify({
+            'concluido': False,
+            'acertou': acertou,
+            'questao': _questao_frontend(proxima),
+            'habilidade': sessao.resumo(),
+            'tempo_restante_segundos': _tempo_restante(simulado)
+        })
+    except Exception as e:
+        logger.error(f"API /api/simulado/adaptativo/responder: ERRO CRÍTICO - {e}", exc_info=True)
         return jsonify({'error': 'Erro interno ao registrar resposta'}), 500
 
 
+def _finalizar_simulado(simulado_id, tempo_esgotado=False):
+    """
+    Corrige o simulado, grava histórico + agregados do usuário (uma transação) e libera a memória.
+    None se outra chamada (/finalizar ou a thread de prazos) já o finalizou.
+    """
+    simulado = simulados_ativos.pop(simulado_id, None) # retira primeiro: só uma chamada corrige
+    if simulado is None:
+        return None
+    agendador_prazos.cancelar(simulado_id)
+    tempo_restante = 0 if tempo_esgotado else _tempo_restante(simulado)
+    questoes_simulado = simulado['questoes']
+    respostas_usuario = simulado['respostas']
+    resultados_detalhados = []
+    acertos = 0
+    peso_total = 0
+    peso_acertos = 0
+    por_materia = {}
+    linhas_fato = []
+    user_id = simulado.get('user_id', 'anon')
+    ts = datetime.now().isoformat()
+    tempos = _tempos_por_questao(simulado)
+
+    logger.info(f"API /finalizar: Corrigindo simulado {simulado_id}...")
+    for questao in questoes_simulado:
+        q_id = questao['id']
+        resposta_correta = questao['resposta_correta']
+        resposta_dada = respostas_usuario.get(q_id) # Pega a resposta do usuário para essa questão
+        acertou = (resposta_dada == resposta_correta)
+        tempo_ms = tempos.get(q_id) if resposta_dada is not None else None
+
+        peso = questao.get('peso', 1)
+        peso_total += peso
+        chave_materia = (questao.get('disciplina') or 'Geral', questao['materia'])
+        stats_materia = por_materia.setdefault(
+            chave_materia, {'tentativas': 0, 'acertos': 0, 'n_tempo': 0, 'soma_tempo_ms': 0})
+        stats_materia['tentativas'] += 1
+        if tempo_ms is not None:
+            stats_materia['n_tempo'] += 1
+            stats_materia['soma_tempo_ms'] += tempo_ms
+        if acertou:
+            acertos += 1
+            peso_acertos += peso
+            stats_materia['acertos'] += 1
+        linhas_fato.append((user_id, simulado_id, q_id, questao['materia'], resposta_dada, int(acertou), tempo_ms, ts))
+
+        resultados_detalhados.append({
+            'id': q_id,
+            'materia': questao['materia'],
+            'questao': questao['questao'],
+            'alternativas': questao['alternativas'],
+            'resposta_correta': resposta_correta,
+            'resposta_dada': resposta_dada,
+            'acertou': acertou,
+            'tempo_ms': tempo_ms,
+            'explicacao': questao.get('explicacao') or 'Explicação não disponível.'
+        })
+
+    total_questoes = len(questoes_simulado)
+    percentual = round((acertos / total_questoes) * 100, 1) if total_questoes > 0 else 0
+    nota_final = round((peso_acertos / peso_total) * 100, 2) if peso_total > 0 else 0
+    data_fim = datetime.now()
+
+    relatorio = {
+        'simulado_id': simulado_id,
+        'total_questoes': total_questoes,
+        'total_respondidas': len(respostas_usuario),
+        'total_acertos': acertos,
+        'percentual_acerto': percentual,
+        'nota_final': nota_final,
+        'data_fim': data_fim.isoformat()
+    }
+
+    # Histórico + agregados + respostas na mesma transação: o dashboard nunca vê um sem o outro
+    inicio = datetime.fromisoformat(simulado['inicio'])
+    conn = get_db_connection()
+    try:
+        conn.execute('''
+            INSERT INTO historico_simulados
+            (user_id, simulado_id, config, respostas, relatorio, data_inicio, data_fim, tempo_total_minutos)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            user_id,
+            simulado_id,
+            json.dumps({**simulado.get('config', {}), 'questoes_ids': [q['id'] for q in questoes_simulado]}),
+            json.dumps({str(k): v for k, v in respostas_usuario.items()}),
+            json.dumps(relatorio),
+            simulado['inicio'],
+            relatorio['data_fim'],
+            round((data_fim - inicio).total_seconds() / 60, 2)
+        ))
+        atualizar_estatisticas_usuario(conn, user_id, relatorio, por_materia)
+        gravar_respostas(conn, linhas_fato)
+        # Em branco (inclusive o resto de um simulado abandonado e finalizado por tempo) não é tentativa
+        # do item nem entra na agenda de revisão: a questão nunca foi vista
+        respondidas = [linha for linha in linhas_fato if linha[4] is not None]
+        atualizar_estatisticas_itens(conn, [(linha[2], linha[5], linha[6]) for linha in respondidas])
+        atualizar_serie(conn, user_id, relatorio, por_materia)
+        agendar_revisoes(conn, user_id, [(linha[2], linha[5]) for linha in respondidas], data_fim)
+        conn.commit()
+        cache_recomendacoes.invalidar(user_id)
+        if simulado.get('config', {}).get('modo') != 'revisao':  # revisão só tem questões já erradas
+            ranking.registrar(user_id, nota_final, chave_blueprint(simulado.get('config'), total_questoes))
+    except Exception as db_error:
+        conn.rollback()
+        logger.error(f"API /finalizar: Erro ao salvar histórico do simulado {simulado_id}: {db_error}")
+    finally:
+        conn.close()
+
+    logger.info(f"✅ Simulado {simulado_id} finalizado: {acertos}/{total_questoes} acertos ({percentual}%)")
+
+    return {
+        'simulado_id': simulado_id,
+        'acertos': acertos,
+        'total': total_questoes,
+        'percentual': percentual,
+        'nota_final': nota_final,
+        'percentil': ranking.percentil(nota_final),
+        'percentil_blueprint': ranking.percentil(nota_final, chave_blueprint(simulado.get('config'), total_questoes)),
+        'tempo_esgotado': tempo_esgotado,
+        'tempo_restante_segundos': tempo_restante,
+        'resultados': resultados_detalhados # Envia detalhes para o frontend exibir
+    }
+
+
+def _finalizar_ou_expirado(simulado_id):
+    """Finaliza agora ou devolve o resultado de quando a thread de prazos finalizou. None se não existe."""
+    resultado = _finalizar_simulado(simulado_id)
+    if resultado is None:
+        resultado = resultados_expirados.pop(simulado_id, None)
+    return resultado
+
 @app.route('/api/simulado/finalizar', methods=['POST'])
 def api_simulado_finalizar():
     logger.info(f'API /api/simulado/finalizar: Iniciando...')
@@ -200,53 +763,11 @@ def api_simulado_finalizar():
         data = request.json
         simulado_id = data.get('simulado_id')
 
-        if simulado_id not in simulados_ativos:
+        resultado_final = _finalizar_ou_expirado(simulado_id)
+        if resultado_final is None:
             logger.warning(f"API /finalizar: Tentativa de finalizar simulado inexistente: {simulado_id}")
             return jsonify({'error': 'Simulado não encontrado ou já finalizado'}), 404
 
-        simulado = simulados_ativos[simulado_id]
-        questoes_simulado = simulado['questoes']
-        respostas_usuario = simulado['respostas']
-        resultados_detalhados = []
-        acertos = 0
-
-        logger.info(f"API /finalizar: Corrigindo simulado {simulado_id}...")
-        for questao in questoes_simulado:
-            q_id = questao['id']
-            resposta_correta = questao['resposta_correta']
-            resposta_dada = respostas_usuario.get(q_id) # Pega a resposta do usuário para essa questão
-            acertou = (resposta_dada == resposta_correta)
-
-            if acertou:
-                acertos += 1
-
-            resultados_detalhados.append({
-                'id': q_id,
-                'materia': questao['materia'],
-                'questao': questao['questao'],
-                'alternativas': questao['alternativas'],
-                'resposta_correta': resposta_correta,
-                'resposta_dada': resposta_dada,
-                'acertou': acertou,
-                'explicacao': questao.get('explicacao', 'Explicação não disponível.') # Usa .get() por segurança
-            })
-
-        total_questoes = len(questoes_simulado)
-        percentual = round((acertos / total_questoes) * 100, 1) if total_questoes > 0 else 0
-
-        resultado_final = {
-            'simulado_id': simulado_id,
-            'acertos': acertos,
-            'total': total_questoes,
-            'percentual': percentual,
-            'resultados': resultados_detalhados # Envia detalhes para o frontend exibir
-        }
-
-        logger.info(f"✅ Simulado {simulado_id} finalizado: {acertos}/{total_questoes} acertos ({percentual}%)")
-
-        # Limpar da memória
-        del simulados_ativos[simulado_id]
-
         return jsonify(resultado_final)
 
     except Exception as e:
@@ -256,21 +777,24 @@ def api_simulado_finalizar():
 
 # ========== API - REDAÇÃO ==========
 
+def _carregar_temas():
+    logger.info(f'API /redacao/temas: Conectando ao DB em {DB_PATH}')
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    # Ajuste: Selecionar colunas que existem na tabela 'temas_redacao'
+    # (Baseado no script importar_dados.py, a tabela tem: id, titulo, descricao, tipo, dificuldade, palavras_chave)
+    logger.info('API /redacao/temas: Executando query...')
+    cursor.execute("SELECT id, titulo, tipo, dificuldade FROM temas_redacao ORDER BY titulo") # Removido 'categoria' se não existir
+    temas = [{'id': row[0], 'tema': row[1], 'tipo': row[2], 'dificuldade': row[3]} for row in cursor.fetchall()]
+    conn.close()
+    logger.info(f'API /redacao/temas: ENCONTRADO {len(temas)} temas. Conexão fechada.')
+    return temas
+
 @app.route('/api/redacao/temas')
 def api_redacao_temas():
     logger.info(f'API /api/redacao/temas: Iniciando...')
     try:
-        logger.info(f'API /redacao/temas: Conectando ao DB em {DB_PATH}')
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        # Ajuste: Selecionar colunas que existem na tabela 'temas_redacao'
-        # (Baseado no script importar_dados.py, a tabela tem: id, titulo, descricao, tipo, dificuldade, palavras_chave)
-        logger.info('API /redacao/temas: Executando query...')
-        cursor.execute("SELECT id, titulo, tipo, dificuldade FROM temas_redacao ORDER BY titulo") # Removido 'categoria' se não existir
-        temas = [{'id': row[0], 'tema': row[1], 'tipo': row[2], 'dificuldade': row[3]} for row in cursor.fetchall()]
-        conn.close()
-        logger.info(f'API /redacao/temas: ENCONTRADO {len(temas)} temas. Conexão fechada.')
-        return jsonify(temas)
+        return _resposta_catalogo('temas', _carregar_temas)
     except Exception as e:
         logger.error(f'API /api/redacao/temas: ERRO CRÍTICO - {e}')
         # Log específico para erro de coluna
@@ -279,6 +803,60 @@ def api_redacao_temas():
         return jsonify({'error': 'Erro interno ao buscar temas de redação'}), 500
 
 
+def _pre_analisar(conn, tema, texto):
+    """Métricas locais + limites mínimos, usando as palavras-chave do tema quando existirem."""
+    row = conn.execute("SELECT palavras_chave FROM temas_redacao WHERE titulo = ?", (tema,)).fetchone()
+    metricas = analisar_redacao(texto, tema, row[0] if row else None)
+    problemas, alertas = avaliar_minimos(metricas)
+    return {'metricas': metricas, 'problemas': problemas, 'alertas': alertas, 'apta': not problemas}
+
+
+@app.route('/api/redacao/pre-analise', methods=['POST'])
+def api_redacao_pre_analise():
+    # Resposta instantânea (sem LLM) exibida enquanto a correção completa roda
+    try:
+        data = request.json
+        tema = data.get('tema', '')
+        texto = data.get('texto', '')
+        conn = get_db_connection()
+        try:
+            return jsonify(_pre_analisar(conn, tema, texto))
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.error(f"API /api/redacao/pre-analise: ERRO CRÍTICO - {e}", exc_info=True)
+        return jsonify({'error': 'Erro interno na pré-análise'}), 500
+
+
+def _preparar_correcao(tema, texto):
+    """(hash, pré-análise, correção em cache ou None). Redação não apta não consulta o cache."""
+    hash_conteudo = hash_redacao(tema, texto)
+    conn = get_db_connection()
+    try:
+        pre_analise = _pre_analisar(conn, tema, texto)
+        resultado = buscar_cache(conn, hash_conteudo) if pre_analise['apta'] else None
+    finally:
+        conn.close()
+    if resultado:
+        resultado['pre_analise'] = pre_analise
+    return hash_conteudo, pre_analise, resultado
+
+def _gravar_correcao(user_id, tema, texto, hash_conteudo, resultado, do_cache=False):
+    """
+    Persiste no cache (se veio do LLM) e no histórico do aluno: recarregar a
+    página não gera nova chamada ao LLM. Preenche resultado['redacao_id'].
+    Correção incompleta (competências zeradas por falta de análise) não vai
+    para o cache: o mesmo texto reenviado ganha uma correção de verdade.
+    """
+    conn = get_db_connection()
+    try:
+        if not do_cache and not resultado.get('incompleta'):
+            salvar_cache(conn, hash_conteudo, resultado)
+        resultado['redacao_id'] = salvar_historico_redacao(conn, user_id, tema, texto, resultado)
+        conn.commit()
+    finally:
+        conn.close()
+
 @app.route('/api/redacao/corrigir-gemini', methods=['POST'])
 def api_redacao_corrigir_gemini():
     logger.info(f"API /api/redacao/corrigir-gemini: Iniciando...")
@@ -293,70 +871,37 @@ def api_redacao_corrigir_gemini():
 
         logger.info(f"API /corrigir-gemini: Recebido - Tema: {tema}, Texto: {len(texto)} chars")
 
+        # Pré-análise local: redações muito curtas ou fora do tema não vão ao LLM
+        hash_conteudo, pre_analise, resultado = _preparar_correcao(tema, texto)
+        if not pre_analise['apta']:
+            logger.info(f"API /corrigir-gemini: Barrada na pré-análise - {pre_analise['problemas']}")
+            return jsonify({'error': ' '.join(pre_analise['problemas']), 'pre_analise': pre_analise}), 422
+        if resultado:
+            logger.info(f"API /corrigir-gemini: Cache HIT ({hash_conteudo[:12]}) - Nota: {resultado['nota']}")
+            _gravar_correcao(obter_user_id(), tema, texto, hash_conteudo, resultado, do_cache=True)
+            return jsonify(resultado)
+
         # Tenta configurar/usar Gemini AQUI
         try:
-            current_api_key = os.environ.get('GEMINI_API_KEY')
-            if not current_api_key:
-                 raise ValueError("Chave da API Gemini não configurada no ambiente.")
-            genai.configure(api_key=current_api_key) # Reconfigura a cada chamada para garantir
-            model = genai.GenerativeModel('gemini-pro') # Use o modelo desejado (gemini-pro, gemini-flash, etc.)
+            model = obter_modelo() # Reconfigura a cada chamada para garantir
             logger.info("API /corrigir-gemini: Modelo Gemini carregado.")
         except Exception as e_gemini_config:
             logger.error(f'API /corrigir-gemini: ERRO CRÍTICO ao configurar Gemini - {e_gemini_config}')
             return jsonify({'error': f'Falha ao configurar API do Gemini: {e_gemini_config}'}), 503 # Service Unavailable
 
-
-        prompt = f"""
-        CORREÇÃO DE REDAÇÃO - MODELO ENEM
-
-        TEMA: {tema}
-
-        TEXTO DO ESTUDANTE:
-        {texto}
-
-        ANALISE ESTA REDAÇÃO SEGUINDO OS 5 CRITÉRIOS DO ENEM (0-200 pontos cada):
-        1. Domínio da norma culta.
-        2. Compreensão do tema e estrutura dissertativo-argumentativa.
-        3. Seleção, relação, organização e interpretação de informações, fatos, opiniões e argumentos em defesa de um ponto de vista.
-        4. Conhecimento dos mecanismos linguísticos necessários para a construção da argumentação (coesão).
-        5. Elaboração de proposta de intervenção para o problema abordado, respeitando os direitos humanos.
-
-        FORNEÇA O FEEDBACK EM MARKDOWN, INCLUINDO:
-        - Nota Final (SOMA DAS COMPETÊNCIAS, 0-1000) - Coloque no formato: **Nota Final:** XXXX/1000
-        - Análise detalhada por Competência (C1 a C5), com a pontuação de cada uma.
-        - Pontos Fortes gerais.
-        - Pontos a Melhorar gerais.
-        - Sugestões Específicas para aprimoramento.
-        """
-
         logger.info("API /corrigir-gemini: Enviando prompt para Gemini...")
-        response = model.generate_content(prompt)
-        correcao_md = response.text
+        resultado = corrigir_redacao(tema, texto, model=model)
         logger.info("API /corrigir-gemini: Resposta recebida do Gemini.")
+        resultado['pre_analise'] = pre_analise
+        _gravar_correcao(obter_user_id(), tema, texto, hash_conteudo, resultado)
 
-        # Extrair nota (Regex mais robusto)
-        nota = 0 # Default
-        try:
-            # Procura por "Nota Final:", seguido de espaços, seguido de 3 ou 4 dígitos
-            nota_match = re.search(r"Nota Final:\s*(\d{3,4})", correcao_md, re.IGNORECASE)
-            if nota_match:
-                nota = int(nota_match.group(1))
-                logger.info(f"API /corrigir-gemini: Nota extraída da resposta: {nota}")
-            else:
-                logger.warning("API /corrigir-gemini: Não foi possível extrair a nota do texto. Usando 0.")
-        except Exception as e_nota:
-             logger.error(f"API /corrigir-gemini: Erro ao extrair nota: {e_nota}")
-
+        logger.info(f"✅ Correção concluída - Nota: {resultado['nota']}")
 
-        logger.info(f"✅ Correção concluída - Nota: {nota}")
-
-        return jsonify({
-            'nota': nota,
-            'correcao': correcao_md, # Envia o markdown completo
-            'tema': tema,
-            'timestamp': datetime.now().isoformat()
-        })
+        return jsonify(resultado)
 
+    except CorrecaoInvalidaError as e:
+        logger.error(f"API /api/redacao/corrigir-gemini: Resposta do Gemini irrecuperável - {e}")
+        return jsonify({'error': 'O corretor automático retornou uma resposta inválida. Tente novamente.'}), 502 # Bad Gateway
     except Exception as e:
         logger.error(f"API /api/redacao/corrigir-gemini: ERRO CRÍTICO - {e}", exc_info=True)
         # Verifica se o erro foi da API do Google especificamente
@@ -365,41 +910,98 @@ def api_redacao_corrigir_gemini():
         return jsonify({'error': 'Erro interno ao processar correção'}), 500
 
 
-# ========== API - DASHBOARD ==========
-
-@app.route('/api/dashboard/estatisticas')
-def api_dashboard_estatisticas():
-    logger.info(f'API /api/dashboard/estatisticas: Iniciando...')
+@app.route('/api/redacao/historico')
+def api_redacao_historico():
+    # Lista paginada (sem texto nem correção completa); detalhes em /api/redacao/historico/<id>
     try:
-        logger.info(f'API /dashboard/estatisticas: Conectando ao DB em {DB_PATH}')
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        pagina = max(1, int(request.args.get('pagina', 1)))
+        por_pagina = min(50, max(1, int(request.args.get('por_pagina', 10))))
+        conn = get_db_connection()
+        try:
+            itens, total = listar_historico_redacoes(conn, obter_user_id(), pagina, por_pagina)
+        finally:
+            conn.close()
+        return jsonify({
+            'redacoes': itens,
+            'pagina': pagina,
+            'por_pagina': por_pagina,
+            'total': total,
+            'total_paginas': (total + por_pagina - 1) // por_pagina
+        })
+    except ValueError:
+        return jsonify({'error': 'Parâmetros de paginação inválidos'}), 400
+    except Exception as e:
+        logger.error(f"API /api/redacao/historico: ERRO CRÍTICO - {e}", exc_info=True)
+        return jsonify({'error': 'Erro interno ao buscar histórico de redações'}), 500
 
-        # Estatísticas do banco
-        logger.info('API /dashboard: Executando queries de contagem...')
-        cursor.execute("SELECT COUNT(*) FROM questions")
-        total_questoes = cursor.fetchone()[0]
-        logger.info(f'API /dashboard: Contagem Questoes = {total_questoes}')
 
-        cursor.execute("SELECT COUNT(*) FROM temas_redacao")
-        total_temas = cursor.fetchone()[0]
-        logger.info(f'API /dashboard: Contagem Temas = {total_temas}')
+@app.route('/api/redacao/historico/<int:redacao_id>')
+def api_redacao_historico_detalhe(redacao_id):
+    # Correção armazenada: servida direto do banco, sem chamar o LLM
+    try:
+        conn = get_db_connection()
+        try:
+            redacao = obter_redacao_historico(conn, obter_user_id(), redacao_id)
+        finally:
+            conn.close()
+        if not redacao:
+            return jsonify({'error': 'Redação não encontrada'}), 404
+        return jsonify(redacao)
+    except Exception as e:
+        logger.error(f"API /api/redacao/historico/{redacao_id}: ERRO CRÍTICO - {e}", exc_info=True)
+        return jsonify({'error': 'Erro interno ao buscar redação'}), 500
 
-        cursor.execute("SELECT COUNT(DISTINCT materia) FROM questions")
-        total_materias = cursor.fetchone()[0]
-        logger.info(f'API /dashboard: Contagem Materias = {total_materias}')
 
-        conn.close()
-        logger.info('API /dashboard: Conexão com DB fechada.')
+# ========== API - DASHBOARD ==========
 
-        resultado = {
-            'total_questoes': total_questoes,
-            'total_temas': total_temas,
-            'total_materias': total_materias,
-            'ultima_atualizacao': datetime.now().isoformat()
-        }
-        logger.info(f'API /dashboard: Estatísticas calculadas: {resultado}')
-        return jsonify(resultado) # <--- Return DENTRO do try
+def _carregar_contagens_catalogo():
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    logger.info('API /dashboard: Executando queries de contagem...')
+    cursor.execute("SELECT COUNT(*) FROM questions")
+    total_questoes = cursor.fetchone()[0]
+    logger.info(f'API /dashboard: Contagem Questoes = {total_questoes}')
+
+    cursor.execute("SELECT COUNT(*) FROM temas_redacao")
+    total_temas = cursor.fetchone()[0]
+    logger.info(f'API /dashboard: Contagem Temas = {total_temas}')
+
+    cursor.execute("SELECT COUNT(DISTINCT materia) FROM questions")
+    total_materias = cursor.fetchone()[0]
+    logger.info(f'API /dashboard: Contagem Materias = {total_materias}')
+    conn.close()
+    return {'total_questoes': total_questoes, 'total_temas': total_temas, 'total_materias': total_materias}
+
+def _estatisticas_dashboard(user_id):
+    # Estatísticas do banco (parte do catálogo: recontadas só quando a versão muda)
+    versao = versao_catalogo.atual(get_db_connection)
+    contagens = _dados_catalogo('contagens', versao, _carregar_contagens_catalogo)
+
+    logger.info(f'API /dashboard/estatisticas: Conectando ao DB em {DB_PATH}')
+    conn = sqlite3.connect(DB_PATH)
+
+    # Desempenho do aluno: 1 linha de agregados + janela recente (não relê todo o histórico)
+    desempenho = obter_estatisticas_usuario(conn, user_id)
+    recomendacoes = cache_recomendacoes.obter(user_id, versao, get_db_connection, n=5)
+
+    conn.close()
+    logger.info('API /dashboard: Conexão com DB fechada.')
+
+    resultado = {
+        **contagens,
+        'catalogo_versao': versao,
+        'desempenho': desempenho,
+        'recomendacoes': recomendacoes,
+        'ultima_atualizacao': datetime.now().isoformat()
+    }
+    logger.info(f'API /dashboard: Estatísticas calculadas: {resultado}')
+    return resultado
+
+@app.route('/api/dashboard/estatisticas')
+def api_dashboard_estatisticas():
+    logger.info(f'API /api/dashboard/estatisticas: Iniciando...')
+    try:
+        return jsonify(_estatisticas_dashboard(obter_user_id())) # <--- Return DENTRO do try
 
     except Exception as e: # <--- Bloco EXCEPT CORRETO
         logger.error(f'API /dashboard/estatisticas: ERRO CRÍTICO - {e}', exc_info=True)
@@ -410,6 +1012,130 @@ def api_dashboard_estatisticas():
         return jsonify({'error': 'Erro interno ao buscar estatísticas'}), 500
 
 
+@app.route('/api/recomendacoes')
+def api_recomendacoes():
+    """Assuntos com maior ganho esperado de nota para o aluno (cache até o próximo finalizar)."""
+    try:
+        n = max(1, min(TOP_N_RECOMENDACOES, int(request.args.get('n', 5))))
+    except ValueError:
+        return jsonify({'error': 'n deve ser inteiro'}), 400
+    try:
+        versao = versao_catalogo.atual(get_db_connection)
+        recomendacoes = cache_recomendacoes.obter(obter_user_id(), versao, get_db_connection, n=n)
+        return jsonify({'recomendacoes': recomendacoes})
+    except Exception as e:
+        logger.error(f'API /api/recomendacoes: ERRO CRÍTICO - {e}', exc_info=True)
+        return jsonify({'error': 'Erro interno ao gerar recomendações'}), 500
+
+
+# ========== API - RANKING ==========
+
+def _mascarar_user_id(user_id):
+    return f"{user_id[:5]}***{user_id[-2:]}" if user_id and len(user_id) > 7 else '***'
+
+@app.route('/api/ranking/percentil')
+def api_ranking_percentil():
+    """Percentil de uma nota no ranking geral ou de um blueprint (ex.: ?blueprint=todas:20)."""
+    blueprint = request.args.get('blueprint', RANKING_GERAL)
+    try:
+        nota = float(request.args['nota'])
+    except (KeyError, ValueError):
+        return jsonify({'error': 'Informe a nota (número de 0 a 100)'}), 400
+    return jsonify({
+        'nota': nota,
+        'blueprint': blueprint,
+        'percentil': ranking.percentil(nota, blueprint),
+        'total_simulados': ranking.total(blueprint)
+    })
+
+@app.route('/api/ranking/lideres')
+def api_ranking_lideres():
+    blueprint = request.args.get('blueprint', RANKING_GERAL)
+    try:
+        n = max(1, min(100, int(request.args.get('n', 10))))
+    except ValueError:
+        return jsonify({'error': 'n deve ser inteiro'}), 400
+    user_id = obter_user_id()
+    lideres = [{
+        'posicao': posicao,
+        'usuario': _mascarar_user_id(uid),
+        'nota_final': nota,
+        'voce': uid == user_id
+    } for posicao, (uid, nota) in enumerate(ranking.lideres(n, blueprint), start=1)]
+    return jsonify({'blueprint': blueprint, 'lideres': lideres, 'blueprints': ranking.blueprints()})
+
+
+@app.route('/api/dashboard/serie')
+def api_dashboard_serie():
+    """Evolução de nota_final e acerto por disciplina, reduzida a no máximo `pontos` pontos."""
+    granularidade = request.args.get('granularidade', 'dia')
+    if granularidade not in ('dia', 'semana'):
+        return jsonify({'error': "granularidade deve ser 'dia' ou 'semana'"}), 400
+    inicio = request.args.get('inicio')
+    fim = request.args.get('fim')
+    try:
+        for data in (inicio, fim):
+            if data:
+                datetime.strptime(data, '%Y-%m-%d')
+        pontos = int(request.args.get('pontos', 100))
+    except ValueError:
+        return jsonify({'error': 'Parâmetros inválidos (datas em AAAA-MM-DD, pontos inteiro)'}), 400
+
+    try:
+        conn = get_db_connection()
+        try:
+            serie = consultar_serie(conn, obter_user_id(), inicio, fim, granularidade, pontos)
+        finally:
+            conn.close()
+        return jsonify(serie)
+    except Exception as e:
+        logger.error(f'API /dashboard/serie: Erro - {e}', exc_info=True)
+        return jsonify({'error': 'Erro interno ao buscar série de desempenho'}), 500
+
+
+# ========== API - ADMIN ==========
+
+def _admin_autorizado():
+    """Rotas de admin exigem o header X-Admin-Token igual à variável ADMIN_TOKEN."""
+    token = os.environ.get('ADMIN_TOKEN')
+    return bool(token) and request.headers.get('X-Admin-Token') == token
+
+
+@app.route('/api/admin/questoes/estatisticas')
+def api_admin_questoes_estatisticas():
+    # Questões mal calibradas ou quebradas: ordena pelas piores discriminações
+    if not _admin_autorizado():
+        return jsonify({'error': 'Acesso negado'}), 403
+    try:
+        apenas_suspeitas = request.args.get('suspeitas') == '1'
+        conn = get_db_connection()
+        try:
+            itens = listar_estatisticas_itens(conn)
+        finally:
+            conn.close()
+        if apenas_suspeitas:
+            itens = [i for i in itens if i['suspeita']]
+        itens.sort(key=lambda i: (i['discriminacao'] is None, i['discriminacao'] if i['discriminacao'] is not None else 0))
+        return jsonify({'total': len(itens), 'questoes': itens})
+    except Exception as e:
+        logger.error(f"API /api/admin/questoes/estatisticas: ERRO CRÍTICO - {e}", exc_info=True)
+        return jsonify({'error': 'Erro interno ao buscar estatísticas das questões'}), 500
+
+
+@app.route('/api/admin/metricas')
+def api_admin_metricas():
+    if not _admin_autorizado():
+        return jsonify({'error': 'Acesso negado'}), 403
+    return jsonify({
+        'compressao': compressao.metricas(),
+        'simulados': {
+            'ativos': len(simulados_ativos),
+            'prazos_pendentes': agendador_prazos.pendentes(),
+            'finalizados_por_tempo': agendador_prazos.expirados
+        }
+    })
+
+
 # ========== ROTA DE DEBUG (Opcional, manter se útil) ==========
 @app.route('/debug/list-files')
 def list_files():
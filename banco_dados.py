@@ -0,0 +1,122 @@
+"""
+Acesso compartilhado ao banco concursos.db (app web, CLIs e jobs).
+Centraliza o caminho do banco, a abertura de conexões e as migrações
+idempotentes das tabelas auxiliares.
+"""
+import os
+import sqlite3
+import logging
+
+from estatisticas_usuario import criar_tabelas_estatisticas
+from respostas_fato import criar_tabela_respostas_fato
+from estatisticas_itens import criar_tabela_estatisticas_itens
+from serie_desempenho import criar_tabelas_serie
+from catalogo import criar_tabela_catalogo, incrementar_versao_catalogo
+from revisao import criar_tabela_revisao
+
+logger = logging.getLogger(__name__)
+
+# Definir o caminho absoluto para o banco de dados
+# (CONCURSOS_DB_PATH aponta para outro arquivo, ex.: a cópia usada no teste de carga)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.environ.get('CONCURSOS_DB_PATH') or os.path.join(BASE_DIR, 'concursos.db')
+
+
+def get_db_connection(db_path=None):
+    """Abre uma conexão com row_factory e busy_timeout configurados."""
+    conn = sqlite3.connect(db_path or DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA busy_timeout = 5000")
+    return conn
+
+
+def garantir_esquema(conn):
+    """Cria (se necessário) as tabelas e índices auxiliares. Idempotente."""
+    cursor = conn.cursor()
+
+    # Histórico de redações (já existe no concursos.db, recriado apenas em bancos novos)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS historico_redacoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            tema_id INTEGER NOT NULL,
+            texto TEXT NOT NULL,
+            correcao TEXT,
+            nota_final REAL,
+            data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            data_correcao TIMESTAMP
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_historico_redacoes_user_data
+        ON historico_redacoes (user_id, data_correcao)
+    ''')
+
+    # Cache de correções por hash do conteúdo (tema + texto normalizados)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cache_correcoes (
+            hash TEXT PRIMARY KEY,
+            tema TEXT NOT NULL,
+            nota REAL,
+            correcao TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Histórico de simulados (já existe no concursos.db, recriado apenas em bancos novos)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS historico_simulados (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            simulado_id TEXT NOT NULL UNIQUE,
+            config TEXT NOT NULL,
+            respostas TEXT NOT NULL,
+            relatorio TEXT NOT NULL,
+            data_inicio TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            data_fim TIMESTAMP,
+            tempo_total_minutos REAL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_historico_simulados_user_data
+        ON historico_simulados (user_id, data_fim)
+    ''')
+
+    # Agregados incrementais por usuário
+    criar_tabelas_estatisticas(conn)
+
+    # Uma linha por questão respondida (análises por questão sem decodificar JSON)
+    criar_tabela_respostas_fato(conn)
+
+    # Estatísticas por questão (dificuldade empírica, discriminação, tempo médio)
+    criar_tabela_estatisticas_itens(conn)
+
+    # Rollup diário da série de desempenho (gráfico de evolução do dashboard)
+    criar_tabelas_serie(conn)
+
+    # Agenda de revisão espaçada (SM-2) por usuário e questão
+    criar_tabela_revisao(conn)
+
+    # Versão do catálogo (ETag das rotas de leitura) + triggers em questions/temas_redacao
+    criar_tabela_catalogo(conn)
+
+    # Palavras-chave por tema (usadas na pré-análise local da redação)
+    if _adicionar_coluna(conn, 'temas_redacao', 'palavras_chave', 'TEXT'):
+        incrementar_versao_catalogo(conn, '(migração temas_redacao.palavras_chave)')
+
+    # Tempo de resposta por matéria (média = soma_tempo_ms / n_tempo)
+    _adicionar_coluna(conn, 'user_stats_materia', 'n_tempo', 'INTEGER NOT NULL DEFAULT 0')
+    _adicionar_coluna(conn, 'user_stats_materia', 'soma_tempo_ms', 'INTEGER NOT NULL DEFAULT 0')
+
+    conn.commit()
+
+
+def _adicionar_coluna(conn, tabela, coluna, tipo):
+    """ALTER TABLE ADD COLUMN apenas se a tabela existir e a coluna não. Retorna True se alterou."""
+    colunas = {row[1] for row in conn.execute(f"PRAGMA table_info({tabela})")}
+    if colunas and coluna not in colunas:
+        conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {tipo}")
+        logger.info(f"Migração: coluna {tabela}.{coluna} adicionada.")
+        return True
+    return False
@@ -0,0 +1,323 @@
+"""
+Gerador de carga: alunos virtuais jogando simulados completos contra a app web.
+Cada aluno virtual (uma thread, com sua própria sessão/cookie) repete:
+
+    GET  /api/materias
+    POST /api/simulado/iniciar            (ou /adaptativo/iniciar)
+    GET  /api/simulado/<id>/questoes      janelas seguintes do manifesto
+    POST /api/simulado/responder          x questões, com tempo de pensar
+    POST /api/simulado/finalizar
+    GET  /api/dashboard/estatisticas
+
+A resposta certa sai do gabarito lido do banco local (questions), então a
+taxa de acerto é configurável; sem banco, o aluno chuta. Ao final, imprime
+p50/p95/p99 de latência por endpoint para dimensionar workers/threads do
+gunicorn antes dos picos de véspera de prova.
+
+Sem --url, usa o test client do Flask no próprio processo (mede a app sem
+rede nem servidor), gravando numa cópia temporária do banco: histórico,
+estatísticas de itens, ranking e revisões do banco real não recebem os
+alunos virtuais (--banco-real desliga a cópia). Com --url, faz HTTP de
+verdade contra o servidor (e grava no banco dele).
+
+Uso:
+    python carga_simulados.py --alunos 200 --simulados 3 --questoes 10 --acerto 0.6
+    python carga_simulados.py --url http://localhost:5000 --alunos 2000 --pensar exp:2.0
+    python carga_simulados.py --adaptativo --alunos 50 --pensar lognormal:1.5
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import sqlite3
+import logging
+import tempfile
+import argparse
+import threading
+import urllib.error
+import urllib.request
+import http.cookiejar
+from concurrent.futures import ThreadPoolExecutor
+
+import banco_dados
+from banco_dados import DB_PATH
+
+logger = logging.getLogger(__name__)
+
+LETRAS = 'ABCDE'
+
+
+def percentil(valores_ordenados, p):
+    """Percentil por posição mais próxima (nearest-rank) de uma lista já ordenada."""
+    if not valores_ordenados:
+        return None
+    k = max(0, min(len(valores_ordenados) - 1, math.ceil(p / 100 * len(valores_ordenados)) - 1))
+    return valores_ordenados[k]
+
+
+class MetricasCarga:
+    """Latências (ms) e falhas por endpoint, compartilhadas entre as threads."""
+
+    def __init__(self):
+        self._latencias = {}
+        self._erros = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, endpoint, ms, ok):
+        with self._lock:
+            self._latencias.setdefault(endpoint, []).append(ms)
+            if not ok:
+                self._erros[endpoint] = self._erros.get(endpoint, 0) + 1
+
+    def resumo(self):
+        with self._lock:
+            itens = {e: sorted(v) for e, v in self._latencias.items()}
+            erros = dict(self._erros)
+        return {
+            endpoint: {
+                'requisicoes': len(v),
+                'erros': erros.get(endpoint, 0),
+                'p50_ms': percentil(v, 50),
+                'p95_ms': percentil(v, 95),
+                'p99_ms': percentil(v, 99),
+                'max_ms': v[-1],
+            }
+            for endpoint, v in itens.items()
+        }
+
+
+def tempo_de_pensar(especificacao):
+    """'fixo:1.0', 'exp:2.0' ou 'lognormal:1.5' (média em segundos) -> função sem argumentos."""
+    distribuicao, _, media = (especificacao or 'fixo:0').partition(':')
+    media = float(media or 0)
+    if media <= 0:
+        return lambda: 0.0
+    if distribuicao == 'fixo':
+        return lambda: media
+    if distribuicao == 'exp':
+        return lambda: random.expovariate(1.0 / media)
+    if distribuicao == 'lognormal':
+        sigma = 0.6
+        mu = math.log(media) - sigma * sigma / 2  # média da lognormal = media
+        return lambda: random.lognormvariate(mu, sigma)
+    raise ValueError(f"Distribuição de tempo desconhecida: {distribuicao} (use fixo, exp ou lognormal)")
+
+
+class ClienteTeste:
+    """Test client do Flask (uma instância por aluno = um cookie de sessão por aluno)."""
+
+    def __init__(self, app):
+        self._cliente = app.test_client()
+
+    def chamar(self, metodo, caminho, corpo=None):
+        resposta = self._cliente.open(caminho, method=metodo, json=corpo)
+        return resposta.status_code, resposta.get_json(silent=True)
+
+
+class ClienteHTTP:
+
+    def __init__(self, base_url, timeout=60):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def chamar(self, metodo, caminho, corpo=None):
+        dados = json.dumps(corpo).encode('utf-8') if corpo is not None else None
+        requisicao = urllib.request.Request(self.base_url + caminho, data=dados, method=metodo,
+                                            headers={'Content-Type': 'application/json'})
+        try:
+            with self._opener.open(requisicao, timeout=self.timeout) as resposta:
+                return resposta.status, json.loads(resposta.read() or b'null')
+        except urllib.error.HTTPError as e:
+            return e.code, None
+        except (urllib.error.URLError, OSError):
+            return 0, None
+
+
+class AlunoVirtual:
+
+    def __init__(self, cliente, metricas, gabarito, acerto=0.6, pensar=lambda: 0.0,
+                 questoes=10, materias=None, adaptativo=False):
+        self.cliente = cliente
+        self.metricas = metricas
+        self.gabarito = gabarito
+        self.acerto = acerto
+        self.pensar = pensar
+        self.questoes = questoes
+        self.materias = materias or ['todas']
+        self.adaptativo = adaptativo
+
+    def _chamar(self, metodo, caminho, corpo=None, endpoint=None):
+        inicio = time.perf_counter()
+        status, dados = self.cliente.chamar(metodo, caminho, corpo)
+        self.metricas.registrar(endpoint or caminho.split('?')[0], (time.perf_counter() - inicio) * 1000,
+                                200 <= status < 400)
+        return status, dados
+
+    def _escolher(self, questao):
+        letras = sorted((questao.get('alternativas') or {}).keys()) or list(LETRAS)
+        certa = self.gabarito.get(questao['id'])
+        if certa and random.random() < self.acerto:
+            return certa
+        erradas = [letra for letra in letras if letra != certa]
+        return random.choice(erradas or letras)
+
+    def _responder(self, caminho, simulado_id, questao):
+        pensou = self.pensar()
+        time.sleep(pensou)
+        return self._chamar('POST', caminho, {
+            'simulado_id': simulado_id, 'questao_id': questao['id'], 'resposta': self._escolher(questao),
+            'tempo_ms': int(pensou * 1000)
+        })
+
+    def jogar_simulado(self):
+        """Um simulado completo. True se terminou com resultado."""
+        materia = random.choice(self.materias)
+        if self.adaptativo:
+            status, dados = self._chamar('POST', '/api/simulado/adaptativo/iniciar', {'materia': materia})
+            if status != 200:
+                return False
+            simulado_id, questao = dados['simulado_id'], dados['questao']
+            while True:
+                status, dados = self._responder('/api/simulado/adaptativo/responder', simulado_id, questao)
+                if status != 200:
+                    return False
+                if dados.get('concluido'):
+                    return True
+                questao = dados['questao']
+
+        status, dados = self._chamar('POST', '/api/simulado/iniciar', {'materia': materia, 'quantidade': self.questoes})
+        if status != 200:
+            return False
+        simulado_id, questoes = dados['simulado_id'], dados['questoes']
+        for i, item in enumerate(dados.get('manifesto') or questoes):
+            if i >= len(questoes):  # fim da janela carregada: busca a próxima
+                status, pagina = self._chamar('GET', f'/api/simulado/{simulado_id}/questoes?inicio={i}',
+                                              endpoint='/api/simulado/<id>/questoes')
+                questoes.extend(pagina['questoes'] if status == 200 else [])
+            self._responder('/api/simulado/responder', simulado_id, questoes[i] if i < len(questoes) else item)
+        status, _ = self._chamar('POST', '/api/simulado/finalizar', {'simulado_id': simulado_id})
+        return status == 200
+
+    def executar(self, simulados):
+        concluidos = 0
+        self._chamar('GET', '/api/materias')
+        for _ in range(simulados):
+            concluidos += self.jogar_simulado()
+            self._chamar('GET', '/api/dashboard/estatisticas')
+        return concluidos
+
+
+def carregar_gabarito(db_path=DB_PATH):
+    """{question_id: resposta_correta}; vazio se o banco não estiver acessível (aluno só chuta)."""
+    if not db_path or not os.path.exists(db_path):
+        return {}
+    conn = sqlite3.connect(db_path)
+    try:
+        return dict(conn.execute("SELECT id, resposta_correta FROM questions"))
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ Gabarito indisponível ({e}); os alunos virtuais vão chutar.")
+        return {}
+    finally:
+        conn.close()
+
+
+def usar_copia_do_banco(origem=DB_PATH):
+    """
+    Copia o banco para um diretório temporário e aponta banco_dados (e a app,
+    que ainda não foi importada) para a cópia. Devolve o caminho da cópia.
+    """
+    if 'app' in sys.modules:
+        raise RuntimeError("app já importada: o banco da app não pode mais ser trocado pela cópia")
+    copia = os.path.join(tempfile.mkdtemp(prefix='carga_simulados_'), os.path.basename(origem))
+    if os.path.exists(origem):
+        fonte, destino = sqlite3.connect(origem), sqlite3.connect(copia)
+        try:
+            fonte.backup(destino)  # cópia consistente mesmo com o servidor gravando
+        finally:
+            fonte.close()
+            destino.close()
+    os.environ['CONCURSOS_DB_PATH'] = copia
+    banco_dados.DB_PATH = copia
+    return copia
+
+
+def executar_carga(alunos=50, simulados=1, questoes=10, acerto=0.6, pensar='fixo:0', url=None,
+                   materias=None, adaptativo=False, threads=None, db_path=DB_PATH, banco_real=False):
+    metricas = MetricasCarga()
+    gabarito = carregar_gabarito(db_path)
+    banco = None
+    if url:
+        fabrica = lambda: ClienteHTTP(url)
+    else:
+        banco = banco_dados.DB_PATH if banco_real else usar_copia_do_banco(db_path)
+        from app import app
+        fabrica = lambda: ClienteTeste(app)
+    gerador_pensar = tempo_de_pensar(pensar)
+
+    def rodar(_):
+        aluno = AlunoVirtual(fabrica(), metricas, gabarito, acerto, gerador_pensar, questoes, materias, adaptativo)
+        return aluno.executar(simulados)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads or alunos) as executor:
+        concluidos = sum(executor.map(rodar, range(alunos)))
+    duracao = time.perf_counter() - inicio
+
+    por_endpoint = metricas.resumo()
+    total = sum(e['requisicoes'] for e in por_endpoint.values())
+    return {
+        'alunos': alunos,
+        'banco': banco,
+        'simulados_concluidos': concluidos,
+        'simulados_esperados': alunos * simulados,
+        'duracao_s': round(duracao, 2),
+        'requisicoes': total,
+        'req_por_s': round(total / duracao, 1) if duracao else None,
+        'endpoints': por_endpoint,
+    }
+
+
+def imprimir_relatorio(resultado):
+    print(f"\n👥 {resultado['alunos']} alunos | "
+          f"{resultado['simulados_concluidos']}/{resultado['simulados_esperados']} simulados concluídos | "
+          f"{resultado['requisicoes']} requisições em {resultado['duracao_s']}s ({resultado['req_por_s']} req/s)")
+    if resultado.get('banco'):
+        print(f"🗄️  Banco usado pela app: {resultado['banco']}")
+    print(f"{'endpoint':<40}{'n':>8}{'erros':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)")
+    for endpoint, e in sorted(resultado['endpoints'].items()):
+        print(f"{endpoint:<40}{e['requisicoes']:>8}{e['erros']:>7}"
+              f"{e['p50_ms']:>9.1f}{e['p95_ms']:>9.1f}{e['p99_ms']:>9.1f}{e['max_ms']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Alunos virtuais jogando simulados (teste de carga)')
+    parser.add_argument('--url', help='Servidor alvo (ex.: http://localhost:5000). Sem --url: test client do Flask')
+    parser.add_argument('--alunos', type=int, default=50, help='Alunos virtuais simultâneos')
+    parser.add_argument('--simulados', type=int, default=1, help='Simulados por aluno')
+    parser.add_argument('--questoes', type=int, default=10, help='Questões por simulado')
+    parser.add_argument('--acerto', type=float, default=0.6, help='Probabilidade de marcar a resposta certa')
+    parser.add_argument('--pensar', default='fixo:0', help='Tempo por questão: fixo:S, exp:S ou lognormal:S')
+    parser.add_argument('--materia', action='append', dest='materias', help='Matéria (repetível; padrão: todas)')
+    parser.add_argument('--adaptativo', action='store_true', help='Usa o simulado adaptativo (CAT)')
+    parser.add_argument('--threads', type=int, help='Limite de threads (padrão: uma por aluno)')
+    parser.add_argument('--db', default=DB_PATH, help='Banco local para o gabarito (e origem da cópia)')
+    parser.add_argument('--banco-real', action='store_true',
+                        help='Sem --url: grava no banco configurado em vez de numa cópia temporária')
+    parser.add_argument('--json', action='store_true', help='Imprime o resultado em JSON')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    resultado = executar_carga(args.alunos, args.simulados, args.questoes, args.acerto, args.pensar, args.url,
+                               args.materias, args.adaptativo, args.threads, args.db, args.banco_real)
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False, indent=2))
+    else:
+        imprimir_relatorio(resultado)
+    return 0 if resultado['simulados_concluidos'] == resultado['simulados_esperados'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
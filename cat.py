@@ -0,0 +1,155 @@
+"""
+Simulado adaptativo (CAT - Computerized Adaptive Testing), modelo de Rasch.
+
+- Dificuldade b de cada questão: logit da taxa de erro em
+  estatisticas_questoes quando a amostra é confiável; senão, o rótulo
+  Fácil/Médio/Difícil da própria questão (-1 / 0 / +1).
+- Índice em memória por matéria: b ordenado, então a próxima questão (a de
+  máxima informação, b mais perto da habilidade atual) sai por bisect.
+  Sorteio entre as CAT_JANELA mais próximas para não expor sempre as mesmas.
+- Habilidade θ estimada por EAP (prior normal padrão numa grade); o
+  simulado termina quando o erro padrão fica abaixo de CAT_ERRO_PADRAO_ALVO
+  ou ao atingir CAT_MAX_QUESTOES. Com o alvo padrão 0,5 e questões perto de
+  θ, o Rasch converge em ~14 itens (0,4 exigiria ~23).
+"""
+import os
+import math
+import time
+import bisect
+import random
+import logging
+import threading
+
+from estatisticas_itens import MIN_TENTATIVAS_CONFIAVEL
+
+logger = logging.getLogger(__name__)
+
+ERRO_PADRAO_ALVO = float(os.environ.get('CAT_ERRO_PADRAO_ALVO', 0.5))
+MIN_QUESTOES = int(os.environ.get('CAT_MIN_QUESTOES', 5))
+MAX_QUESTOES = int(os.environ.get('CAT_MAX_QUESTOES', 30))
+JANELA = int(os.environ.get('CAT_JANELA', 3))
+INDICE_TTL = 300  # segundos (as dificuldades empíricas mudam devagar)
+
+LIMITE_B = 4.0
+GRADE_THETA = [-LIMITE_B + i * 0.1 for i in range(int(2 * LIMITE_B / 0.1) + 1)]
+DIFICULDADE_ROTULO = {'f': -1.0, 'm': 0.0, 'd': 1.0}  # Fácil / Médio / Difícil
+
+
+def dificuldade_rasch(rotulo, tentativas=0, acertos=0):
+    """b no mesmo eixo de θ. Taxa de acerto empírica tem prioridade sobre o rótulo."""
+    if tentativas >= MIN_TENTATIVAS_CONFIAVEL:
+        p = min(max(acertos / tentativas, 0.02), 0.98)
+        return math.log((1 - p) / p)
+    return DIFICULDADE_ROTULO.get((rotulo or 'm').strip()[:1].lower(), 0.0)
+
+
+def _prob_acerto(theta, b):
+    return 1.0 / (1.0 + math.exp(b - theta))
+
+
+class IndiceDificuldade:
+    """Questões ordenadas por dificuldade, por matéria ('todas' = catálogo inteiro)."""
+
+    def __init__(self, ttl=INDICE_TTL):
+        self.ttl = ttl
+        self._por_materia = {}   # materia -> ([b ordenados], [ids na mesma ordem])
+        self._b = {}             # id -> b
+        self._chave = None
+        self._carregado_em = 0.0
+        self._lock = threading.Lock()
+
+    def garantir(self, conn_factory, versao_catalogo=None, excluir=()):
+        chave = (versao_catalogo, frozenset(excluir))
+        if self._chave == chave and time.time() - self._carregado_em < self.ttl:
+            return
+        with self._lock:
+            if self._chave == chave and time.time() - self._carregado_em < self.ttl:
+                return
+            conn = conn_factory()
+            try:
+                rows = conn.execute('''
+                    SELECT q.id, q.materia, q.dificuldade, COALESCE(e.tentativas, 0), COALESCE(e.acertos, 0)
+                    FROM questions q LEFT JOIN estatisticas_questoes e ON e.question_id = q.id
+                ''').fetchall()
+            finally:
+                conn.close()
+
+            por_materia = {}
+            b_por_id = {}
+            for questao_id, materia, rotulo, tentativas, acertos in rows:
+                if questao_id in excluir:
+                    continue
+                b = dificuldade_rasch(rotulo, tentativas, acertos)
+                b_por_id[questao_id] = b
+                por_materia.setdefault(materia, []).append((b, questao_id))
+                por_materia.setdefault('todas', []).append((b, questao_id))
+            self._por_materia = {
+                m: ([b for b, _ in itens], [qid for _, qid in itens])
+                for m, itens in ((m, sorted(lista)) for m, lista in por_materia.items())
+            }
+            self._b = b_por_id
+            self._chave = chave
+            self._carregado_em = time.time()
+            logger.info(f"CAT: índice de dificuldade com {len(b_por_id)} questões.")
+
+    def dificuldade(self, questao_id):
+        return self._b.get(questao_id, 0.0)
+
+    def tamanho(self, materia):
+        return len(self._por_materia.get(materia, ((), ()))[1])
+
+    def proxima(self, materia, theta, aplicadas):
+        """Questão não aplicada de b mais próximo de θ (máxima informação no Rasch)."""
+        bs, ids = self._por_materia.get(materia, ((), ()))
+        esquerda = bisect.bisect_left(bs, theta) - 1
+        direita = esquerda + 1
+        candidatas = []
+        while len(candidatas) < JANELA and (esquerda >= 0 or direita < len(ids)):
+            usar_direita = esquerda < 0 or (direita < len(ids) and bs[direita] - theta <= theta - bs[esquerda])
+            i = direita if usar_direita else esquerda
+            if usar_direita:
+                direita += 1
+            else:
+                esquerda -= 1
+            if ids[i] not in aplicadas:
+                candidatas.append(ids[i])
+        return random.choice(candidatas) if candidatas else None
+
+
+class SessaoAdaptativa:
+    """Posterior de θ numa grade fixa; cada resposta soma o log da verossimilhança."""
+
+    def __init__(self, materia):
+        self.materia = materia
+        self.aplicadas = set()
+        self.respostas = []  # [(questao_id, b, acertou)]
+        self._log_post = [-0.5 * t * t for t in GRADE_THETA]  # prior N(0, 1)
+        self.theta, self.erro_padrao = 0.0, 1.0
+
+    def registrar(self, questao_id, b, acertou):
+        self.respostas.append((questao_id, b, acertou))
+        for i, t in enumerate(GRADE_THETA):
+            p = _prob_acerto(t, b)
+            self._log_post[i] += math.log(p if acertou else 1.0 - p)
+
+        maximo = max(self._log_post)
+        pesos = [math.exp(lp - maximo) for lp in self._log_post]
+        total = sum(pesos)
+        self.theta = sum(w * t for w, t in zip(pesos, GRADE_THETA)) / total
+        variancia = sum(w * (t - self.theta) ** 2 for w, t in zip(pesos, GRADE_THETA)) / total
+        self.erro_padrao = math.sqrt(variancia)
+
+    def concluida(self, disponiveis):
+        n = len(self.respostas)
+        if n >= min(MAX_QUESTOES, disponiveis):
+            return True
+        return n >= MIN_QUESTOES and self.erro_padrao <= ERRO_PADRAO_ALVO
+
+    def resumo(self):
+        return {
+            'theta': round(self.theta, 3),
+            'erro_padrao': round(self.erro_padrao, 3),
+            'questoes_aplicadas': len(self.respostas),
+            # chance de acertar uma questão de dificuldade média (b = 0)
+            'nota_estimada': round(100 * _prob_acerto(self.theta, 0.0), 1)
+        }
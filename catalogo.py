@@ -0,0 +1,109 @@
+"""
+Versão do catálogo (questões + temas de redação).
+Um contador em catalogo_versao que muda sempre que o catálogo muda:
+triggers em questions/temas_redacao cobrem qualquer escrita (importadores,
+correções manuais no sqlite3), e migrações/importadores também chamam
+incrementar_versao_catalogo explicitamente.
+
+Os triggers do SQLite são por linha: importar 20 mil questões com eles
+ativos faz 20 mil UPDATEs extras em catalogo_versao. Importadores em lote
+usam sem_triggers_catalogo(), que remove os triggers durante a carga e
+incrementa a versão uma única vez no fim.
+
+A app guarda a versão em memória por alguns segundos e usa-a como ETag
+forte das rotas de leitura do catálogo, respondendo 304 sem abrir o banco.
+"""
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+VERSAO_TTL = float(os.environ.get('CATALOGO_VERSAO_TTL', 5))  # segundos
+
+TABELAS_CATALOGO = ('questions', 'temas_redacao')
+
+
+def _nome_trigger(tabela, evento):
+    return f"trg_catalogo_{tabela}_{evento.lower()}"
+
+
+def criar_tabela_catalogo(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS catalogo_versao (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            versao INTEGER NOT NULL DEFAULT 1,
+            atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO catalogo_versao (id, versao) VALUES (1, 1)")
+
+    existentes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for tabela in TABELAS_CATALOGO:
+        if tabela not in existentes:
+            continue
+        for evento in ('INSERT', 'UPDATE', 'DELETE'):
+            # FOR EACH ROW (o SQLite não tem trigger por comando): custo de um UPDATE por linha escrita
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {_nome_trigger(tabela, evento)}
+                AFTER {evento} ON {tabela}
+                BEGIN
+                    UPDATE catalogo_versao SET versao = versao + 1, atualizado_em = CURRENT_TIMESTAMP WHERE id = 1;
+                END
+            ''')
+
+
+@contextmanager
+def sem_triggers_catalogo(conn, motivo=''):
+    """
+    Carga em lote sem os triggers por linha: remove-os, executa o bloco e os
+    recria, incrementando a versão uma vez. Não faz commit. Se o processo
+    morrer no meio, garantir_esquema recria os triggers no próximo boot.
+    """
+    for tabela in TABELAS_CATALOGO:
+        for evento in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f"DROP TRIGGER IF EXISTS {_nome_trigger(tabela, evento)}")
+    try:
+        yield conn
+    finally:
+        criar_tabela_catalogo(conn)
+        incrementar_versao_catalogo(conn, motivo)
+
+
+def incrementar_versao_catalogo(conn, motivo=''):
+    """Invalida os caches do catálogo (ETags). Não faz commit."""
+    conn.execute("UPDATE catalogo_versao SET versao = versao + 1, atualizado_em = CURRENT_TIMESTAMP WHERE id = 1")
+    logger.info(f"Catálogo: versão incrementada {motivo}".rstrip())
+
+
+def obter_versao_catalogo(conn):
+    row = conn.execute("SELECT versao FROM catalogo_versao WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+class VersaoCatalogo:
+    """Versão do catálogo em memória (TTL), compartilhada pelas rotas de leitura."""
+
+    def __init__(self, ttl=VERSAO_TTL):
+        self.ttl = ttl
+        self._versao = None
+        self._lido_em = 0.0
+        self._lock = threading.Lock()
+
+    def atual(self, conn_factory):
+        if self._versao is not None and time.time() - self._lido_em < self.ttl:
+            return self._versao
+        with self._lock:
+            if self._versao is None or time.time() - self._lido_em >= self.ttl:
+                conn = conn_factory()
+                try:
+                    self._versao = obter_versao_catalogo(conn)
+                finally:
+                    conn.close()
+                self._lido_em = time.time()
+        return self._versao
+
+    def invalidar(self):
+        self._lido_em = 0.0
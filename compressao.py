@@ -0,0 +1,172 @@
+"""
+Compressão das respostas JSON dinâmicas (o WhiteNoise só comprime /static).
+Negocia brotli ou gzip pelo Accept-Encoding e só comprime corpos acima de
+COMPRESSAO_MIN_BYTES. Brotli é opcional: sem o pacote `brotli`, usa gzip.
+
+Configuração (variáveis de ambiente):
+    COMPRESSAO_MIN_BYTES      tamanho mínimo do corpo (padrão 1024)
+    COMPRESSAO_NIVEL_GZIP     1-9 (padrão 6)
+    COMPRESSAO_NIVEL_BROTLI   0-11 (padrão 5)
+
+O mesmo encoder (e as mesmas métricas) serve o hook after_request do Flask
+e o middleware ASGI do serviço assíncrono (CompressaoASGI).
+"""
+import os
+import gzip
+import logging
+import threading
+
+from flask import request
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:  # dependência opcional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+MIN_BYTES = int(os.environ.get('COMPRESSAO_MIN_BYTES', 1024))
+NIVEL_GZIP = int(os.environ.get('COMPRESSAO_NIVEL_GZIP', 6))
+NIVEL_BROTLI = int(os.environ.get('COMPRESSAO_NIVEL_BROTLI', 5))
+
+MIMETYPES_COMPRIMIVEIS = {'application/json'}
+
+
+class CompressaoRespostas:
+    """Hook after_request que comprime as respostas JSON e contabiliza os bytes."""
+
+    def __init__(self, app=None, min_bytes=MIN_BYTES, nivel_gzip=NIVEL_GZIP, nivel_brotli=NIVEL_BROTLI):
+        self.min_bytes = min_bytes
+        self.nivel_gzip = nivel_gzip
+        self.nivel_brotli = nivel_brotli
+        self._lock = threading.Lock()
+        self._metricas = {'respostas': 0, 'bytes_originais': 0, 'bytes_comprimidos': 0,
+                          'por_encoding': {}, 'abaixo_do_limite': 0}
+        if app is not None:
+            app.after_request(self.comprimir)
+            logger.info(f"✅ Compressão de JSON ativa (>= {min_bytes} bytes, "
+                        f"brotli {'disponível' if brotli else 'indisponível'}).")
+
+    def _escolher_encoding(self, aceitos):
+        if brotli is not None and aceitos['br'] > 0:
+            return 'br'
+        if aceitos['gzip'] > 0:
+            return 'gzip'
+        return None
+
+    def _codificar(self, dados, encoding):
+        if encoding == 'br':
+            return brotli.compress(dados, quality=self.nivel_brotli)
+        return gzip.compress(dados, compresslevel=self.nivel_gzip, mtime=0)
+
+    def comprimir(self, response):
+        if (response.mimetype not in MIMETYPES_COMPRIMIVEIS or response.direct_passthrough
+                or response.status_code < 200 or response.status_code in (204, 304)
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        # O corpo depende do Accept-Encoding mesmo quando não comprime
+        response.vary.add('Accept-Encoding')
+
+        encoding = self._escolher_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+        comprimido = self._comprimir_corpo(response.get_data(), encoding)
+        if comprimido is None:
+            return response
+
+        response.set_data(comprimido)
+        response.headers['Content-Encoding'] = encoding
+        # Outra representação dos mesmos dados: ETag forte vira fraca (como no nginx)
+        etag, fraca = response.get_etag()
+        if etag and not fraca:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _comprimir_corpo(self, dados, encoding):
+        """Corpo comprimido (e contabilizado), ou None se estiver abaixo de min_bytes."""
+        if len(dados) < self.min_bytes:
+            with self._lock:
+                self._metricas['abaixo_do_limite'] += 1
+            return None
+        comprimido = self._codificar(dados, encoding)
+        with self._lock:
+            m = self._metricas
+            m['respostas'] += 1
+            m['bytes_originais'] += len(dados)
+            m['bytes_comprimidos'] += len(comprimido)
+            m['por_encoding'][encoding] = m['por_encoding'].get(encoding, 0) + 1
+        return comprimido
+
+    def metricas(self):
+        with self._lock:
+            m = dict(self._metricas, por_encoding=dict(self._metricas['por_encoding']))
+        m['economia_bytes'] = m['bytes_originais'] - m['bytes_comprimidos']
+        m['taxa_compressao'] = (round(m['bytes_comprimidos'] / m['bytes_originais'], 4)
+                                if m['bytes_originais'] else None)
+        m['config'] = {'min_bytes': self.min_bytes, 'nivel_gzip': self.nivel_gzip,
+                       'nivel_brotli': self.nivel_brotli, 'brotli': brotli is not None}
+        return m
+
+
+class CompressaoASGI:
+    """
+    Middleware ASGI com o encoder de uma CompressaoRespostas: mesma negociação
+    brotli/gzip, mesmos níveis e limite, métricas somadas às do Flask.
+    Só bufferiza respostas JSON; as demais (e as já comprimidas pelo Flask
+    montado como fallback) passam direto.
+    """
+
+    def __init__(self, app, compressao):
+        self.app = app
+        self.compressao = compressao
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = b', '.join(v for k, v in scope['headers'] if k.lower() == b'accept-encoding')
+        inicio = None
+        partes = []
+
+        async def enviar(mensagem):
+            nonlocal inicio
+            if mensagem['type'] == 'http.response.start':
+                if self._comprimivel(mensagem):
+                    inicio = mensagem
+                else:
+                    await send(mensagem)
+                return
+            if inicio is None or mensagem['type'] != 'http.response.body':
+                await send(mensagem)
+                return
+            partes.append(mensagem.get('body', b''))
+            if not mensagem.get('more_body', False):
+                await self._enviar(inicio, b''.join(partes), accept_encoding.decode('latin-1'), send)
+
+        await self.app(scope, receive, enviar)
+
+    @staticmethod
+    def _comprimivel(inicio):
+        cabecalhos = {k.lower(): v for k, v in inicio.get('headers', [])}
+        mimetype = cabecalhos.get(b'content-type', b'').split(b';')[0].strip().decode('latin-1')
+        status = inicio['status']
+        return (mimetype in MIMETYPES_COMPRIMIVEIS and b'content-encoding' not in cabecalhos
+                and status >= 200 and status not in (204, 304))
+
+    async def _enviar(self, inicio, corpo, accept_encoding, send):
+        cabecalhos = [(k, v) for k, v in inicio.get('headers', []) if k.lower() != b'content-length']
+        # O corpo depende do Accept-Encoding mesmo quando não comprime
+        cabecalhos.append((b'vary', b'Accept-Encoding'))
+        encoding = self.compressao._escolher_encoding(parse_accept_header(accept_encoding))
+        comprimido = self.compressao._comprimir_corpo(corpo, encoding) if encoding else None
+        if comprimido is not None:
+            corpo = comprimido
+            cabecalhos.append((b'content-encoding', encoding.encode('latin-1')))
+            # Outra representação dos mesmos dados: ETag forte vira fraca
+            cabecalhos = [(k, b'W/' + v if k.lower() == b'etag' and not v.startswith(b'W/') else v)
+                          for k, v in cabecalhos]
+        cabecalhos.append((b'content-length', str(len(corpo)).encode('latin-1')))
+        await send({**inicio, 'headers': cabecalhos})
+        await send({'type': 'http.response.body', 'body': corpo})
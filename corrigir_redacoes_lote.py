@@ -0,0 +1,254 @@
+"""
+CORREÇÃO DE REDAÇÕES EM LOTE
+Corrige uma pasta de redações (.txt) ou um arquivo JSONL com pares
+{"tema": ..., "texto": ...} usando o mesmo prompt e extração de nota da
+rota /api/redacao/corrigir-gemini, com concorrência limitada.
+
+Uso:
+    python corrigir_redacoes_lote.py redacoes/ --tema "Tema da prova"
+    python corrigir_redacoes_lote.py redacoes.jsonl --saida resultados.jsonl --concorrencia 8
+
+- Pasta: cada arquivo .txt é uma redação. Se a primeira linha começar com
+  "TEMA:", ela define o tema daquele arquivo; senão usa --tema.
+- JSONL: cada linha tem "tema" e "texto" (e opcionalmente "id").
+- O arquivo de saída funciona como checkpoint: ao rodar de novo, as
+  redações já presentes nele são puladas (use --sem-retomar para refazer).
+- Redações já corrigidas (mesmo hash de tema + texto) vêm do cache_correcoes.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import logging
+
+from banco_dados import get_db_connection, garantir_esquema
+from redacao_ia import (obter_modelo, corrigir_redacao_async, hash_redacao,
+                        buscar_cache, salvar_cache, salvar_historico_redacao)
+from analise_redacao import analisar_redacao, avaliar_minimos
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+# ========== LEITURA DA ENTRADA ==========
+
+def ler_pasta(pasta, tema_padrao):
+    redacoes = []
+    for nome in sorted(os.listdir(pasta)):
+        if not nome.lower().endswith('.txt'):
+            continue
+        with open(os.path.join(pasta, nome), 'r', encoding='utf-8') as f:
+            conteudo = f.read().strip()
+        tema = tema_padrao
+        primeira_linha, _, resto = conteudo.partition('\n')
+        if primeira_linha.upper().startswith('TEMA:'):
+            tema = primeira_linha[5:].strip()
+            conteudo = resto.strip()
+        if not tema:
+            logger.warning(f"⚠️ {nome}: sem tema (use 'TEMA:' na 1ª linha ou --tema). Pulando.")
+            continue
+        redacoes.append({'id': nome, 'tema': tema, 'texto': conteudo})
+    return redacoes
+
+
+def ler_jsonl(caminho, tema_padrao):
+    redacoes = []
+    with open(caminho, 'r', encoding='utf-8') as f:
+        for numero, linha in enumerate(f, start=1):
+            linha = linha.strip()
+            if not linha:
+                continue
+            try:
+                item = json.loads(linha)
+            except json.JSONDecodeError:
+                logger.warning(f"⚠️ Linha {numero}: JSON inválido. Pulando.")
+                continue
+            tema = item.get('tema') or tema_padrao
+            texto = item.get('texto')
+            if not tema or not texto:
+                logger.warning(f"⚠️ Linha {numero}: tema ou texto faltando. Pulando.")
+                continue
+            redacoes.append({'id': str(item.get('id', numero)), 'tema': tema, 'texto': texto})
+    return redacoes
+
+
+def ler_checkpoint(caminho_saida):
+    """IDs já gravados no arquivo de saída (corrigidos com sucesso)."""
+    concluidos = set()
+    if not os.path.exists(caminho_saida):
+        return concluidos
+    with open(caminho_saida, 'r', encoding='utf-8') as f:
+        for linha in f:
+            try:
+                item = json.loads(linha)
+            except json.JSONDecodeError:
+                continue  # última linha truncada por interrupção
+            if 'erro' not in item:
+                concluidos.add(item['id'])
+    return concluidos
+
+
+# ========== CORREÇÃO CONCORRENTE ==========
+
+class CorretorLote:
+    """
+    Fila de redações consumida por N workers assíncronos. Sem `model`, o
+    Gemini só é configurado na primeira redação fora do cache.
+    """
+
+    def __init__(self, model, conn, arquivo_saida, user_id, tentativas):
+        self.model = model
+        self._erro_modelo = None
+        self.conn = conn
+        self.arquivo_saida = arquivo_saida
+        self.user_id = user_id
+        self.tentativas = tentativas
+        self.corrigidas = 0
+        self.do_cache = 0
+        self.barradas = 0
+        self.falhas = 0
+
+    def _obter_modelo(self):
+        # Síncrono de propósito: workers no mesmo event loop não configuram o modelo duas vezes
+        if self.model is None and self._erro_modelo is None:
+            try:
+                self.model = obter_modelo()
+            except Exception as e:
+                self._erro_modelo = e
+                logger.error(f"❌ Erro ao configurar Gemini: {e}")
+        if self._erro_modelo is not None:
+            raise self._erro_modelo
+        return self.model
+
+    async def _corrigir_com_retry(self, redacao):
+        model = self._obter_modelo()
+        for tentativa in range(1, self.tentativas + 1):
+            try:
+                return await corrigir_redacao_async(redacao['tema'], redacao['texto'], model=model)
+            except Exception as e:
+                if tentativa == self.tentativas:
+                    raise
+                espera = min(30, 2 ** tentativa) + random.random()
+                logger.warning(f"🔁 {redacao['id']}: tentativa {tentativa}/{self.tentativas} falhou ({e}). "
+                               f"Nova tentativa em {espera:.1f}s")
+                await asyncio.sleep(espera)
+
+    def _gravar(self, registro):
+        self.arquivo_saida.write(json.dumps(registro, ensure_ascii=False) + '\n')
+        self.arquivo_saida.flush()
+
+    async def _processar(self, redacao):
+        # Pré-análise local: abaixo dos mínimos não gasta chamada ao LLM
+        row = self.conn.execute("SELECT palavras_chave FROM temas_redacao WHERE titulo = ?",
+                                (redacao['tema'],)).fetchone()
+        metricas = analisar_redacao(redacao['texto'], redacao['tema'], row[0] if row else None)
+        problemas, _ = avaliar_minimos(metricas)
+        if problemas:
+            self.barradas += 1
+            logger.info(f"⛔ {redacao['id']}: barrada na pré-análise - {' '.join(problemas)}")
+            self._gravar({'id': redacao['id'], 'tema': redacao['tema'], 'bloqueada': True, 'problemas': problemas})
+            return
+
+        hash_conteudo = hash_redacao(redacao['tema'], redacao['texto'])
+        resultado = buscar_cache(self.conn, hash_conteudo)
+        if resultado:
+            self.do_cache += 1
+        else:
+            try:
+                resultado = await self._corrigir_com_retry(redacao)
+            except Exception as e:
+                self.falhas += 1
+                logger.error(f"❌ {redacao['id']}: falhou após {self.tentativas} tentativas - {e}")
+                self._gravar({'id': redacao['id'], 'tema': redacao['tema'], 'erro': str(e)})
+                return
+            # Nota parcial (competências zeradas) não fica no cache: uma nova rodada tenta de novo
+            if not resultado.get('incompleta'):
+                salvar_cache(self.conn, hash_conteudo, resultado)
+
+        # sqlite roda no mesmo thread do event loop: escritas curtas, sem concorrência
+        salvar_historico_redacao(self.conn, self.user_id, redacao['tema'], redacao['texto'], resultado)
+        self.conn.commit()
+        self.corrigidas += 1
+        self._gravar({'id': redacao['id'], 'hash': hash_conteudo, **resultado})
+        logger.info(f"✅ {redacao['id']}: Nota {resultado['nota']}")
+
+    async def _worker(self, fila):
+        while True:
+            redacao = await fila.get()
+            try:
+                await self._processar(redacao)
+            except Exception as e:
+                # Ex.: 'database is locked' no histórico, entrada sem 'tema'. O worker segue na fila
+                self.conn.rollback()
+                self.falhas += 1
+                logger.error(f"❌ {redacao.get('id')}: erro inesperado - {e}", exc_info=True)
+                self._gravar({'id': redacao.get('id'), 'tema': redacao.get('tema'), 'erro': str(e)})
+            finally:
+                fila.task_done()
+
+    async def executar(self, redacoes, concorrencia):
+        fila = asyncio.Queue()
+        for redacao in redacoes:
+            fila.put_nowait(redacao)
+        workers = [asyncio.create_task(self._worker(fila)) for _ in range(concorrencia)]
+        await fila.join()
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Correção de redações em lote (Gemini)')
+    parser.add_argument('entrada', help='Pasta com arquivos .txt ou arquivo .jsonl')
+    parser.add_argument('--tema', help='Tema padrão (quando o arquivo não informa)')
+    parser.add_argument('--saida', default='correcoes_lote.jsonl', help='Arquivo JSONL de resultados (também é o checkpoint)')
+    parser.add_argument('--concorrencia', type=int, default=5, help='Máximo de correções simultâneas')
+    parser.add_argument('--tentativas', type=int, default=3, help='Tentativas por redação')
+    parser.add_argument('--user-id', default='lote', help='user_id gravado em historico_redacoes')
+    parser.add_argument('--sem-retomar', action='store_true', help='Ignora o checkpoint e refaz tudo')
+    args = parser.parse_args()
+
+    if os.path.isdir(args.entrada):
+        redacoes = ler_pasta(args.entrada, args.tema)
+    else:
+        redacoes = ler_jsonl(args.entrada, args.tema)
+
+    if not args.sem_retomar:
+        concluidos = ler_checkpoint(args.saida)
+        if concluidos:
+            print(f"⏩ Retomando: {len(concluidos)} redações já corrigidas em {args.saida}")
+        redacoes = [r for r in redacoes if r['id'] not in concluidos]
+
+    if not redacoes:
+        print("✅ Nada a corrigir.")
+        return 0
+
+    conn = get_db_connection()
+    garantir_esquema(conn)
+
+    print(f"🚀 Corrigindo {len(redacoes)} redações (concorrência {args.concorrencia})...")
+    inicio = time.perf_counter()
+    modo = 'w' if args.sem_retomar else 'a'
+    with open(args.saida, modo, encoding='utf-8') as arquivo_saida:
+        corretor = CorretorLote(None, conn, arquivo_saida, args.user_id, args.tentativas)
+        try:
+            asyncio.run(corretor.executar(redacoes, max(1, args.concorrencia)))
+        except KeyboardInterrupt:
+            print("\n⚠️ Interrompido. Rode novamente para retomar do checkpoint.")
+    conn.close()
+
+    duracao = time.perf_counter() - inicio
+    por_minuto = corretor.corrigidas / (duracao / 60) if duracao > 0 else 0
+    print("=" * 60)
+    print(f"📊 Corrigidas: {corretor.corrigidas} (cache: {corretor.do_cache}) | "
+          f"Barradas na pré-análise: {corretor.barradas} | Falhas: {corretor.falhas}")
+    print(f"⏱️ Tempo: {duracao:.1f}s | Throughput: {por_minuto:.1f} redações/minuto")
+    print(f"💾 Resultados: {args.saida}")
+    return 0 if corretor.falhas == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
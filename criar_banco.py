@@ -18,23 +18,8 @@ TB_ESTATISTICAS = 'estatisticas'
 TB_SIMULADOS_FEITOS = 'simulados_feitos'
 DELIMITER = ';'
 
-# --- Pesos das Disciplinas (Mesmo do main.py) ---
-PESOS_DISCIPLINAS = {
-    "Língua Portuguesa": 1.5,
-    "Matemática": 1.0,
-    "Raciocínio Lógico": 1.0,
-    "Direito Administrativo": 2.0,
-    "Direito Constitucional": 2.0,
-    "Psicologia": 1.0,
-    "Atualidades": 1.0,
-    "Conhecimentos Bancários": 1.5,
-    "Informática": 1.0,
-    "Matemática Financeira": 1.0,
-    "Vendas e Negociação": 1.0,
-    "Português e Redação Oficial": 1.5,
-    "Legislação": 2.0,
-    "Geral": 1.0
-}
+# --- Pesos das Disciplinas (disciplinas.py, compartilhado com a app web) ---
+from disciplinas import PESOS_DISCIPLINAS
 
 # --- FUNÇÕES AUXILIARES MELHORADAS ---
 def sanitizar_texto(texto):
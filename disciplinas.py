@@ -0,0 +1,38 @@
+"""
+Pesos das disciplinas (compartilhados por criar_banco.py e pela app web).
+Fica num módulo sem dependências para a app não importar SQLAlchemy só
+por causa desta tabela.
+"""
+
+PESOS_DISCIPLINAS = {
+    "Língua Portuguesa": 1.5,
+    "Matemática": 1.0,
+    "Raciocínio Lógico": 1.0,
+    "Direito Administrativo": 2.0,
+    "Direito Constitucional": 2.0,
+    "Psicologia": 1.0,
+    "Atualidades": 1.0,
+    "Conhecimentos Bancários": 1.5,
+    "Informática": 1.0,
+    "Matemática Financeira": 1.0,
+    "Vendas e Negociação": 1.0,
+    "Português e Redação Oficial": 1.5,
+    "Legislação": 2.0,
+    "Geral": 1.0
+}
+
+
+def peso_disciplina(disciplina):
+    """
+    Peso da disciplina; variantes do banco como "Psicologia (Gestão)" ou
+    "Atualidades do Mercado Financeiro" herdam o peso da disciplina base.
+    """
+    if disciplina in PESOS_DISCIPLINAS:
+        return PESOS_DISCIPLINAS[disciplina]
+    base = (disciplina or '').split('(')[0].strip()
+    if base in PESOS_DISCIPLINAS:
+        return PESOS_DISCIPLINAS[base]
+    for nome, peso in PESOS_DISCIPLINAS.items():
+        if base.startswith(nome):
+            return peso
+    return PESOS_DISCIPLINAS["Geral"]
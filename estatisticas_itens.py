@@ -0,0 +1,227 @@
+"""
+Estatísticas por questão (item analysis).
+Mantém, para cada questão, tentativas, acertos, tempo médio e as somas
+necessárias para a discriminação ponto-bisserial, atualizadas de forma
+incremental a cada simulado finalizado. A discriminação usa o escore do
+restante da prova (sem a própria questão), então só conta simulados com
+2+ questões.
+
+- dificuldade empírica = 1 - taxa de acerto
+- discriminação < 0 com amostra suficiente = questão suspeita (gabarito
+  errado, enunciado ambíguo)
+
+Uso (recalcular tudo a partir de respostas_fato, com NumPy):
+    python estatisticas_itens.py
+"""
+import math
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+MIN_TENTATIVAS_CONFIAVEL = 30
+LIMITE_DISCRIMINACAO_SUSPEITA = 0.0
+CACHE_TTL = 300  # segundos
+
+
+def criar_tabela_estatisticas_itens(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS estatisticas_questoes (
+            question_id INTEGER PRIMARY KEY,
+            tentativas INTEGER NOT NULL DEFAULT 0,
+            acertos INTEGER NOT NULL DEFAULT 0,
+            n_tempo INTEGER NOT NULL DEFAULT 0,
+            soma_tempo_ms INTEGER NOT NULL DEFAULT 0,
+            n_escore INTEGER NOT NULL DEFAULT 0,
+            n_escore_acerto INTEGER NOT NULL DEFAULT 0,
+            soma_escore_acerto REAL NOT NULL DEFAULT 0,
+            soma_escore_erro REAL NOT NULL DEFAULT 0,
+            soma_escore2 REAL NOT NULL DEFAULT 0,
+            atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def atualizar_estatisticas_itens(conn, respostas):
+    """
+    Soma um simulado finalizado às estatísticas das questões. Não faz commit.
+
+    respostas: [(question_id, acertou, tempo_ms ou None)] de UM simulado, só
+    das questões respondidas (em branco não conta como tentativa nem entra
+    no escore do restante da prova).
+    """
+    total = len(respostas)
+    total_acertos = sum(1 for _, acertou, _ in respostas if acertou)
+    linhas = []
+    for questao_id, acertou, tempo_ms in respostas:
+        acertou = int(bool(acertou))
+        if total >= 2:
+            escore = (total_acertos - acertou) / (total - 1)  # escore do restante da prova
+            n_escore = 1
+        else:
+            escore = 0.0
+            n_escore = 0
+        linhas.append((
+            questao_id, acertou,
+            1 if tempo_ms is not None else 0, tempo_ms or 0,
+            n_escore, n_escore * acertou,
+            escore * n_escore * acertou, escore * n_escore * (1 - acertou), escore * escore * n_escore
+        ))
+
+    conn.executemany('''
+        INSERT INTO estatisticas_questoes
+        (question_id, tentativas, acertos, n_tempo, soma_tempo_ms, n_escore, n_escore_acerto,
+         soma_escore_acerto, soma_escore_erro, soma_escore2)
+        VALUES (?, 1, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(question_id) DO UPDATE SET
+            tentativas = tentativas + 1,
+            acertos = acertos + excluded.acertos,
+            n_tempo = n_tempo + excluded.n_tempo,
+            soma_tempo_ms = soma_tempo_ms + excluded.soma_tempo_ms,
+            n_escore = n_escore + excluded.n_escore,
+            n_escore_acerto = n_escore_acerto + excluded.n_escore_acerto,
+            soma_escore_acerto = soma_escore_acerto + excluded.soma_escore_acerto,
+            soma_escore_erro = soma_escore_erro + excluded.soma_escore_erro,
+            soma_escore2 = soma_escore2 + excluded.soma_escore2,
+            atualizado_em = CURRENT_TIMESTAMP
+    ''', linhas)
+
+
+def _derivar(row):
+    """Converte as somas brutas em métricas (taxa de acerto, discriminação, tempo médio)."""
+    (questao_id, tentativas, acertos, n_tempo, soma_tempo_ms,
+     n_escore, n1, soma1, soma0, soma2) = row[:10]
+    taxa_acerto = acertos / tentativas if tentativas else None
+
+    discriminacao = None
+    n0 = n_escore - n1
+    if n1 > 0 and n0 > 0:
+        media = (soma1 + soma0) / n_escore
+        variancia = soma2 / n_escore - media * media
+        if variancia > 1e-12:
+            p = n1 / n_escore
+            discriminacao = (soma1 / n1 - soma0 / n0) / math.sqrt(variancia) * math.sqrt(p * (1 - p))
+
+    confiavel = tentativas >= MIN_TENTATIVAS_CONFIAVEL
+    return {
+        'question_id': questao_id,
+        'tentativas': tentativas,
+        'acertos': acertos,
+        'taxa_acerto': round(taxa_acerto, 4) if taxa_acerto is not None else None,
+        'dificuldade_empirica': round(1 - taxa_acerto, 4) if taxa_acerto is not None else None,
+        'discriminacao': round(discriminacao, 4) if discriminacao is not None else None,
+        'tempo_medio_ms': round(soma_tempo_ms / n_tempo) if n_tempo else None,
+        'confiavel': confiavel,
+        'suspeita': bool(confiavel and discriminacao is not None
+                         and discriminacao < LIMITE_DISCRIMINACAO_SUSPEITA),
+    }
+
+
+_COLUNAS = ("question_id, tentativas, acertos, n_tempo, soma_tempo_ms, n_escore, n_escore_acerto, "
+            "soma_escore_acerto, soma_escore_erro, soma_escore2")
+
+
+def listar_estatisticas_itens(conn):
+    return [_derivar(row) for row in conn.execute(f"SELECT {_COLUNAS} FROM estatisticas_questoes")]
+
+
+class IndiceEstatisticasItens:
+    """Snapshot em memória (TTL) usado pelo sorteio de questões."""
+
+    def __init__(self, ttl=CACHE_TTL):
+        self.ttl = ttl
+        self._por_id = {}
+        self._carregado_em = 0.0
+        self._lock = threading.Lock()
+
+    def _garantir(self, conn_factory):
+        if time.time() - self._carregado_em < self.ttl:
+            return
+        with self._lock:
+            if time.time() - self._carregado_em < self.ttl:
+                return
+            conn = conn_factory()
+            try:
+                self._por_id = {e['question_id']: e for e in listar_estatisticas_itens(conn)}
+            finally:
+                conn.close()
+            self._carregado_em = time.time()
+
+    def invalidar(self):
+        self._carregado_em = 0.0
+
+    def get(self, questao_id, conn_factory):
+        self._garantir(conn_factory)
+        return self._por_id.get(questao_id)
+
+    def suspeitas(self, conn_factory):
+        self._garantir(conn_factory)
+        return {qid for qid, e in self._por_id.items() if e['suspeita']}
+
+
+def recalcular_estatisticas_itens(conn):
+    """Recalcula estatisticas_questoes inteira a partir de respostas_fato (NumPy, vetorizado)."""
+    import numpy as np
+
+    rows = conn.execute(
+        "SELECT simulado_id, question_id, acertou, tempo_ms FROM respostas_fato WHERE resposta IS NOT NULL"
+    ).fetchall()
+    if not rows:
+        conn.execute("DELETE FROM estatisticas_questoes")
+        conn.commit()
+        return 0
+
+    simulados = np.array([r[0] for r in rows], dtype=object)
+    questoes = np.array([r[1] for r in rows], dtype=np.int64)
+    acertou = np.array([r[2] for r in rows], dtype=np.float64)
+    tempo = np.array([r[3] if r[3] is not None else -1 for r in rows], dtype=np.float64)
+
+    # Escore do restante da prova, por resposta
+    _, sim_idx = np.unique(simulados, return_inverse=True)
+    n_sim = np.bincount(sim_idx)
+    acertos_sim = np.bincount(sim_idx, weights=acertou)
+    n_prova = n_sim[sim_idx]
+    valido = n_prova >= 2
+    escore = np.where(valido, (acertos_sim[sim_idx] - acertou) / np.maximum(n_prova - 1, 1), 0.0)
+    v = valido.astype(np.float64)
+
+    ids, q_idx = np.unique(questoes, return_inverse=True)
+    com_tempo = (tempo >= 0).astype(np.float64)
+    colunas = [
+        np.bincount(q_idx),                                         # tentativas
+        np.bincount(q_idx, weights=acertou),                        # acertos
+        np.bincount(q_idx, weights=com_tempo),                      # n_tempo
+        np.bincount(q_idx, weights=np.where(tempo >= 0, tempo, 0)),  # soma_tempo_ms
+        np.bincount(q_idx, weights=v),                              # n_escore
+        np.bincount(q_idx, weights=v * acertou),                    # n_escore_acerto
+        np.bincount(q_idx, weights=v * acertou * escore),           # soma_escore_acerto
+        np.bincount(q_idx, weights=v * (1 - acertou) * escore),     # soma_escore_erro
+        np.bincount(q_idx, weights=v * escore * escore),            # soma_escore2
+    ]
+    linhas = [
+        (int(ids[i]), int(colunas[0][i]), int(colunas[1][i]), int(colunas[2][i]), int(colunas[3][i]),
+         int(colunas[4][i]), int(colunas[5][i]), float(colunas[6][i]), float(colunas[7][i]), float(colunas[8][i]))
+        for i in range(len(ids))
+    ]
+
+    conn.execute("DELETE FROM estatisticas_questoes")
+    conn.executemany(f"INSERT INTO estatisticas_questoes ({_COLUNAS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", linhas)
+    conn.commit()
+    return len(linhas)
+
+
+if __name__ == "__main__":
+    from banco_dados import get_db_connection, garantir_esquema
+
+    logging.basicConfig(level=logging.INFO)
+    conn = get_db_connection()
+    garantir_esquema(conn)
+    inicio = time.perf_counter()
+    total = recalcular_estatisticas_itens(conn)
+    print(f"📊 {total} questões recalculadas em {time.perf_counter() - inicio:.2f}s")
+    suspeitas = [e for e in listar_estatisticas_itens(conn) if e['suspeita']]
+    for e in sorted(suspeitas, key=lambda e: e['discriminacao']):
+        print(f"   ⚠️ Questão {e['question_id']}: discriminação {e['discriminacao']} "
+              f"(acerto {e['taxa_acerto']}, {e['tentativas']} tentativas)")
+    conn.close()
@@ -0,0 +1,170 @@
+"""
+Agregados de desempenho por usuário (user_stats / user_stats_materia).
+Atualizados de forma incremental em /api/simulado/finalizar, na mesma
+transação que grava o historico_simulados, para que o dashboard leia uma
+linha de totais em vez de reprocessar todo o histórico.
+
+Uso (reconstrução a partir do histórico existente):
+    python estatisticas_usuario.py
+"""
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def criar_tabelas_estatisticas(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id TEXT PRIMARY KEY,
+            total_simulados INTEGER NOT NULL DEFAULT 0,
+            total_questoes INTEGER NOT NULL DEFAULT 0,
+            total_respondidas INTEGER NOT NULL DEFAULT 0,
+            total_acertos INTEGER NOT NULL DEFAULT 0,
+            soma_nota_final REAL NOT NULL DEFAULT 0,
+            soma_percentual REAL NOT NULL DEFAULT 0,
+            ultimo_simulado TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_stats_materia (
+            user_id TEXT NOT NULL,
+            disciplina TEXT NOT NULL,
+            materia TEXT NOT NULL,
+            tentativas INTEGER NOT NULL DEFAULT 0,
+            acertos INTEGER NOT NULL DEFAULT 0,
+            n_tempo INTEGER NOT NULL DEFAULT 0,
+            soma_tempo_ms INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, disciplina, materia)
+        )
+    ''')
+
+
+def atualizar_estatisticas_usuario(conn, user_id, relatorio, por_materia):
+    """
+    Soma um simulado finalizado aos agregados do usuário. Não faz commit:
+    quem chama controla a transação (junto com o INSERT no histórico).
+
+    por_materia: {(disciplina, materia): {'tentativas': n, 'acertos': n,
+                  'n_tempo': n, 'soma_tempo_ms': n}}  (tempos opcionais)
+    """
+    conn.execute('''
+        INSERT INTO user_stats (user_id, total_simulados, total_questoes, total_respondidas,
+                                total_acertos, soma_nota_final, soma_percentual, ultimo_simulado)
+        VALUES (?, 1, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET
+            total_simulados = total_simulados + 1,
+            total_questoes = total_questoes + excluded.total_questoes,
+            total_respondidas = total_respondidas + excluded.total_respondidas,
+            total_acertos = total_acertos + excluded.total_acertos,
+            soma_nota_final = soma_nota_final + excluded.soma_nota_final,
+            soma_percentual = soma_percentual + excluded.soma_percentual,
+            ultimo_simulado = excluded.ultimo_simulado
+    ''', (
+        user_id,
+        relatorio['total_questoes'],
+        relatorio['total_respondidas'],
+        relatorio['total_acertos'],
+        relatorio['nota_final'],
+        relatorio['percentual_acerto'],
+        relatorio['data_fim']
+    ))
+    conn.executemany('''
+        INSERT INTO user_stats_materia (user_id, disciplina, materia, tentativas, acertos, n_tempo, soma_tempo_ms)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(user_id, disciplina, materia) DO UPDATE SET
+            tentativas = tentativas + excluded.tentativas,
+            acertos = acertos + excluded.acertos,
+            n_tempo = n_tempo + excluded.n_tempo,
+            soma_tempo_ms = soma_tempo_ms + excluded.soma_tempo_ms
+    ''', [
+        (user_id, disciplina, materia, stats['tentativas'], stats['acertos'],
+         stats.get('n_tempo', 0), stats.get('soma_tempo_ms', 0))
+        for (disciplina, materia), stats in por_materia.items()
+    ])
+
+
+def obter_estatisticas_usuario(conn, user_id, recentes=5):
+    """Totais (1 linha), acerto por matéria e os últimos `recentes` relatórios."""
+    row = conn.execute(
+        "SELECT total_simulados, total_questoes, total_respondidas, total_acertos, "
+        "soma_nota_final, soma_percentual, ultimo_simulado FROM user_stats WHERE user_id = ?",
+        (user_id,)
+    ).fetchone()
+    total_simulados = row[0] if row else 0
+
+    por_materia = [{
+        'disciplina': r[0],
+        'materia': r[1],
+        'tentativas': r[2],
+        'acertos': r[3],
+        'percentual': round(100 * r[3] / r[2], 1) if r[2] else 0,
+        'tempo_medio_ms': round(r[5] / r[4]) if r[4] else None
+    } for r in conn.execute(
+        "SELECT disciplina, materia, tentativas, acertos, n_tempo, soma_tempo_ms FROM user_stats_materia "
+        "WHERE user_id = ? "
+        "ORDER BY disciplina, materia",
+        (user_id,)
+    )]
+
+    historico_recente = []
+    for r in conn.execute(
+        "SELECT relatorio FROM historico_simulados WHERE user_id = ? ORDER BY data_fim DESC LIMIT ?",
+        (user_id, recentes)
+    ):
+        try:
+            historico_recente.append(json.loads(r[0]))
+        except (json.JSONDecodeError, TypeError):
+            continue
+
+    return {
+        'total_simulados': total_simulados,
+        'total_questoes_respondidas': row[2] if row else 0,
+        'total_acertos': row[3] if row else 0,
+        'media_geral': round(row[4] / total_simulados, 2) if total_simulados else 0,
+        'media_acertos': round(row[5] / total_simulados, 2) if total_simulados else 0,
+        'ultimo_simulado': row[6] if row else None,
+        'por_materia': por_materia,
+        'historico_recente': historico_recente
+    }
+
+
+def reconstruir_estatisticas(conn):
+    """
+    Recalcula user_stats a partir de historico_simulados (uso único após a
+    migração). Relatórios antigos não guardam o detalhe por matéria, então
+    apenas os totais são reconstruídos.
+    """
+    criar_tabelas_estatisticas(conn)
+    conn.execute("DELETE FROM user_stats")
+    total = 0
+    for user_id, relatorio_json, data_fim in conn.execute(
+        "SELECT user_id, relatorio, data_fim FROM historico_simulados ORDER BY data_fim"
+    ).fetchall():
+        try:
+            r = json.loads(relatorio_json)
+        except (json.JSONDecodeError, TypeError):
+            continue
+        relatorio = {
+            'total_questoes': r.get('total_questoes', 0),
+            'total_respondidas': r.get('total_respondidas', 0),
+            'total_acertos': r.get('total_acertos', 0),
+            # versões antigas usavam nota_final_peso / percentual_acerto_simples
+            'nota_final': r.get('nota_final', r.get('nota_final_peso', 0)),
+            'percentual_acerto': r.get('percentual_acerto', r.get('percentual_acerto_simples', 0)),
+            'data_fim': r.get('data_fim', data_fim)
+        }
+        atualizar_estatisticas_usuario(conn, user_id, relatorio, {})
+        total += 1
+    conn.commit()
+    return total
+
+
+if __name__ == "__main__":
+    from banco_dados import get_db_connection, garantir_esquema
+
+    logging.basicConfig(level=logging.INFO)
+    conn = get_db_connection()
+    garantir_esquema(conn)
+    print(f"📊 user_stats reconstruído a partir de {reconstruir_estatisticas(conn)} simulados.")
+    conn.close()
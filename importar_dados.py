@@ -4,6 +4,7 @@ import json
 import os
 import sys
 import re
+from catalogo import sem_triggers_catalogo
 
 print("--- INICIANDO SCRIPT DE IMPORTAÃ‡ÃƒO E ATUALIZAÃ‡ÃƒO DO BANCO (V4 - Colunas Corrigidas) ---")
 
@@ -190,8 +191,12 @@ if __name__ == "__main__":
     conn = conectar_banco()
     if conn:
         atualizar_estrutura_banco(conn)
-        questoes_ok, questoes_falha = importar_questoes_csv(conn)
-        temas_ok = importar_temas_redacao(conn)
+        # Carga em lote sem os triggers por linha do catalogo; no fim a versao sobe uma vez,
+        # invalidando as ETags/caches da app (/api/materias, /api/redacao/temas)
+        with sem_triggers_catalogo(conn, '(importar_dados.py)'):
+            questoes_ok, questoes_falha = importar_questoes_csv(conn)
+            temas_ok = importar_temas_redacao(conn)
+        conn.commit()
         conn.close()
         print("\n--- IMPORTAÃ‡ÃƒO FINALIZADA ---")
         if questoes_ok == 0: print("\n!!! ALERTA MÃXIMO: NENHUMA QUESTÃƒO IMPORTADA !!!")
@@ -1,8 +1,12 @@
 ﻿import sqlalchemy as db
+from sqlalchemy.pool import QueuePool
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import os
+import sys
+import time
+import threading
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import logging
@@ -31,15 +35,51 @@ app.add_middleware(
 )
 
 # Conexão com o banco de dados
+# create_engine não abre conexão: o boot não toca no banco. As rotas com banco
+# são síncronas (rodam no threadpool do FastAPI), então o pool entrega a mesma
+# conexão SQLite a threads diferentes: check_same_thread=False.
+DB_URL = os.environ.get("CONCURSO_DB_URL", "sqlite:///concurso.db")
 try:
-    engine = db.create_engine("sqlite:///concurso.db")
-    metadata = db.MetaData()
-    metadata.reflect(bind=engine)
-    logger.info("✅ Banco de dados conectado com sucesso")
+    engine = db.create_engine(
+        DB_URL,
+        poolclass=QueuePool,
+        pool_size=5,
+        max_overflow=10,
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    logger.info("✅ Engine do banco de dados criada (esquema carregado no primeiro uso)")
 except Exception as e:
     logger.error(f"❌ Erro ao conectar com banco de dados: {e}")
     engine = None
 
+_consultas = None
+_lock_consultas = threading.Lock()
+
+def consultas():
+    """
+    Reflete só a tabela 'questoes' no primeiro uso e monta as consultas uma
+    única vez, com parâmetros (bindparam). Reexecutar o mesmo objeto reaproveita
+    a compilação guardada no cache da engine: nada é montado por requisição.
+    """
+    global _consultas
+    if _consultas is None:
+        with _lock_consultas:
+            if _consultas is None:
+                metadata = db.MetaData()
+                metadata.reflect(bind=engine, only=["questoes"])
+                questoes_table = metadata.tables["questoes"]
+                _consultas = {
+                    "questoes_da_materia": db.select(questoes_table)
+                        .where(questoes_table.c.materia == db.bindparam("materia"))
+                        .limit(db.bindparam("limite", type_=db.Integer)),
+                    "contagem_por_materia": db.select(questoes_table.c.materia, db.func.count())
+                        .group_by(questoes_table.c.materia),
+                    "total_questoes": db.select(db.func.count()).select_from(questoes_table),
+                    "materias": db.select(questoes_table.c.materia).distinct(),
+                }
+                logger.info("✅ Esquema refletido e consultas preparadas")
+    return _consultas
+
 # Modelos Pydantic
 class Questao(BaseModel):
     id: int
@@ -69,20 +109,19 @@ async def health_check():
         "status": "healthy", 
         "service": "ConcursoMaster AI",
         "database": db_status,
+        "esquema": "carregado" if _consultas is not None else "pendente",
         "gemini_ai": "unavailable",
         "timestamp": datetime.now().isoformat()
     }
 
 @app.get("/questoes/{materia}")
-async def get_questoes(materia: str, limit: int = 10):
+def get_questoes(materia: str, limit: int = 10):
     if not engine:
         raise HTTPException(status_code=500, detail="Banco de dados não disponível")
     
     try:
         with engine.connect() as conn:
-            questoes_table = metadata.tables['questoes']
-            query = db.select(questoes_table).where(questoes_table.c.materia == materia).limit(limit)
-            result = conn.execute(query)
+            result = conn.execute(consultas()["questoes_da_materia"], {"materia": materia, "limite": limit})
             questões = [dict(row._mapping) for row in result]
             
             return {
@@ -95,22 +134,18 @@ async def get_questoes(materia: str, limit: int = 10):
         raise HTTPException(status_code=500, detail=f"Erro ao buscar questões: {str(e)}")
 
 @app.get("/dashboard-data")
-async def get_dashboard_data():
+def get_dashboard_data():
     if not engine:
         return {"error": "Banco de dados não disponível"}
     
     try:
         with engine.connect() as conn:
             # Contar questões por matéria
-            questoes_table = metadata.tables['questoes']
-            query = db.select([questoes_table.c.materia, db.func.count()]).group_by(questoes_table.c.materia)
-            result = conn.execute(query)
+            result = conn.execute(consultas()["contagem_por_materia"])
             materias_count = {row[0]: row[1] for row in result}
             
             # Total de questões
-            total_query = db.select([db.func.count()]).select_from(questoes_table)
-            total_result = conn.execute(total_query)
-            total_questoes = total_result.scalar()
+            total_questoes = conn.execute(consultas()["total_questoes"]).scalar()
             
             return {
                 "total_questoes": total_questoes,
@@ -121,22 +156,70 @@ async def get_dashboard_data():
     except Exception as e:
         return {"error": f"Erro ao buscar dados do dashboard: {str(e)}"}
 
+def _listar_materias():
+    """Matérias distintas pela consulta preparada; erros de banco sobem."""
+    with engine.connect() as conn:
+        return [row[0] for row in conn.execute(consultas()["materias"])]
+
 @app.get("/materias")
-async def get_materias():
+def get_materias():
     if not engine:
         return {"materias": []}
     
     try:
-        with engine.connect() as conn:
-            questoes_table = metadata.tables['questoes']
-            query = db.select([questoes_table.c.materia]).distinct()
-            result = conn.execute(query)
-            materias = [row[0] for row in result]
-            
-            return {"materias": materias}
+        return {"materias": _listar_materias()}
     except Exception as e:
         return {"materias": []}
 
+def medir_overhead(repeticoes=1000):
+    """
+    Partida a frio e custo por requisição de /materias, em ms:
+    - import_ms: import do main.py num processo novo (não toca no banco);
+    - primeira_requisicao_ms: primeira /materias (reflexão + compilação);
+    - montando_ms x preparada_ms: média por requisição montando o select a
+      cada chamada (como antes) x reexecutando a consulta preparada.
+    """
+    import subprocess
+    if engine is None:
+        raise RuntimeError(f"Banco de dados não disponível: {DB_URL}")
+    codigo = "import time; t = time.perf_counter(); import main; print((time.perf_counter() - t) * 1000)"
+    importacao = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    # Sem o try/except da rota: banco sem a tabela falha aqui, em vez de cronometrar o caminho de erro
+    inicio = time.perf_counter()
+    _listar_materias()
+    primeira_ms = (time.perf_counter() - inicio) * 1000
+
+    metadata = db.MetaData()
+    metadata.reflect(bind=engine, only=["questoes"])
+    questoes_table = metadata.tables["questoes"]
+
+    def montando_por_requisicao():
+        with engine.connect() as conn:
+            return [row[0] for row in conn.execute(db.select(questoes_table.c.materia).distinct())]
+
+    return {
+        "import_ms": round(float(importacao.stdout), 1),
+        "primeira_requisicao_ms": round(primeira_ms, 1),
+        "montando_ms": round(_cronometrar(montando_por_requisicao, repeticoes), 3),
+        "preparada_ms": round(_cronometrar(_listar_materias, repeticoes), 3),
+    }
+
+def _cronometrar(funcao, repeticoes):
+    """Tempo médio por chamada, em ms."""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) * 1000 / repeticoes
+
+if __name__ == "__main__" and "--medir" in sys.argv:
+    # python main.py --medir [repeticoes]
+    argumentos = [a for a in sys.argv[1:] if a != "--medir"]
+    for nome, valor in medir_overhead(int(argumentos[0]) if argumentos else 1000).items():
+        print(f"⏱️  {nome}: {valor}")
+    sys.exit(0)
+
 if __name__ == "__main__":
     import uvicorn
     import os
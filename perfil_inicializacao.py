@@ -0,0 +1,123 @@
+"""
+Perfil de partida a frio de um worker: quanto custa importar a app e
+atender a primeira requisição, num processo Python novo a cada rodada.
+
+- importtime: `python -X importtime -c "import app"`, agrupado por pacote
+  (tempo próprio somado) para achar quem pesa no boot;
+- primeira requisição: import da app + GET no test client do Flask (a
+  primeira /api/materias abre o banco e monta o cache do catálogo);
+- processo: tempo de parede do interpretador inteiro, como o gunicorn vê.
+
+Os números são medianas de --repeticoes processos. Use para acompanhar o
+cold start entre versões (ex.: guardar o --json no CI).
+
+Uso:
+    python perfil_inicializacao.py
+    python perfil_inicializacao.py --modulo app --rota /api/materias --repeticoes 5 --top 15
+    python perfil_inicializacao.py --json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Roda no processo filho: imprime os tempos em JSON na última linha do stdout
+SCRIPT_PRIMEIRA_REQUISICAO = '''
+import json, time
+inicio = time.perf_counter()
+import {modulo} as alvo
+importado = time.perf_counter()
+resposta = alvo.app.test_client().get({rota!r})
+fim = time.perf_counter()
+print(json.dumps({{"import_ms": (importado - inicio) * 1000, "primeira_requisicao_ms": (fim - importado) * 1000,
+                   "status": resposta.status_code}}))
+'''
+
+
+def _executar(argumentos):
+    inicio = time.perf_counter()
+    processo = subprocess.run([sys.executable, *argumentos], cwd=DIRETORIO, capture_output=True, text=True)
+    return processo, (time.perf_counter() - inicio) * 1000
+
+
+def importtime(modulo):
+    """
+    [(pacote, ms próprios, ms cumulativos)] de um import a frio, do mais caro
+    para o mais barato. Próprio: soma do pacote e de todos os seus submódulos
+    (as parcelas somam o total). Cumulativo: o import da raiz do pacote,
+    incluindo as dependências que ele puxou.
+    """
+    processo, _ = _executar(['-X', 'importtime', '-c', f'import {modulo}'])
+    if processo.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {modulo}:\n{processo.stderr[-2000:]}")
+    pacotes = {}
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith('import time:') or 'cumulative' in linha:
+            continue
+        proprio, cumulativo, nome = (parte.strip() for parte in linha[len('import time:'):].split('|'))
+        topo = nome.split('.')[0]
+        prop, cum = pacotes.get(topo, (0.0, 0.0))
+        pacotes[topo] = (prop + int(proprio) / 1000, max(cum, int(cumulativo) / 1000) if nome == topo else cum)
+    return sorted(((nome, prop, cum) for nome, (prop, cum) in pacotes.items()), key=lambda p: -p[1])
+
+
+def primeira_requisicao(modulo, rota, repeticoes):
+    """Medianas de import, primeira requisição e processo inteiro em `repeticoes` processos novos."""
+    codigo = SCRIPT_PRIMEIRA_REQUISICAO.format(modulo=modulo, rota=rota)
+    rodadas = []
+    for _ in range(repeticoes):
+        processo, parede_ms = _executar(['-c', codigo])
+        if processo.returncode != 0:
+            raise RuntimeError(f"Falha na primeira requisição:\n{processo.stderr[-2000:]}")
+        medidas = json.loads(processo.stdout.strip().splitlines()[-1])
+        medidas['processo_ms'] = parede_ms
+        rodadas.append(medidas)
+    return {
+        'rota': rota,
+        'status': rodadas[-1]['status'],
+        **{chave: round(statistics.median(r[chave] for r in rodadas), 1)
+           for chave in ('import_ms', 'primeira_requisicao_ms', 'processo_ms')},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Perfil de partida a frio (importtime + primeira requisição)')
+    parser.add_argument('--modulo', default='app', help='Módulo com a app Flask (padrão: app)')
+    parser.add_argument('--rota', default='/api/materias', help='Rota da primeira requisição')
+    parser.add_argument('--repeticoes', type=int, default=3, help='Processos novos por medida (mediana)')
+    parser.add_argument('--top', type=int, default=12, help='Pacotes mais caros exibidos')
+    parser.add_argument('--json', action='store_true', help='Imprime o resultado em JSON')
+    args = parser.parse_args()
+
+    pacotes = importtime(args.modulo)
+    resultado = {
+        'python': sys.version.split()[0],
+        'modulo': args.modulo,
+        **primeira_requisicao(args.modulo, args.rota, max(1, args.repeticoes)),
+        'importtime_total_ms': round(sum(prop for _, prop, _ in pacotes), 1),
+        'importtime': [{'pacote': nome, 'proprio_ms': round(prop, 1), 'cumulativo_ms': round(cum, 1)}
+                       for nome, prop, cum in pacotes[:args.top]],
+    }
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"\n🚀 {args.modulo} (Python {resultado['python']}, mediana de {args.repeticoes} processos)")
+    print(f"   import:               {resultado['import_ms']:8.1f} ms")
+    print(f"   primeira requisição:  {resultado['primeira_requisicao_ms']:8.1f} ms  "
+          f"(GET {args.rota} -> {resultado['status']})")
+    print(f"   processo inteiro:     {resultado['processo_ms']:8.1f} ms")
+    print(f"\n-X importtime: {resultado['importtime_total_ms']:.1f} ms")
+    print(f"{'pacote':<32}{'próprio':>10}{'cumulativo':>12}  (ms)")
+    for item in resultado['importtime']:
+        print(f"{item['pacote']:<32}{item['proprio_ms']:>10.1f}{item['cumulativo_ms']:>12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Prazos dos simulados controlados pelo servidor.
+O relógio que vale é o do servidor: cada simulado ativo tem um prazo
+(epoch) e entra num min-heap. Uma thread dorme até o prazo mais próximo
+e, quando ele vence, chama `ao_expirar(simulado_id)` (na app: finaliza,
+grava o histórico e libera a memória do simulado).
+
+Cancelar (simulado finalizado antes do prazo) não mexe no heap: a entrada
+fica obsoleta e é descartada quando chega ao topo (remoção preguiçosa).
+"""
+import os
+import math
+import time
+import heapq
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+MINUTOS_POR_QUESTAO = float(os.environ.get('SIMULADO_MINUTOS_POR_QUESTAO', 3))
+TEMPO_MINIMO_MINUTOS = 1
+TEMPO_MAXIMO_MINUTOS = float(os.environ.get('SIMULADO_TEMPO_MAXIMO_MINUTOS', 300))
+
+
+def tempo_limite_segundos(quantidade, minutos=None):
+    """
+    Tempo de prova: o pedido pelo cliente (limitado) ou MINUTOS_POR_QUESTAO por
+    questão. Valor do cliente que não é número (ex.: "abc", {}) cai no padrão.
+    """
+    try:
+        minutos = float(minutos)
+    except (TypeError, ValueError):
+        minutos = None
+    if minutos is None or not math.isfinite(minutos):
+        minutos = quantidade * MINUTOS_POR_QUESTAO
+    return max(TEMPO_MINIMO_MINUTOS, min(minutos, TEMPO_MAXIMO_MINUTOS)) * 60
+
+
+class AgendadorPrazos:
+
+    def __init__(self, ao_expirar):
+        self.ao_expirar = ao_expirar
+        self._heap = []      # [(prazo, simulado_id)]
+        self._prazos = {}    # simulado_id -> prazo vigente (entradas do heap com outro prazo são obsoletas)
+        self._cond = threading.Condition()
+        self._thread = None
+        self.expirados = 0
+
+    def _garantir_thread(self):
+        # Iniciada no primeiro agendamento: com gunicorn, já dentro do worker (depois do fork)
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._executar, name='prazos-simulados', daemon=True)
+            self._thread.start()
+
+    def agendar(self, simulado_id, prazo):
+        with self._cond:
+            self._prazos[simulado_id] = prazo
+            heapq.heappush(self._heap, (prazo, simulado_id))
+            self._garantir_thread()
+            if self._heap[0][1] == simulado_id:  # novo prazo mais próximo: acorda a thread
+                self._cond.notify()
+
+    def cancelar(self, simulado_id):
+        with self._cond:
+            self._prazos.pop(simulado_id, None)
+
+    def pendentes(self):
+        with self._cond:
+            return len(self._prazos)
+
+    def _proximo_vencido(self):
+        """Bloqueia até um prazo vigente vencer; devolve o simulado_id."""
+        with self._cond:
+            while True:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                prazo, simulado_id = self._heap[0]
+                if self._prazos.get(simulado_id) != prazo:
+                    heapq.heappop(self._heap)  # cancelado ou reagendado
+                    continue
+                espera = prazo - time.time()
+                if espera > 0:
+                    self._cond.wait(espera)
+                    continue
+                heapq.heappop(self._heap)
+                del self._prazos[simulado_id]
+                return simulado_id
+
+    def _executar(self):
+        while True:
+            simulado_id = self._proximo_vencido()
+            try:
+                self.ao_expirar(simulado_id)
+                self.expirados += 1
+            except Exception as e:
+                logger.error(f"⏰ Prazos: erro ao encerrar o simulado expirado {simulado_id}: {e}", exc_info=True)
@@ -0,0 +1,220 @@
+"""
+Catálogo de questões compacto em memória (struct-of-arrays).
+Em vez de um dict por questão (cada um repetindo as strings de matéria,
+disciplina e gabarito), guarda arrays paralelos:
+
+- ids ordenados (array de int; busca por bisect, sem dict id -> índice);
+- códigos pequenos para matéria, disciplina e gabarito, apontando para uma
+  tabela única de strings internadas;
+- enunciado, alternativas (JSON) e justificativa num único heap UTF-8, com
+  offsets de início de cada campo.
+
+catalogo[id] devolve um RegistroQuestao (__slots__) com a mesma API de
+leitura dos dicts usados em simulados_ativos: q['materia'], q.get('peso').
+
+Medição de memória (100 mil questões sintéticas, dict x compacto):
+    python questoes_compactas.py [quantidade]
+"""
+import sys
+import json
+import bisect
+import logging
+from array import array
+
+logger = logging.getLogger(__name__)
+
+# A tabela 'questions' não tem coluna 'explicacao': a explicação fica em 'justificativa'
+COLUNAS_QUESTAO = "id, materia, enunciado, alternativas, resposta_correta, justificativa, disciplina, peso"
+CAMPOS_TEXTO = 3  # enunciado, alternativas, justificativa
+CHAVES = ('id', 'materia', 'questao', 'alternativas', 'resposta_correta', 'explicacao', 'disciplina', 'peso')
+
+
+class RegistroQuestao:
+    """Visão de uma questão do catálogo; leitura estilo dict, sem copiar dados."""
+
+    __slots__ = ('_catalogo', '_i')
+
+    def __init__(self, catalogo, indice):
+        self._catalogo = catalogo
+        self._i = indice
+
+    def __getitem__(self, chave):
+        c, i = self._catalogo, self._i
+        if chave == 'id':
+            return c._ids[i]
+        if chave == 'materia':
+            return c._strings[c._materia[i]]
+        if chave == 'disciplina':
+            return c._strings[c._disciplina[i]]
+        if chave == 'resposta_correta':
+            return c._strings[c._gabarito[i]]
+        if chave == 'peso':
+            return c._peso[i] or 1
+        if chave == 'questao':
+            return c._texto(i, 0)
+        if chave == 'alternativas':
+            return json.loads(c._texto(i, 1))
+        if chave == 'explicacao':
+            return c._texto(i, 2) or None
+        raise KeyError(chave)
+
+    def get(self, chave, padrao=None):
+        try:
+            valor = self[chave]
+        except KeyError:
+            return padrao
+        return padrao if valor is None else valor
+
+    def keys(self):
+        return CHAVES
+
+    def to_dict(self):
+        return {chave: self[chave] for chave in CHAVES}
+
+    def __repr__(self):
+        return f"RegistroQuestao(id={self['id']}, materia={self['materia']!r})"
+
+
+class CatalogoCompacto:
+
+    def __init__(self):
+        self._ids = array('q')
+        self._materia = array('H')
+        self._disciplina = array('H')
+        self._gabarito = array('H')
+        self._peso = array('H')
+        self._offsets = array('I', [0])  # CAMPOS_TEXTO por questão + sentinela final
+        self._heap = b''
+        self._strings = []
+        self._codigos = {}
+
+    def _codigo(self, texto):
+        texto = texto or ''
+        codigo = self._codigos.get(texto)
+        if codigo is None:
+            codigo = self._codigos[texto] = len(self._strings)
+            self._strings.append(sys.intern(texto))
+        return codigo
+
+    def _texto(self, i, campo):
+        k = i * CAMPOS_TEXTO + campo
+        return self._heap[self._offsets[k]:self._offsets[k + 1]].decode('utf-8')
+
+    @classmethod
+    def de_linhas(cls, linhas):
+        """linhas: tuplas na ordem de COLUNAS_QUESTAO. Alternativas com JSON inválido ficam de fora."""
+        catalogo = cls()
+        heap = bytearray()
+        ignoradas = 0
+        for questao_id, materia, enunciado, alternativas, gabarito, justificativa, disciplina, peso in sorted(
+                linhas, key=lambda linha: linha[0]):
+            try:
+                json.loads(alternativas)
+            except (json.JSONDecodeError, TypeError):
+                ignoradas += 1
+                continue
+            catalogo._ids.append(questao_id)
+            catalogo._materia.append(catalogo._codigo(materia))
+            catalogo._disciplina.append(catalogo._codigo(disciplina))
+            catalogo._gabarito.append(catalogo._codigo(gabarito))
+            catalogo._peso.append(min(int(peso or 1), 0xFFFF))
+            for texto in (enunciado, alternativas, justificativa):
+                heap += (texto or '').encode('utf-8')
+                catalogo._offsets.append(len(heap))
+        catalogo._heap = bytes(heap)
+        if ignoradas:
+            logger.warning(f"Catálogo compacto: {ignoradas} questões com alternativas em JSON inválido ignoradas.")
+        return catalogo
+
+    @classmethod
+    def carregar(cls, conn):
+        return cls.de_linhas(conn.execute(f"SELECT {COLUNAS_QUESTAO} FROM questions ORDER BY id"))
+
+    def _indice(self, questao_id):
+        i = bisect.bisect_left(self._ids, questao_id)
+        return i if i < len(self._ids) and self._ids[i] == questao_id else -1
+
+    def __contains__(self, questao_id):
+        return self._indice(questao_id) >= 0
+
+    def __getitem__(self, questao_id):
+        i = self._indice(questao_id)
+        if i < 0:
+            raise KeyError(questao_id)
+        return RegistroQuestao(self, i)
+
+    def get(self, questao_id, padrao=None):
+        i = self._indice(questao_id)
+        return RegistroQuestao(self, i) if i >= 0 else padrao
+
+    def __len__(self):
+        return len(self._ids)
+
+    def ids(self):
+        return self._ids
+
+    def tamanho_bytes(self):
+        arrays = (self._ids, self._materia, self._disciplina, self._gabarito, self._peso, self._offsets)
+        return (sum(a.itemsize * len(a) for a in arrays) + len(self._heap)
+                + sum(sys.getsizeof(s) for s in self._strings))
+
+
+def _linhas_sinteticas(n):
+    disciplinas = [f"Disciplina {d}" for d in range(14)]
+    for i in range(1, n + 1):
+        yield (
+            i,
+            f"Assunto {i % 200}",
+            f"Enunciado da questão {i}: " + "texto de exemplo " * 15,
+            json.dumps({letra: f"Alternativa {letra} da questão {i}, com algum texto" for letra in 'ABCDE'},
+                       ensure_ascii=False),
+            'ABCDE'[i % 5],
+            "Justificativa: " + "explicação do gabarito " * 8,
+            disciplinas[i % 14],
+            1 + i % 3,
+        )
+
+
+def medir_memoria(n=100_000):
+    """
+    Bytes retidos por n questões lidas de um SQLite em memória: lista de
+    dicts (um por questão, como app.py guardava nos simulados) x catálogo compacto.
+    """
+    import gc
+    import sqlite3
+    import tracemalloc
+
+    conn = sqlite3.connect(':memory:')
+    conn.execute(
+        "CREATE TABLE questions (id INTEGER PRIMARY KEY, materia TEXT, enunciado TEXT, alternativas TEXT, "
+        "resposta_correta TEXT, justificativa TEXT, disciplina TEXT, peso INTEGER)"
+    )
+    conn.executemany("INSERT INTO questions VALUES (?, ?, ?, ?, ?, ?, ?, ?)", _linhas_sinteticas(n))
+    gc.collect()
+
+    tracemalloc.start()
+    dicts = [{
+        'id': r[0], 'materia': r[1], 'questao': r[2], 'alternativas': json.loads(r[3]),
+        'resposta_correta': r[4], 'explicacao': r[5], 'disciplina': r[6], 'peso': r[7]
+    } for r in conn.execute(f"SELECT {COLUNAS_QUESTAO} FROM questions")]
+    bytes_dicts = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del dicts
+    gc.collect()
+
+    tracemalloc.start()
+    catalogo = CatalogoCompacto.carregar(conn)
+    gc.collect()
+    bytes_compacto = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    conn.close()
+    return {'questoes': len(catalogo), 'bytes_dicts': bytes_dicts, 'bytes_compacto': bytes_compacto}
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    r = medir_memoria(n)
+    print(f"📦 {r['questoes']} questões")
+    print(f"   dicts:    {r['bytes_dicts'] / 2**20:8.1f} MiB ({r['bytes_dicts'] / r['questoes']:.0f} bytes/questão)")
+    print(f"   compacto: {r['bytes_compacto'] / 2**20:8.1f} MiB ({r['bytes_compacto'] / r['questoes']:.0f} bytes/questão)")
+    print(f"   redução:  {r['bytes_dicts'] / r['bytes_compacto']:.1f}x")
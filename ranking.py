@@ -0,0 +1,155 @@
+"""
+Ranking de notas (percentil e líderes) em memória.
+Cada blueprint de simulado (matéria + quantidade de questões sorteadas,
+só para as quantidades em RANKING_QUANTIDADES) e o ranking geral têm um histograma de buckets fixos (nota_final 0-100 com resolução
+0,01) sobre uma árvore de Fenwick: registrar uma nota e calcular o
+percentil são O(log buckets), independente de quantos simulados existem.
+
+Os líderes (melhor nota por usuário) ficam numa lista ordenada limitada a
+TAMANHO_LIDERES por blueprint. Tudo é reconstruído no boot a partir de
+historico_simulados e atualizado no /finalizar.
+"""
+import os
+import json
+import bisect
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+NOTA_MAXIMA = 100
+RESOLUCAO = 100          # buckets por ponto de nota
+TAMANHO_LIDERES = 100
+GERAL = 'geral'
+# Cada blueprint aloca um histograma de NOTA_MAXIMA * RESOLUCAO buckets: só os tamanhos oferecidos na interface
+QUANTIDADES_RANQUEADAS = frozenset(
+    int(q) for q in os.environ.get('RANKING_QUANTIDADES', '10,20,30,50,100').split(',') if q.strip())
+
+
+def chave_blueprint(config, quantidade):
+    """
+    Blueprint do simulado: mesma matéria e mesmo número de questões sorteadas
+    (não o pedido pelo cliente) são comparáveis. None quando a quantidade não
+    é ranqueada: a nota entra só no ranking geral.
+    """
+    config = config or {}
+    if config.get('modo') == 'adaptativo':  # comprimento variável: compara só pela matéria
+        return f"adaptativo:{config.get('materia') or 'todas'}"
+    if quantidade not in QUANTIDADES_RANQUEADAS:
+        return None
+    return f"{config.get('materia') or 'todas'}:{quantidade}"
+
+
+class HistogramaFenwick:
+    """Contagens por bucket com soma de prefixo em O(log n)."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.total = 0
+        self._arvore = [0] * (buckets + 1)
+
+    def adicionar(self, bucket, delta=1):
+        self.total += delta
+        i = bucket + 1
+        while i <= self.buckets:
+            self._arvore[i] += delta
+            i += i & -i
+
+    def prefixo(self, bucket):
+        """Quantidade de notas nos buckets [0, bucket)."""
+        soma = 0
+        i = bucket
+        while i > 0:
+            soma += self._arvore[i]
+            i -= i & -i
+        return soma
+
+
+def _bucket(nota):
+    nota = min(max(float(nota), 0.0), NOTA_MAXIMA)
+    return int(round(nota * RESOLUCAO))
+
+
+class RankingNotas:
+
+    def __init__(self, tamanho_lideres=TAMANHO_LIDERES):
+        self.tamanho_lideres = tamanho_lideres
+        self._histogramas = {}
+        self._melhores = {}   # blueprint -> {user_id: melhor nota}
+        self._lideres = {}    # blueprint -> [(-nota, user_id)] ordenada
+        self._lock = threading.Lock()
+
+    def _registrar_em(self, chave, user_id, nota):
+        histograma = self._histogramas.get(chave)
+        if histograma is None:
+            histograma = self._histogramas[chave] = HistogramaFenwick(NOTA_MAXIMA * RESOLUCAO + 1)
+        histograma.adicionar(_bucket(nota))
+
+        melhores = self._melhores.setdefault(chave, {})
+        anterior = melhores.get(user_id)
+        if anterior is not None and anterior >= nota:
+            return
+        melhores[user_id] = nota
+        lideres = self._lideres.setdefault(chave, [])
+        if anterior is not None:
+            i = bisect.bisect_left(lideres, (-anterior, user_id))
+            if i < len(lideres) and lideres[i] == (-anterior, user_id):
+                del lideres[i]
+        if len(lideres) < self.tamanho_lideres or (-nota, user_id) < lideres[-1]:
+            bisect.insort(lideres, (-nota, user_id))
+            del lideres[self.tamanho_lideres:]
+
+    def registrar(self, user_id, nota, blueprint):
+        with self._lock:
+            self._registrar_em(GERAL, user_id, nota)
+            if blueprint is not None:
+                self._registrar_em(blueprint, user_id, nota)
+
+    def percentil(self, nota, blueprint=GERAL):
+        """% de notas abaixo de `nota` (empates contam pela metade). None sem dados."""
+        with self._lock:
+            histograma = self._histogramas.get(blueprint)
+            if histograma is None or histograma.total == 0:
+                return None
+            b = _bucket(nota)
+            abaixo = histograma.prefixo(b)
+            iguais = histograma.prefixo(b + 1) - abaixo
+            return round(100 * (abaixo + 0.5 * iguais) / histograma.total, 1)
+
+    def total(self, blueprint=GERAL):
+        histograma = self._histogramas.get(blueprint)
+        return histograma.total if histograma else 0
+
+    def lideres(self, n=10, blueprint=GERAL):
+        with self._lock:
+            return [(user_id, -nota_negativa) for nota_negativa, user_id in self._lideres.get(blueprint, [])[:n]]
+
+    def blueprints(self):
+        with self._lock:
+            return {chave: h.total for chave, h in self._histogramas.items() if chave != GERAL}
+
+    def reconstruir(self, conn):
+        """Recarrega tudo a partir de historico_simulados (boot)."""
+        novo = RankingNotas(self.tamanho_lideres)
+        total = 0
+        for user_id, config_json, relatorio_json in conn.execute(
+            "SELECT user_id, config, relatorio FROM historico_simulados"
+        ):
+            try:
+                config = json.loads(config_json or '{}')
+                relatorio = json.loads(relatorio_json)
+            except (json.JSONDecodeError, TypeError):
+                continue
+            nota = relatorio.get('nota_final', relatorio.get('nota_final_peso'))
+            if nota is None:
+                continue
+            # Histórico antigo não guarda questoes_ids: o total corrigido é o número sorteado
+            quantidade = len(config.get('questoes_ids') or []) or relatorio.get('total_questoes')
+            novo._registrar_em(GERAL, user_id, nota)
+            blueprint = chave_blueprint(config, quantidade)
+            if blueprint is not None:
+                novo._registrar_em(blueprint, user_id, nota)
+            total += 1
+        with self._lock:
+            self._histogramas, self._melhores, self._lideres = novo._histogramas, novo._melhores, novo._lideres
+        return total
@@ -0,0 +1,126 @@
+"""
+Recomendações de estudo para a app web.
+Ordena os assuntos (disciplina, matéria) pelo ganho esperado de nota se o
+aluno levar o acerto até ALVO_ACERTO, usando:
+
+- user_stats_materia: tentativas/acertos do aluno no assunto;
+- estatisticas_questoes: taxa de acerto geral das questões do assunto,
+  usada como prior (assunto pouco praticado não vira 0% nem 100%);
+- frequência do assunto no catálogo (proxy de quanto ele cai na prova);
+- PESOS_DISCIPLINAS (disciplinas.py).
+
+    ganho = peso * frequencia * max(0, ALVO_ACERTO - acerto_suavizado) * 100
+
+O top-N de cada usuário fica em memória até o próximo /finalizar dele (ou
+até o catálogo mudar).
+"""
+import os
+import logging
+import threading
+from collections import OrderedDict
+
+from disciplinas import peso_disciplina
+
+logger = logging.getLogger(__name__)
+
+ALVO_ACERTO = float(os.environ.get('RECOMENDACAO_ALVO_ACERTO', 0.9))
+PRIOR_TENTATIVAS = 5          # força do prior (tentativas "virtuais")
+ACERTO_PADRAO = 0.5           # prior quando o assunto ainda não tem estatística
+LIMITE_REFORCO = 0.7
+LIMITE_DOMINADO = 0.9
+TOP_N = 20                    # quantas ficam em cache por usuário
+MAX_USUARIOS_CACHE = 5000
+
+
+def _assuntos_catalogo(conn):
+    """{(disciplina, materia): (questoes, acertos_gerais, tentativas_gerais)} em uma query."""
+    return {
+        (r[0], r[1]): (r[2], r[3] or 0, r[4] or 0)
+        for r in conn.execute('''
+            SELECT q.disciplina, q.materia, COUNT(*), SUM(e.acertos), SUM(e.tentativas)
+            FROM questions q
+            LEFT JOIN estatisticas_questoes e ON e.question_id = q.id
+            GROUP BY q.disciplina, q.materia
+        ''')
+    }
+
+
+def _regra(tentativas, acerto):
+    if tentativas == 0:
+        return 'explorar', 'Assunto ainda não praticado'
+    if acerto < LIMITE_REFORCO:
+        return 'reforco', f'Acerto de {acerto * 100:.0f}%: abaixo de {LIMITE_REFORCO * 100:.0f}%'
+    if acerto >= LIMITE_DOMINADO:
+        return 'revisao', 'Assunto dominado: manter revisões espaçadas'
+    return 'consolidar', f'Acerto de {acerto * 100:.0f}%: falta pouco para o alvo'
+
+
+def calcular_recomendacoes(conn, user_id, n=TOP_N):
+    catalogo = _assuntos_catalogo(conn)
+    total_questoes = sum(c[0] for c in catalogo.values()) or 1
+    do_aluno = {
+        (r[0], r[1]): (r[2], r[3])
+        for r in conn.execute(
+            "SELECT disciplina, materia, tentativas, acertos FROM user_stats_materia WHERE user_id = ?",
+            (user_id,)
+        )
+    }
+
+    recomendacoes = []
+    for (disciplina, materia), (questoes, acertos_gerais, tentativas_gerais) in catalogo.items():
+        tentativas, acertos = do_aluno.get((disciplina, materia), (0, 0))
+        prior = acertos_gerais / tentativas_gerais if tentativas_gerais else ACERTO_PADRAO
+        acerto = (acertos + PRIOR_TENTATIVAS * prior) / (tentativas + PRIOR_TENTATIVAS)
+        peso = peso_disciplina(disciplina)
+        frequencia = questoes / total_questoes
+        ganho = peso * frequencia * max(0.0, ALVO_ACERTO - acerto) * 100
+        tipo, motivo = _regra(tentativas, acertos / tentativas if tentativas else acerto)
+        recomendacoes.append({
+            'disciplina': disciplina,
+            'materia': materia,
+            'tipo': tipo,
+            'motivo': motivo,
+            'tentativas': tentativas,
+            'acertos': acertos,
+            'percentual': round(100 * acertos / tentativas, 1) if tentativas else None,
+            'acerto_geral': round(prior * 100, 1) if tentativas_gerais else None,
+            'peso': peso,
+            'ganho_esperado': round(ganho, 3),
+        })
+
+    # Assuntos já praticados primeiro em caso de empate (o aluno tem evidência deles)
+    recomendacoes.sort(key=lambda r: (-r['ganho_esperado'], r['tentativas'] == 0))
+    return recomendacoes[:n]
+
+
+class CacheRecomendacoes:
+    """Top-N por usuário em memória (LRU), invalidado no /finalizar do usuário."""
+
+    def __init__(self, max_usuarios=MAX_USUARIOS_CACHE):
+        self.max_usuarios = max_usuarios
+        self._por_usuario = OrderedDict()  # user_id -> (versao_catalogo, recomendacoes)
+        self._lock = threading.Lock()
+
+    def obter(self, user_id, versao_catalogo, conn_factory, n=TOP_N):
+        with self._lock:
+            em_cache = self._por_usuario.get(user_id)
+            if em_cache and em_cache[0] == versao_catalogo:
+                self._por_usuario.move_to_end(user_id)
+                return em_cache[1][:n]
+
+        conn = conn_factory()
+        try:
+            recomendacoes = calcular_recomendacoes(conn, user_id, TOP_N)
+        finally:
+            conn.close()
+
+        with self._lock:
+            self._por_usuario[user_id] = (versao_catalogo, recomendacoes)
+            self._por_usuario.move_to_end(user_id)
+            while len(self._por_usuario) > self.max_usuarios:
+                self._por_usuario.popitem(last=False)
+        return recomendacoes[:n]
+
+    def invalidar(self, user_id):
+        with self._lock:
+            self._por_usuario.pop(user_id, None)
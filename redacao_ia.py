@@ -0,0 +1,448 @@
+"""
+Correção de redação com Gemini - prompt JSON, validação/reparo e cache.
+Compartilhado entre a rota /api/redacao/corrigir-gemini (app.py) e a
+correção em lote (corrigir_redacoes_lote.py).
+"""
+import os
+import re
+import json
+import hashlib
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = os.environ.get('GEMINI_MODEL', 'gemini-2.0-flash')
+
+COMPETENCIAS = [
+    "1. Domínio da norma culta",
+    "2. Compreensão do tema e estrutura dissertativo-argumentativa",
+    "3. Seleção e organização de argumentos",
+    "4. Mecanismos linguísticos de coesão",
+    "5. Proposta de intervenção",
+]
+NOTA_MAXIMA_COMPETENCIA = 200
+CAMPOS_LISTA = ['pontos_fortes', 'pontos_fracos', 'sugestoes_melhoria']
+
+# Esquemas da saída estruturada do Gemini (subconjunto OpenAPI aceito pela API).
+# A faixa 0-200 das notas não cabe no esquema: _nota_valida limita localmente.
+_ESQUEMA_LISTA = {'type': 'ARRAY', 'items': {'type': 'STRING'}}
+_ESQUEMA_NOTA = {
+    'type': 'OBJECT',
+    'properties': {'nota': {'type': 'INTEGER'}, 'comentario': {'type': 'STRING'}},
+    'required': ['nota', 'comentario'],
+}
+ESQUEMA_CORRECAO = {
+    'type': 'OBJECT',
+    'properties': {
+        'analise_competencias': {
+            'type': 'ARRAY',
+            'min_items': len(COMPETENCIAS),
+            'max_items': len(COMPETENCIAS),
+            'items': {
+                'type': 'OBJECT',
+                'properties': {'competencia': {'type': 'INTEGER'}, **_ESQUEMA_NOTA['properties']},
+                'required': ['competencia', 'nota', 'comentario'],
+            },
+        },
+        **{campo: _ESQUEMA_LISTA for campo in CAMPOS_LISTA},
+    },
+    'required': ['analise_competencias', *CAMPOS_LISTA],
+}
+
+# Modo JSON do Gemini com esquema: a resposta vem como JSON puro já no formato da correção
+GENERATION_CONFIG = {'response_mime_type': 'application/json', 'response_schema': ESQUEMA_CORRECAO,
+                     'temperature': 0.2}
+
+
+def esquema_complemento(faltando):
+    """Esquema só com os campos pedidos no complemento ({"c3": {...}, "pontos_fortes": [...]})."""
+    propriedades = {
+        (f'c{campo}' if isinstance(campo, int) else campo): (_ESQUEMA_NOTA if isinstance(campo, int) else _ESQUEMA_LISTA)
+        for campo in faltando
+    }
+    return {'type': 'OBJECT', 'properties': propriedades, 'required': list(propriedades)}
+
+
+class CorrecaoInvalidaError(ValueError):
+    """A resposta do modelo não pôde ser interpretada como JSON nem reparada."""
+
+
+def obter_genai():
+    """
+    google.generativeai sob demanda: o import puxa grpc e protobuf (~0,6 s) e
+    a maioria das requisições nunca corrige redação. Depois do primeiro, é o
+    módulo já carregado em sys.modules.
+    """
+    import google.generativeai as genai
+    return genai
+
+
+def obter_modelo():
+    """Configura o Gemini com a chave do ambiente e retorna o modelo."""
+    current_api_key = os.environ.get('GEMINI_API_KEY')
+    if not current_api_key:
+        raise ValueError("Chave da API Gemini não configurada no ambiente.")
+    genai = obter_genai()
+    genai.configure(api_key=current_api_key)
+    return genai.GenerativeModel(MODEL_NAME, generation_config=GENERATION_CONFIG)
+
+
+def montar_prompt(tema, texto):
+    return f"""
+        CORREÇÃO DE REDAÇÃO - MODELO ENEM
+
+        TEMA: {tema}
+
+        TEXTO DO ESTUDANTE:
+        {texto}
+
+        ANALISE ESTA REDAÇÃO SEGUINDO OS 5 CRITÉRIOS DO ENEM (0-200 pontos cada):
+        1. Domínio da norma culta.
+        2. Compreensão do tema e estrutura dissertativo-argumentativa.
+        3. Seleção, relação, organização e interpretação de informações, fatos, opiniões e argumentos em defesa de um ponto de vista.
+        4. Conhecimento dos mecanismos linguísticos necessários para a construção da argumentação (coesão).
+        5. Elaboração de proposta de intervenção para o problema abordado, respeitando os direitos humanos.
+
+        RETORNE APENAS JSON com esta estrutura EXATA (a nota final é calculada pelo sistema):
+        {{
+            "analise_competencias": [
+                {{"competencia": 1, "nota": 0-200, "comentario": "Análise detalhada..."}},
+                {{"competencia": 2, "nota": 0-200, "comentario": "Análise detalhada..."}},
+                {{"competencia": 3, "nota": 0-200, "comentario": "Análise detalhada..."}},
+                {{"competencia": 4, "nota": 0-200, "comentario": "Análise detalhada..."}},
+                {{"competencia": 5, "nota": 0-200, "comentario": "Análise detalhada..."}}
+            ],
+            "pontos_fortes": ["..."],
+            "pontos_fracos": ["..."],
+            "sugestoes_melhoria": ["..."]
+        }}
+        """
+
+
+def montar_prompt_complemento(tema, texto, faltando):
+    """Prompt curto pedindo apenas os campos que faltaram na primeira resposta."""
+    pedidos = []
+    for campo in faltando:
+        if isinstance(campo, int):
+            pedidos.append(f'"c{campo}": {{"nota": 0-200, "comentario": "..."}}  (competência {COMPETENCIAS[campo - 1]})')
+        else:
+            pedidos.append(f'"{campo}": ["..."]')
+    return f"""
+        CORREÇÃO DE REDAÇÃO - MODELO ENEM (COMPLEMENTO)
+
+        TEMA: {tema}
+
+        TEXTO DO ESTUDANTE:
+        {texto}
+
+        RETORNE APENAS JSON com SOMENTE estes campos:
+        {{
+            {', '.join(pedidos)}
+        }}
+        """
+
+
+def hash_redacao(tema, texto):
+    """Hash do conteúdo normalizado (espaços colapsados, sem caixa no tema)."""
+    tema_norm = ' '.join((tema or '').split()).lower()
+    texto_norm = ' '.join((texto or '').split())
+    return hashlib.sha256(f"{tema_norm}\n{texto_norm}".encode('utf-8')).hexdigest()
+
+
+# ========== REPARO E VALIDAÇÃO DO JSON ==========
+
+def _remover_cercas(raw):
+    """Remove ```json ... ``` e texto antes do primeiro '{'."""
+    texto = (raw or '').strip()
+    texto = re.sub(r'^```(?:json)?\s*', '', texto)
+    texto = re.sub(r'\s*```\s*$', '', texto)
+    inicio = texto.find('{')
+    return texto[inicio:] if inicio >= 0 else texto
+
+
+def _fechar_estruturas(texto):
+    """Fecha string e colchetes/chaves abertos de um JSON truncado."""
+    pilha = []
+    em_string = False
+    escape = False
+    for ch in texto:
+        if em_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                em_string = False
+        elif ch == '"':
+            em_string = True
+        elif ch in '{[':
+            pilha.append('}' if ch == '{' else ']')
+        elif ch in '}]' and pilha:
+            pilha.pop()
+    if em_string:
+        texto += '"'
+    texto = texto.rstrip().rstrip(',:')
+    return texto + ''.join(reversed(pilha))
+
+
+def _ultima_virgula_fora_de_string(texto):
+    em_string = False
+    escape = False
+    posicao = -1
+    for i, ch in enumerate(texto):
+        if em_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                em_string = False
+        elif ch == '"':
+            em_string = True
+        elif ch == ',':
+            posicao = i
+    return posicao
+
+
+def reparar_json(raw, max_cortes=20):
+    """
+    Interpreta a resposta do modelo localmente: remove cercas de código e,
+    se o JSON vier truncado, fecha as estruturas abertas. Se ainda assim
+    falhar, descarta o último elemento incompleto e tenta de novo.
+    """
+    texto = _remover_cercas(raw)
+    try:
+        dados = json.loads(texto)
+    except json.JSONDecodeError:
+        pass
+    else:
+        if not isinstance(dados, dict):
+            raise CorrecaoInvalidaError(f"Resposta do modelo não é um objeto JSON: {(raw or '')[:100]}...")
+        return dados
+
+    for _ in range(max_cortes):
+        try:
+            dados = json.loads(_fechar_estruturas(texto))
+            if isinstance(dados, dict):
+                logger.info("Redação: JSON truncado/malformado reparado localmente.")
+                return dados
+        except json.JSONDecodeError:
+            pass
+        corte = _ultima_virgula_fora_de_string(texto)
+        if corte <= 0:
+            break
+        texto = texto[:corte]
+
+    raise CorrecaoInvalidaError(f"Resposta do modelo não é JSON reparável: {(raw or '')[:100]}...")
+
+
+def _nota_valida(valor):
+    try:
+        nota = float(valor)
+    except (TypeError, ValueError):
+        return None
+    return int(min(NOTA_MAXIMA_COMPETENCIA, max(0, round(nota))))
+
+
+def validar_correcao(dados):
+    """
+    Valida contra o esquema de 5 competências. Retorna (correcao, faltando),
+    onde faltando lista os números das competências e os nomes das listas
+    ausentes ou inválidas.
+    """
+    por_numero = {}
+    for i, comp in enumerate(dados.get('analise_competencias') or [], start=1):
+        if not isinstance(comp, dict):
+            continue
+        numero = comp.get('competencia', i)
+        if not isinstance(numero, int):
+            numero = i  # modelo devolveu o nome da competência em vez do número
+        nota = _nota_valida(comp.get('nota'))
+        comentario = comp.get('comentario')
+        if 1 <= numero <= len(COMPETENCIAS) and nota is not None and isinstance(comentario, str) and comentario.strip():
+            por_numero[numero] = {'nota': nota, 'comentario': comentario.strip()}
+
+    # Respostas de complemento usam {"c3": {...}}
+    for numero in range(1, len(COMPETENCIAS) + 1):
+        comp = dados.get(f'c{numero}')
+        if numero not in por_numero and isinstance(comp, dict):
+            nota = _nota_valida(comp.get('nota'))
+            if nota is not None and isinstance(comp.get('comentario'), str):
+                por_numero[numero] = {'nota': nota, 'comentario': comp['comentario'].strip()}
+
+    faltando = [n for n in range(1, len(COMPETENCIAS) + 1) if n not in por_numero]
+    correcao = {
+        'analise_competencias': [
+            {'competencia': n, **por_numero[n]} for n in sorted(por_numero)
+        ]
+    }
+    for campo in CAMPOS_LISTA:
+        valor = dados.get(campo)
+        if isinstance(valor, list) and valor:
+            correcao[campo] = [str(v) for v in valor]
+        else:
+            faltando.append(campo)
+
+    return correcao, faltando
+
+
+def _finalizar(tema, correcao, faltando):
+    """Preenche o que ainda faltar após o complemento e calcula a nota final."""
+    if faltando:
+        logger.warning(f"Redação: campos ausentes mesmo após complemento: {faltando}")
+        presentes = {c['competencia']: c for c in correcao['analise_competencias']}
+        correcao['analise_competencias'] = [
+            presentes.get(n, {'competencia': n, 'nota': 0, 'comentario': 'Análise indisponível para esta competência.'})
+            for n in range(1, len(COMPETENCIAS) + 1)
+        ]
+        for campo in CAMPOS_LISTA:
+            correcao.setdefault(campo, [])
+        correcao['incompleta'] = True
+
+    for comp in correcao['analise_competencias']:
+        comp['competencia'] = COMPETENCIAS[comp['competencia'] - 1]
+    nota_final = sum(c['nota'] for c in correcao['analise_competencias'])
+    correcao['nota_final'] = nota_final
+    resultado = {
+        'nota': nota_final,
+        'correcao': correcao,
+        'tema': tema,
+        'timestamp': datetime.now().isoformat()
+    }
+    if correcao.get('incompleta'):
+        resultado['incompleta'] = True  # quem grava o cache olha aqui: nota parcial não é reaproveitada
+    return resultado
+
+
+def _aplicar_complemento(correcao, faltando, raw):
+    """Junta o complemento à correção; complemento irrecuperável mantém a primeira correção (como está)."""
+    try:
+        complemento = reparar_json(raw)
+    except CorrecaoInvalidaError as e:
+        logger.warning(f"Redação: complemento descartado ({e}); seguindo com a correção parcial.")
+        return correcao, faltando
+    return validar_correcao({**complemento, **correcao})
+
+
+def corrigir_redacao(tema, texto, model=None):
+    """Corrige a redação (chamada síncrona ao Gemini)."""
+    model = model or obter_modelo()
+    response = model.generate_content(montar_prompt(tema, texto))
+    correcao, faltando = validar_correcao(reparar_json(response.text))
+    if faltando:
+        # Só os campos ausentes voltam ao modelo; o restante da correção é mantido
+        logger.info(f"Redação: pedindo complemento apenas para {faltando}")
+        complemento = model.generate_content(montar_prompt_complemento(tema, texto, faltando),
+                                             generation_config={'response_schema': esquema_complemento(faltando)})
+        correcao, faltando = _aplicar_complemento(correcao, faltando, complemento.text)
+    return _finalizar(tema, correcao, faltando)
+
+
+async def corrigir_redacao_async(tema, texto, model=None):
+    """Corrige a redação usando o cliente assíncrono do Gemini."""
+    model = model or obter_modelo()
+    response = await model.generate_content_async(montar_prompt(tema, texto))
+    correcao, faltando = validar_correcao(reparar_json(response.text))
+    if faltando:
+        logger.info(f"Redação: pedindo complemento apenas para {faltando}")
+        complemento = await model.generate_content_async(
+            montar_prompt_complemento(tema, texto, faltando),
+            generation_config={'response_schema': esquema_complemento(faltando)})
+        correcao, faltando = _aplicar_complemento(correcao, faltando, complemento.text)
+    return _finalizar(tema, correcao, faltando)
+
+
+# ========== CACHE POR HASH DE CONTEÚDO ==========
+
+def buscar_cache(conn, hash_conteudo):
+    row = conn.execute(
+        "SELECT tema, nota, correcao, created_at FROM cache_correcoes WHERE hash = ?",
+        (hash_conteudo,)
+    ).fetchone()
+    if not row:
+        return None
+    try:
+        correcao = json.loads(row[2])
+    except json.JSONDecodeError:
+        return None  # entrada antiga (markdown): trata como miss
+    return {
+        'nota': row[1],
+        'correcao': correcao,
+        'tema': row[0],
+        'timestamp': row[3]
+    }
+
+
+def salvar_cache(conn, hash_conteudo, resultado):
+    conn.execute(
+        "INSERT OR REPLACE INTO cache_correcoes (hash, tema, nota, correcao) VALUES (?, ?, ?, ?)",
+        (hash_conteudo, resultado['tema'], resultado['nota'],
+         json.dumps(resultado['correcao'], ensure_ascii=False))
+    )
+
+
+# ========== HISTÓRICO ==========
+
+def buscar_tema_id(conn, tema):
+    """Resolve o tema pelo título. temas_redacao.id é TEXT (e às vezes nulo), então usamos o rowid."""
+    row = conn.execute("SELECT rowid FROM temas_redacao WHERE titulo = ?", (tema,)).fetchone()
+    return row[0] if row else 0
+
+
+def salvar_historico_redacao(conn, user_id, tema, texto, resultado):
+    cursor = conn.execute('''
+        INSERT INTO historico_redacoes (user_id, tema_id, texto, correcao, nota_final, data_correcao)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (
+        user_id,
+        buscar_tema_id(conn, tema),
+        texto,
+        json.dumps(resultado, ensure_ascii=False),
+        resultado['nota'],
+        datetime.now().isoformat()
+    ))
+    return cursor.lastrowid
+
+
+def listar_historico_redacoes(conn, user_id, pagina=1, por_pagina=10):
+    """Página do histórico do aluno, mais recentes primeiro (usa o índice (user_id, data_correcao))."""
+    total = conn.execute(
+        "SELECT COUNT(*) FROM historico_redacoes WHERE user_id = ?", (user_id,)
+    ).fetchone()[0]
+    rows = conn.execute('''
+        SELECT h.id, h.nota_final, h.data_correcao, t.titulo
+        FROM historico_redacoes h
+        LEFT JOIN temas_redacao t ON t.rowid = h.tema_id
+        WHERE h.user_id = ?
+        ORDER BY h.data_correcao DESC
+        LIMIT ? OFFSET ?
+    ''', (user_id, por_pagina, (pagina - 1) * por_pagina)).fetchall()
+    itens = [{
+        'id': row[0],
+        'nota': row[1],
+        'data_correcao': row[2],
+        'tema': row[3]
+    } for row in rows]
+    return itens, total
+
+
+def obter_redacao_historico(conn, user_id, redacao_id):
+    """Redação + correção armazenada, apenas se pertencer ao aluno."""
+    row = conn.execute(
+        "SELECT id, texto, correcao, nota_final, data_correcao FROM historico_redacoes WHERE id = ? AND user_id = ?",
+        (redacao_id, user_id)
+    ).fetchone()
+    if not row:
+        return None
+    try:
+        resultado = json.loads(row[2]) if row[2] else {}
+    except json.JSONDecodeError:
+        resultado = {}
+    resultado.update({
+        'redacao_id': row[0],
+        'texto': row[1],
+        'nota': row[3],
+        'data_correcao': row[4]
+    })
+    return resultado
@@ -0,0 +1,103 @@
+"""
+Tabela fato de respostas (uma linha por questão respondida).
+Substitui a leitura dos blobs JSON de historico_simulados para análises
+por questão (taxa de acerto de cada questão, erros recorrentes do aluno).
+
+Uso (backfill a partir do histórico existente):
+    python respostas_fato.py
+"""
+import json
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def criar_tabela_respostas_fato(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS respostas_fato (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            simulado_id TEXT NOT NULL,
+            question_id INTEGER NOT NULL,
+            materia TEXT,
+            resposta TEXT,
+            acertou INTEGER NOT NULL,
+            tempo_ms INTEGER,
+            ts TIMESTAMP NOT NULL,
+            UNIQUE (simulado_id, question_id)
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_respostas_fato_user ON respostas_fato (user_id, ts)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_respostas_fato_questao ON respostas_fato (question_id, acertou)")
+
+
+def gravar_respostas(conn, linhas):
+    """
+    Insere as respostas de um simulado em lote. Não faz commit (roda dentro
+    da transação do finalizar). Reprocessar o mesmo simulado não duplica.
+
+    linhas: [(user_id, simulado_id, question_id, materia, resposta, acertou, tempo_ms, ts)]
+    """
+    conn.executemany('''
+        INSERT OR IGNORE INTO respostas_fato
+        (user_id, simulado_id, question_id, materia, resposta, acertou, tempo_ms, ts)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', linhas)
+
+
+def backfill_respostas_fato(conn, lote=500):
+    """
+    Explode os JSON de historico_simulados (config.questoes_ids + respostas)
+    em respostas_fato. Questões sem resposta entram com resposta NULL e
+    acertou = 0, como no finalizar. Idempotente.
+    """
+    criar_tabela_respostas_fato(conn)
+    gabarito = dict(conn.execute("SELECT id, resposta_correta FROM questions"))
+    materias = dict(conn.execute("SELECT id, materia FROM questions"))
+
+    total_simulados = 0
+    total_linhas = 0
+    pendentes = []
+    for user_id, simulado_id, config_json, respostas_json, data_fim in conn.execute(
+        "SELECT user_id, simulado_id, config, respostas, data_fim FROM historico_simulados"
+    ).fetchall():
+        try:
+            config = json.loads(config_json or '{}')
+            respostas = json.loads(respostas_json or '{}')
+        except json.JSONDecodeError:
+            logger.warning(f"Backfill: JSON inválido no simulado {simulado_id}. Pulando.")
+            continue
+
+        ids = config.get('questoes_ids') or [int(k) for k in respostas.keys() if str(k).isdigit()]
+        ts = data_fim or datetime.now().isoformat()
+        for questao_id in ids:
+            resposta = respostas.get(str(questao_id))
+            if isinstance(resposta, dict):  # formato antigo: {"alternativa_escolhida": ..., "acertou": ...}
+                resposta = resposta.get('alternativa_escolhida') or resposta.get('resposta')
+            acertou = int(resposta is not None and resposta == gabarito.get(questao_id))
+            pendentes.append((user_id, simulado_id, questao_id, materias.get(questao_id),
+                              resposta, acertou, None, ts))
+
+        total_simulados += 1
+        if len(pendentes) >= lote:
+            gravar_respostas(conn, pendentes)
+            total_linhas += len(pendentes)
+            pendentes = []
+
+    if pendentes:
+        gravar_respostas(conn, pendentes)
+        total_linhas += len(pendentes)
+    conn.commit()
+    return total_simulados, total_linhas
+
+
+if __name__ == "__main__":
+    from banco_dados import get_db_connection, garantir_esquema
+
+    logging.basicConfig(level=logging.INFO)
+    conn = get_db_connection()
+    garantir_esquema(conn)
+    simulados, linhas = backfill_respostas_fato(conn)
+    print(f"📊 Backfill concluído: {simulados} simulados -> {linhas} linhas processadas em respostas_fato.")
+    conn.close()
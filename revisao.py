@@ -0,0 +1,140 @@
+"""
+Revisão espaçada (SM-2) das questões respondidas.
+Cada questão respondida num simulado finalizado ganha (ou atualiza) uma
+linha em revisao_questoes com a próxima data de revisão:
+
+- acerto: intervalo 1 dia, depois 6, depois intervalo * facilidade;
+- erro (ou em branco): volta para o início e fica disponível na hora.
+
+O índice (user_id, proxima_revisao) é a fila de prioridade por usuário:
+"as k questões mais atrasadas" é uma busca no índice + k linhas.
+
+Uso (reconstrução a partir de respostas_fato):
+    python revisao.py
+"""
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+FACILIDADE_INICIAL = 2.5
+FACILIDADE_MINIMA = 1.3
+QUALIDADE_ACERTO = 4  # escala 0-5 do SM-2
+QUALIDADE_ERRO = 1
+
+
+def criar_tabela_revisao(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS revisao_questoes (
+            user_id TEXT NOT NULL,
+            question_id INTEGER NOT NULL,
+            repeticoes INTEGER NOT NULL DEFAULT 0,
+            intervalo_dias REAL NOT NULL DEFAULT 0,
+            facilidade REAL NOT NULL DEFAULT 2.5,
+            erros INTEGER NOT NULL DEFAULT 0,
+            proxima_revisao TIMESTAMP NOT NULL,
+            ultima_resposta TIMESTAMP,
+            PRIMARY KEY (user_id, question_id)
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_revisao_fila ON revisao_questoes (user_id, proxima_revisao)")
+
+
+def proximo_estado(estado, acertou, agora):
+    """SM-2: (repeticoes, intervalo_dias, facilidade, erros) -> novo estado + próxima revisão."""
+    repeticoes, intervalo, facilidade, erros = estado or (0, 0.0, FACILIDADE_INICIAL, 0)
+    q = QUALIDADE_ACERTO if acertou else QUALIDADE_ERRO
+    facilidade = max(FACILIDADE_MINIMA, facilidade + 0.1 - (5 - q) * (0.08 + (5 - q) * 0.02))
+    if acertou:
+        repeticoes += 1
+        intervalo = 1.0 if repeticoes == 1 else 6.0 if repeticoes == 2 else round(intervalo * facilidade, 2)
+    else:
+        repeticoes, intervalo, erros = 0, 0.0, erros + 1
+    proxima = agora + timedelta(days=intervalo)
+    return (repeticoes, intervalo, facilidade, erros), proxima
+
+
+def agendar_revisoes(conn, user_id, respostas, agora=None):
+    """
+    Atualiza a agenda com as respostas de um simulado. Não faz commit.
+
+    respostas: [(question_id, acertou)]
+    """
+    if not respostas:
+        return
+    agora = agora or datetime.now()
+    ids = [questao_id for questao_id, _ in respostas]
+    atuais = {
+        r[0]: tuple(r[1:])
+        for r in conn.execute(
+            f"SELECT question_id, repeticoes, intervalo_dias, facilidade, erros FROM revisao_questoes "
+            f"WHERE user_id = ? AND question_id IN ({','.join('?' * len(ids))})",
+            [user_id, *ids]
+        )
+    }
+    linhas = []
+    for questao_id, acertou in respostas:
+        estado, proxima = proximo_estado(atuais.get(questao_id), acertou, agora)
+        linhas.append((user_id, questao_id, *estado,
+                       proxima.isoformat(timespec='seconds'), agora.isoformat(timespec='seconds')))
+    conn.executemany('''
+        INSERT OR REPLACE INTO revisao_questoes
+        (user_id, question_id, repeticoes, intervalo_dias, facilidade, erros, proxima_revisao, ultima_resposta)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', linhas)
+
+
+def questoes_para_revisar(conn, user_id, limite=20, agora=None):
+    """IDs das `limite` questões vencidas há mais tempo (mais atrasadas primeiro)."""
+    agora = (agora or datetime.now()).isoformat(timespec='seconds')
+    return [r[0] for r in conn.execute(
+        "SELECT question_id FROM revisao_questoes WHERE user_id = ? AND proxima_revisao <= ? "
+        "ORDER BY proxima_revisao LIMIT ?",
+        (user_id, agora, limite)
+    )]
+
+
+def resumo_revisao(conn, user_id, agora=None):
+    agora = (agora or datetime.now()).isoformat(timespec='seconds')
+    vencidas, total, proxima = conn.execute(
+        "SELECT SUM(proxima_revisao <= ?), COUNT(*), MIN(CASE WHEN proxima_revisao > ? THEN proxima_revisao END) "
+        "FROM revisao_questoes WHERE user_id = ?",
+        (agora, agora, user_id)
+    ).fetchone()
+    return {'vencidas': vencidas or 0, 'agendadas': total, 'proxima_revisao': proxima}
+
+
+def reconstruir_revisoes(conn):
+    """Refaz a agenda reaplicando respostas_fato em ordem cronológica."""
+    criar_tabela_revisao(conn)
+    conn.execute("DELETE FROM revisao_questoes")
+    estados = {}
+    for user_id, questao_id, acertou, ts in conn.execute(
+        "SELECT user_id, question_id, acertou, ts FROM respostas_fato ORDER BY ts"
+    ).fetchall():
+        try:
+            quando = datetime.fromisoformat(str(ts))
+        except ValueError:
+            continue
+        estado, proxima = proximo_estado(estados.get((user_id, questao_id), (None,))[0], acertou, quando)
+        estados[(user_id, questao_id)] = (estado, proxima, quando)
+    conn.executemany('''
+        INSERT INTO revisao_questoes
+        (user_id, question_id, repeticoes, intervalo_dias, facilidade, erros, proxima_revisao, ultima_resposta)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (user_id, questao_id, *estado, proxima.isoformat(timespec='seconds'), quando.isoformat(timespec='seconds'))
+        for (user_id, questao_id), (estado, proxima, quando) in estados.items()
+    ])
+    conn.commit()
+    return len(estados)
+
+
+if __name__ == "__main__":
+    from banco_dados import get_db_connection, garantir_esquema
+
+    logging.basicConfig(level=logging.INFO)
+    conn = get_db_connection()
+    garantir_esquema(conn)
+    print(f"🔁 Agenda de revisão reconstruída: {reconstruir_revisoes(conn)} questões agendadas.")
+    conn.close()
@@ -0,0 +1,205 @@
+"""
+Série temporal de desempenho para o dashboard.
+Rollup diário por usuário (nota_final e acerto por disciplina), atualizado
+em /api/simulado/finalizar. A consulta agrega os dias em semanas quando
+pedido e reduz a série a um orçamento de pontos com LTTB
+(Largest-Triangle-Three-Buckets), então o payload não cresce com o
+histórico.
+
+Uso (reconstrução a partir do histórico existente):
+    python serie_desempenho.py
+"""
+import json
+import logging
+from datetime import date, datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+MAX_PONTOS = 500
+
+
+def criar_tabelas_serie(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS serie_desempenho_dia (
+            user_id TEXT NOT NULL,
+            dia DATE NOT NULL,
+            simulados INTEGER NOT NULL DEFAULT 0,
+            soma_nota_final REAL NOT NULL DEFAULT 0,
+            soma_percentual REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, dia)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS serie_materia_dia (
+            user_id TEXT NOT NULL,
+            dia DATE NOT NULL,
+            disciplina TEXT NOT NULL,
+            tentativas INTEGER NOT NULL DEFAULT 0,
+            acertos INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, dia, disciplina)
+        )
+    ''')
+
+
+def atualizar_serie(conn, user_id, relatorio, por_materia):
+    """Soma o simulado ao balde do dia. Não faz commit (transação do finalizar)."""
+    dia = relatorio['data_fim'][:10]
+    conn.execute('''
+        INSERT INTO serie_desempenho_dia (user_id, dia, simulados, soma_nota_final, soma_percentual)
+        VALUES (?, ?, 1, ?, ?)
+        ON CONFLICT(user_id, dia) DO UPDATE SET
+            simulados = simulados + 1,
+            soma_nota_final = soma_nota_final + excluded.soma_nota_final,
+            soma_percentual = soma_percentual + excluded.soma_percentual
+    ''', (user_id, dia, relatorio['nota_final'], relatorio['percentual_acerto']))
+
+    por_disciplina = {}
+    for (disciplina, _materia), stats in por_materia.items():
+        acumulado = por_disciplina.setdefault(disciplina, [0, 0])
+        acumulado[0] += stats['tentativas']
+        acumulado[1] += stats['acertos']
+    conn.executemany('''
+        INSERT INTO serie_materia_dia (user_id, dia, disciplina, tentativas, acertos)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(user_id, dia, disciplina) DO UPDATE SET
+            tentativas = tentativas + excluded.tentativas,
+            acertos = acertos + excluded.acertos
+    ''', [(user_id, dia, d, t, a) for d, (t, a) in por_disciplina.items()])
+
+
+def lttb(pontos, limite):
+    """
+    Largest-Triangle-Three-Buckets: reduz [(x, y, ...)] a `limite` pontos
+    preservando a forma visual (picos e vales). Mantém primeiro e último.
+    """
+    n = len(pontos)
+    if limite >= n or limite < 3:
+        return list(pontos)
+
+    amostra = [pontos[0]]
+    tamanho_balde = (n - 2) / (limite - 2)
+    a = 0
+    for i in range(limite - 2):
+        inicio = int(i * tamanho_balde) + 1
+        fim = int((i + 1) * tamanho_balde) + 1
+
+        # Média do próximo balde (terceiro vértice do triângulo)
+        prox_inicio = fim
+        prox_fim = min(int((i + 2) * tamanho_balde) + 1, n)
+        prox = pontos[prox_inicio:prox_fim] or [pontos[-1]]
+        media_x = sum(p[0] for p in prox) / len(prox)
+        media_y = sum(p[1] for p in prox) / len(prox)
+
+        ax, ay = pontos[a][0], pontos[a][1]
+        melhor, maior_area = inicio, -1.0
+        for j in range(inicio, fim):
+            area = abs((ax - media_x) * (pontos[j][1] - ay) - (ax - pontos[j][0]) * (media_y - ay))
+            if area > maior_area:
+                melhor, maior_area = j, area
+        amostra.append(pontos[melhor])
+        a = melhor
+
+    amostra.append(pontos[-1])
+    return amostra
+
+
+def _chave_balde(dia, granularidade):
+    if granularidade == 'semana':
+        d = date.fromisoformat(dia)
+        return (d - timedelta(days=d.weekday())).isoformat()  # segunda-feira da semana
+    return dia
+
+
+def consultar_serie(conn, user_id, inicio=None, fim=None, granularidade='dia', pontos=100):
+    """Série de nota_final/percentual e acerto por disciplina no intervalo [inicio, fim]."""
+    inicio = inicio or '0000-01-01'
+    fim = fim or '9999-12-31'
+    pontos = max(3, min(MAX_PONTOS, pontos))
+
+    baldes = {}
+    for dia, simulados, soma_nota, soma_perc in conn.execute(
+        "SELECT dia, simulados, soma_nota_final, soma_percentual FROM serie_desempenho_dia "
+        "WHERE user_id = ? AND dia BETWEEN ? AND ? ORDER BY dia",
+        (user_id, inicio, fim)
+    ):
+        b = baldes.setdefault(_chave_balde(dia, granularidade), [0, 0.0, 0.0])
+        b[0] += simulados
+        b[1] += soma_nota
+        b[2] += soma_perc
+
+    materias = {}
+    for dia, disciplina, tentativas, acertos in conn.execute(
+        "SELECT dia, disciplina, tentativas, acertos FROM serie_materia_dia "
+        "WHERE user_id = ? AND dia BETWEEN ? AND ? ORDER BY dia",
+        (user_id, inicio, fim)
+    ):
+        b = materias.setdefault(disciplina, {}).setdefault(_chave_balde(dia, granularidade), [0, 0])
+        b[0] += tentativas
+        b[1] += acertos
+
+    def _x(chave):
+        return date.fromisoformat(chave).toordinal()
+
+    serie = [
+        (_x(chave), b[1] / b[0], chave, b[0], b[2] / b[0])
+        for chave, b in sorted(baldes.items()) if b[0]
+    ]
+    serie = lttb(serie, pontos)
+
+    series_materia = {}
+    for disciplina, dias in materias.items():
+        s = [(_x(chave), 100 * a / t, chave, t) for chave, (t, a) in sorted(dias.items()) if t]
+        series_materia[disciplina] = [
+            {'data': p[2], 'percentual': round(p[1], 1), 'tentativas': p[3]} for p in lttb(s, pontos)
+        ]
+
+    return {
+        'granularidade': granularidade,
+        'pontos': [{
+            'data': p[2],
+            'simulados': p[3],
+            'nota_media': round(p[1], 2),
+            'percentual_medio': round(p[4], 2)
+        } for p in serie],
+        'por_disciplina': series_materia
+    }
+
+
+def reconstruir_serie(conn):
+    """Recalcula os rollups a partir de historico_simulados e respostas_fato."""
+    criar_tabelas_serie(conn)
+    conn.execute("DELETE FROM serie_desempenho_dia")
+    conn.execute("DELETE FROM serie_materia_dia")
+    for user_id, relatorio_json, data_fim in conn.execute(
+        "SELECT user_id, relatorio, data_fim FROM historico_simulados"
+    ).fetchall():
+        try:
+            r = json.loads(relatorio_json)
+        except (json.JSONDecodeError, TypeError):
+            continue
+        relatorio = {
+            'data_fim': str(r.get('data_fim') or data_fim or datetime.now().isoformat()),
+            'nota_final': r.get('nota_final', r.get('nota_final_peso', 0)),
+            'percentual_acerto': r.get('percentual_acerto', r.get('percentual_acerto_simples', 0))
+        }
+        atualizar_serie(conn, user_id, relatorio, {})
+
+    conn.execute('''
+        INSERT INTO serie_materia_dia (user_id, dia, disciplina, tentativas, acertos)
+        SELECT f.user_id, substr(f.ts, 1, 10), COALESCE(q.disciplina, 'Geral'), COUNT(*), SUM(f.acertou)
+        FROM respostas_fato f LEFT JOIN questions q ON q.id = f.question_id
+        GROUP BY f.user_id, substr(f.ts, 1, 10), COALESCE(q.disciplina, 'Geral')
+    ''')
+    conn.commit()
+
+
+if __name__ == "__main__":
+    from banco_dados import get_db_connection, garantir_esquema
+
+    logging.basicConfig(level=logging.INFO)
+    conn = get_db_connection()
+    garantir_esquema(conn)
+    reconstruir_serie(conn)
+    total = conn.execute("SELECT COUNT(*) FROM serie_desempenho_dia").fetchone()[0]
+    print(f"📈 Série reconstruída: {total} baldes diários.")
+    conn.close()
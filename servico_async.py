@@ -0,0 +1,275 @@
+"""
+API assíncrona (ASGI) sobre o mesmo núcleo da app Flask.
+Matérias, simulado (iniciar/responder/questões/finalizar), redação
+(pré-análise/correção) e dashboard rodam num event loop: um processo segura
+milhares de conexões abertas, inclusive as que esperam o Gemini.
+
+- O domínio é o de app.py (importado como núcleo): simulados em memória,
+  prazos, catálogo compacto, ranking e caches são os mesmos objetos.
+- SQLite é síncrono: as funções que abrem o banco rodam num executor de
+  threads dedicado (ASYNC_DB_THREADS, padrão 8), nunca no event loop. O que
+  é só memória (responder, janelas de questões) roda direto no loop.
+- A correção de redação usa o cliente assíncrono do Gemini
+  (corrigir_redacao_async): esperar o LLM não ocupa thread nenhuma.
+- O aluno é identificado pelo mesmo cookie de sessão assinado do Flask;
+  as demais rotas (revisão, adaptativo, ranking, admin, páginas) seguem
+  servidas pela app Flask montada como fallback.
+
+Uso:
+    uvicorn servico_async:app --host 0.0.0.0 --port 8000
+"""
+import os
+import asyncio
+import secrets
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from starlette.middleware.wsgi import WSGIMiddleware
+from itsdangerous import BadSignature
+
+import app as nucleo
+from compressao import CompressaoASGI
+from redacao_ia import corrigir_redacao_async, CorrecaoInvalidaError
+
+logger = logging.getLogger(__name__)
+
+DB_THREADS = int(os.environ.get('ASYNC_DB_THREADS', 8))
+
+executor_banco = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix='sqlite')
+
+app = FastAPI(title="Esquematiza - API assíncrona")
+# Mesmo encoder da app Flask: brotli/gzip negociado, níveis configuráveis e métricas em /api/admin/metricas
+app.add_middleware(CompressaoASGI, compressao=nucleo.compressao)
+
+
+async def _no_banco(funcao, *args, **kwargs):
+    """Executa trabalho síncrono de SQLite no executor dedicado, sem bloquear o event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor_banco, lambda: funcao(*args, **kwargs))
+
+
+def _erro(mensagem, status, **extra):
+    # Mesmo formato do jsonify({'error': ...}) da app Flask
+    return JSONResponse({'error': mensagem, **extra}, status_code=status)
+
+
+async def _corpo_json(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+# ========== SESSÃO (cookie do Flask) ==========
+
+_serializador_sessao = nucleo.app.session_interface.get_signing_serializer(nucleo.app)
+COOKIE_SESSAO = nucleo.app.config['SESSION_COOKIE_NAME']
+IDADE_SESSAO = int(nucleo.app.permanent_session_lifetime.total_seconds())
+
+
+def _ler_sessao(request):
+    cookie = request.cookies.get(COOKIE_SESSAO)
+    if not cookie:
+        return {}
+    try:
+        return dict(_serializador_sessao.loads(cookie, max_age=IDADE_SESSAO))
+    except BadSignature:
+        return {}
+
+
+@app.middleware('http')
+async def sessao_aluno(request, call_next):
+    """Mesmo user_id anônimo do obter_user_id() do Flask, no mesmo cookie assinado."""
+    sessao = _ler_sessao(request)
+    nova = 'user_id' not in sessao
+    if nova:
+        sessao['user_id'] = f"user_{secrets.token_hex(8)}"
+    request.state.user_id = sessao['user_id']
+    resposta = await call_next(request)
+    # Rotas servidas pelo Flask (fallback) já gravam a própria sessão
+    ja_gravada = any(c.startswith(f'{COOKIE_SESSAO}=') for c in resposta.headers.getlist('set-cookie'))
+    if nova and not ja_gravada:
+        resposta.set_cookie(COOKIE_SESSAO, _serializador_sessao.dumps(sessao), httponly=True, samesite='Lax')
+    return resposta
+
+
+# ========== CATÁLOGO ==========
+
+def _etag_confere(request, etag):
+    # A compressão pode enfraquecer a ETag: compara ignorando o prefixo W/
+    enviadas = request.headers.get('if-none-match', '')
+    return any(e.strip().removeprefix('W/').strip('"') == etag for e in enviadas.split(','))
+
+
+async def _resposta_catalogo(request, nome, carregar):
+    """Versão assíncrona de app._resposta_catalogo: 304 sem abrir o banco quando a ETag confere."""
+    versao = await _no_banco(nucleo.versao_catalogo.atual, nucleo.get_db_connection)
+    etag = f'catalogo-{versao}-{nome}'
+    cabecalhos = {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache'}
+    if _etag_confere(request, etag):
+        return Response(status_code=304, headers=cabecalhos)
+    dados = await _no_banco(nucleo._dados_catalogo, nome, versao, carregar)
+    return JSONResponse(dados, headers=cabecalhos)
+
+
+@app.get('/api/materias')
+async def api_materias(request: Request):
+    try:
+        return await _resposta_catalogo(request, 'materias', nucleo._carregar_materias)
+    except Exception as e:
+        logger.error(f'API async /api/materias: ERRO CRÍTICO - {e}')
+        return _erro('Erro interno ao buscar matérias', 500)
+
+
+# ========== SIMULADO ==========
+
+@app.post('/api/simulado/iniciar')
+async def api_simulado_iniciar(request: Request):
+    try:
+        data = await _corpo_json(request)
+        materia = data.get('materia', 'todas')
+        quantidade = nucleo._quantidade_pedida(data)
+        if quantidade is None:
+            return _erro('quantidade deve ser um inteiro maior que zero', 400)
+        questions = await _no_banco(nucleo._sortear_questoes, materia, quantidade)
+        if not questions:
+            return _erro('Nenhuma questão encontrada para esta matéria/quantidade', 404)
+        simulado_id, simulado = nucleo._criar_simulado(
+            questions, request.state.user_id, {'materia': materia, 'quantidade': quantidade},
+            data.get('tempo_limite_minutos'))
+        logger.info(f"🎯 Simulado {simulado_id} iniciado com {len(questions)} questões (async).")
+        return JSONResponse(nucleo._inicio_simulado(simulado_id, simulado, data.get('janela')))
+    except Exception as e:
+        logger.error(f"API async /api/simulado/iniciar: ERRO CRÍTICO - {e}", exc_info=True)
+        return _erro('Erro interno ao iniciar simulado', 500)
+
+
+@app.post('/api/simulado/responder')
+async def api_simulado_responder(request: Request):
+    try:
+        data = await _corpo_json(request)
+        # Só memória, O(1): roda no próprio loop
+        payload, status = nucleo._registrar_resposta(
+            data.get('simulado_id'), data.get('questao_id'), data.get('resposta'), data.get('tempo_ms'))
+        return JSONResponse(payload, status_code=status)
+    except Exception as e:
+        logger.error(f"API async /api/simulado/responder: ERRO CRÍTICO - {e}", exc_info=True)
+        return _erro('Erro interno ao registrar resposta', 500)
+
+
+@app.get('/api/simulado/{simulado_id}/questoes')
+async def api_simulado_questoes(request: Request, simulado_id: str):
+    simulado = nucleo.simulados_ativos.get(simulado_id)
+    if simulado is None:
+        return _erro('Simulado não encontrado ou expirado', 404)
+    try:
+        etag, restante, corpo = nucleo._janela_simulado(
+            simulado_id, simulado, request.query_params.get('inicio', 0),
+            request.query_params.get('quantidade', nucleo.JANELA_INICIAL))
+    except ValueError:
+        return _erro('inicio e quantidade devem ser inteiros', 400)
+    cabecalhos = {'ETag': f'W/"{etag}"', 'Cache-Control': f'private, max-age={restante}'}
+    if _etag_confere(request, etag):
+        return Response(status_code=304, headers=cabecalhos)
+    return JSONResponse(corpo, headers=cabecalhos)
+
+
+@app.post('/api/simulado/finalizar')
+async def api_simulado_finalizar(request: Request):
+    try:
+        data = await _corpo_json(request)
+        simulado_id = data.get('simulado_id')
+        resultado_final = await _no_banco(nucleo._finalizar_ou_expirado, simulado_id)
+        if resultado_final is None:
+            logger.warning(f"API async /finalizar: Tentativa de finalizar simulado inexistente: {simulado_id}")
+            return _erro('Simulado não encontrado ou já finalizado', 404)
+        return JSONResponse(resultado_final)
+    except Exception as e:
+        logger.error(f"API async /api/simulado/finalizar: ERRO CRÍTICO - {e}", exc_info=True)
+        return _erro('Erro interno ao finalizar simulado', 500)
+
+
+# ========== REDAÇÃO ==========
+
+def _pre_analise(tema, texto):
+    conn = nucleo.get_db_connection()
+    try:
+        return nucleo._pre_analisar(conn, tema, texto)
+    finally:
+        conn.close()
+
+
+@app.post('/api/redacao/pre-analise')
+async def api_redacao_pre_analise(request: Request):
+    try:
+        data = await _corpo_json(request)
+        return JSONResponse(await _no_banco(_pre_analise, data.get('tema', ''), data.get('texto', '')))
+    except Exception as e:
+        logger.error(f"API async /api/redacao/pre-analise: ERRO CRÍTICO - {e}", exc_info=True)
+        return _erro('Erro interno na pré-análise', 500)
+
+
+@app.post('/api/redacao/corrigir-gemini')
+async def api_redacao_corrigir_gemini(request: Request):
+    try:
+        data = await _corpo_json(request)
+        tema = data.get('tema')
+        texto = data.get('texto')
+        if not tema or not texto:
+            return _erro('Tema e texto são obrigatórios', 400)
+
+        user_id = request.state.user_id
+        hash_conteudo, pre_analise, resultado = await _no_banco(nucleo._preparar_correcao, tema, texto)
+        if not pre_analise['apta']:
+            return _erro(' '.join(pre_analise['problemas']), 422, pre_analise=pre_analise)
+        if resultado:
+            logger.info(f"API async /corrigir-gemini: Cache HIT ({hash_conteudo[:12]}) - Nota: {resultado['nota']}")
+            await _no_banco(nucleo._gravar_correcao, user_id, tema, texto, hash_conteudo, resultado, do_cache=True)
+            return JSONResponse(resultado)
+
+        try:
+            # O primeiro obter_modelo importa o SDK do Gemini (~0,6 s): fora do event loop
+            model = await asyncio.to_thread(nucleo.obter_modelo)
+        except Exception as e_gemini_config:
+            logger.error(f'API async /corrigir-gemini: ERRO CRÍTICO ao configurar Gemini - {e_gemini_config}')
+            return _erro(f'Falha ao configurar API do Gemini: {e_gemini_config}', 503)
+
+        # A espera pelo LLM é só um await: nenhuma thread fica presa
+        resultado = await corrigir_redacao_async(tema, texto, model=model)
+        resultado['pre_analise'] = pre_analise
+        await _no_banco(nucleo._gravar_correcao, user_id, tema, texto, hash_conteudo, resultado)
+        logger.info(f"✅ Correção concluída (async) - Nota: {resultado['nota']}")
+        return JSONResponse(resultado)
+
+    except CorrecaoInvalidaError as e:
+        logger.error(f"API async /api/redacao/corrigir-gemini: Resposta do Gemini irrecuperável - {e}")
+        return _erro('O corretor automático retornou uma resposta inválida. Tente novamente.', 502)
+    except Exception as e:
+        logger.error(f"API async /api/redacao/corrigir-gemini: ERRO CRÍTICO - {e}", exc_info=True)
+        if "API key not valid" in str(e):
+            return _erro('Chave da API Gemini inválida. Verifique as variáveis de ambiente.', 401)
+        return _erro('Erro interno ao processar correção', 500)
+
+
+# ========== DASHBOARD ==========
+
+@app.get('/api/dashboard/estatisticas')
+async def api_dashboard_estatisticas(request: Request):
+    try:
+        return JSONResponse(await _no_banco(nucleo._estatisticas_dashboard, request.state.user_id))
+    except Exception as e:
+        logger.error(f'API async /dashboard/estatisticas: ERRO CRÍTICO - {e}', exc_info=True)
+        return _erro('Erro interno ao buscar estatísticas', 500)
+
+
+@app.on_event('shutdown')
+def _encerrar_executor():
+    executor_banco.shutdown(wait=False)
+
+
+# Demais rotas e arquivos estáticos: a própria app Flask (no threadpool do ASGI).
+# Montada por último, só recebe o que as rotas acima não atendem.
+app.mount('/', WSGIMiddleware(nucleo.app))
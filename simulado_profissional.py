@@ -7,11 +7,12 @@ from datetime import datetime, timedelta
 import json
 import sqlite3
 import random
+import sys
 import time
+from collections import OrderedDict
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
-import pandas as pd
 
 
 class Dificuldade(Enum):
@@ -31,7 +32,15 @@ class Materia(Enum):
     ATUALIDADES = "Atualidades"
 
 
-@dataclass
+# Lookup direto valor -> membro (Materia(valor) percorre o mecanismo de Enum a cada linha)
+MATERIA_POR_VALOR: Dict[str, Materia] = {m.value: m for m in Materia}
+DIFICULDADE_POR_VALOR: Dict[str, Dificuldade] = {d.value: d for d in Dificuldade}
+
+# __slots__ nos registros (sem __dict__ por instância); slots=True só existe a partir do 3.10
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
 class Questao:
     """Classe que representa uma questão do simulado"""
     id: int
@@ -41,9 +50,9 @@ class Questao:
     alternativa_b: str
     alternativa_c: str
     alternativa_d: str
-    alternativa_e: Optional[str] = None
     resposta_correta: str
     dificuldade: Dificuldade
+    alternativa_e: Optional[str] = None
     justificativa: Optional[str] = None
     tempo_estimado: int = 60  # segundos
     ano_prova: Optional[str] = None
@@ -68,7 +77,7 @@ class Questao:
         }
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class RespostaUsuario:
     """Classe para gerenciar respostas do usuário"""
     questao_id: int
@@ -81,10 +90,68 @@ class RespostaUsuario:
 class BancoQuestoes:
     """Gerenciador profissional do banco de questões"""
     
+    # Limite de parâmetros por IN (...) (SQLITE_MAX_VARIABLE_NUMBER antigo é 999)
+    MAX_IDS_POR_CONSULTA = 900
+    
     def __init__(self, db_path: str = "concurso.db"):
         self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
         self._criar_tabelas()
     
+    def _conexao(self) -> sqlite3.Connection:
+        """Conexão reutilizada entre consultas (aberta na primeira chamada)"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path)
+            self._conn.row_factory = sqlite3.Row
+        return self._conn
+    
+    def fechar(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    @staticmethod
+    def _questao_de_row(row: sqlite3.Row) -> Questao:
+        """Converte uma linha de `questões` em Questao (sqlite3.Row não tem .get)"""
+        colunas = row.keys()
+        
+        def valor(coluna, padrao=None):
+            return row[coluna] if coluna in colunas and row[coluna] is not None else padrao
+        
+        return Questao(
+            id=row['id'],
+            enunciado=row['enunciado'],
+            materia=MATERIA_POR_VALOR[row['disciplina']],
+            alternativa_a=row['alt_a'],
+            alternativa_b=row['alt_b'],
+            alternativa_c=row['alt_c'],
+            alternativa_d=row['alt_d'],
+            alternativa_e=valor('alt_e'),
+            resposta_correta=row['gabarito'],
+            dificuldade=DIFICULDADE_POR_VALOR[valor('dificuldade', 'Médio')],
+            justificativa=valor('justificativa'),
+            tempo_estimado=valor('tempo_estimado', 60),
+            ano_prova=valor('ano_prova'),
+            banca_organizadora=valor('banca_organizadora')
+        )
+    
+    def obter_questoes_por_ids(self, ids: List[int]) -> Dict[int, Questao]:
+        """Resolve vários IDs de uma vez: uma consulta IN (...) por bloco de até 900 IDs"""
+        unicos = list(dict.fromkeys(ids))
+        questoes: Dict[int, Questao] = {}
+        cursor = self._conexao().cursor()
+        for inicio in range(0, len(unicos), self.MAX_IDS_POR_CONSULTA):
+            bloco = unicos[inicio:inicio + self.MAX_IDS_POR_CONSULTA]
+            placeholders = ','.join(['?'] * len(bloco))
+            cursor.execute(f"SELECT * FROM questões WHERE id IN ({placeholders})", bloco)
+            for row in cursor.fetchall():
+                try:
+                    questoes[row['id']] = self._questao_de_row(row)
+                except KeyError:
+                    # Disciplina/dificuldade fora dos Enums: ignorada, como antes
+                    continue
+        return questoes
+    
     def _criar_tabelas(self) -> None:
         """Cria estrutura otimizada do banco de dados"""
         with sqlite3.connect(self.db_path) as conn:
@@ -127,83 +194,153 @@ class BancoQuestoes:
             
             conn.commit()
     
+    @staticmethod
+    def _filtro_sql(materias: Optional[List[Materia]],
+                    dificuldade: Optional[Dificuldade]) -> Tuple[str, List]:
+        """WHERE dos filtros de matéria/dificuldade e seus parâmetros"""
+        filtro = "1=1"
+        params: List = []
+        
+        if materias:
+            materias_str = [m.value for m in materias]
+            placeholders = ','.join(['?'] * len(materias_str))
+            filtro += f" AND disciplina IN ({placeholders})"
+            params.extend(materias_str)
+        
+        if dificuldade:
+            filtro += " AND dificuldade = ?"
+            params.append(dificuldade.value)
+        
+        return filtro, params
+    
     def carregar_questoes(self, 
                          materias: Optional[List[Materia]] = None,
                          dificuldade: Optional[Dificuldade] = None,
                          limite: int = 100) -> List[Questao]:
         """Carrega questões com filtros avançados"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                
-                query = "SELECT * FROM questões WHERE 1=1"
-                params = []
-                
-                if materias:
-                    materias_str = [m.value for m in materias]
-                    placeholders = ','.join(['?'] * len(materias_str))
-                    query += f" AND disciplina IN ({placeholders})"
-                    params.extend(materias_str)
-                
-                if dificuldade:
-                    query += " AND dificuldade = ?"
-                    params.append(dificuldade.value)
-                
-                query += " ORDER BY RANDOM() LIMIT ?"
-                params.append(limite)
-                
-                cursor.execute(query, params)
-                resultados = cursor.fetchall()
-                
-                questoes = []
-                for row in resultados:
-                    questao = Questao(
-                        id=row['id'],
-                        enunciado=row['enunciado'],
-                        materia=Materia(row['disciplina']),
-                        alternativa_a=row['alt_a'],
-                        alternativa_b=row['alt_b'],
-                        alternativa_c=row['alt_c'],
-                        alternativa_d=row['alt_d'],
-                        alternativa_e=row.get('alt_e'),
-                        resposta_correta=row['gabarito'],
-                        dificuldade=Dificuldade(row.get('dificuldade', 'Médio')),
-                        justificativa=row.get('justificativa'),
-                        tempo_estimado=row.get('tempo_estimado', 60),
-                        ano_prova=row.get('ano_prova'),
-                        banca_organizadora=row.get('banca_organizadora')
-                    )
-                    questoes.append(questao)
-                
-                return questoes
+            cursor = self._conexao().cursor()
+            
+            filtro, params = self._filtro_sql(materias, dificuldade)
+            query = f"SELECT * FROM questões WHERE {filtro} ORDER BY RANDOM() LIMIT ?"
+            params.append(limite)
+            
+            cursor.execute(query, params)
+            return [self._questao_de_row(row) for row in cursor.fetchall()]
                 
         except Exception as e:
             raise Exception(f"Erro ao carregar questões: {e}")
     
+    def obter_distribuicao(self) -> Dict[str, Dict[str, int]]:
+        """Matriz completa {disciplina: {dificuldade: quantidade}} em uma única varredura"""
+        distribuicao: Dict[str, Dict[str, int]] = {}
+        for disciplina, dificuldade, quantidade in self._conexao().execute('''
+            SELECT disciplina, COALESCE(dificuldade, 'Médio'), COUNT(*)
+            FROM questões
+            GROUP BY disciplina, dificuldade
+        '''):
+            por_dificuldade = distribuicao.setdefault(disciplina, {})
+            por_dificuldade[dificuldade] = por_dificuldade.get(dificuldade, 0) + quantidade
+        return distribuicao
+    
+    @staticmethod
+    def _estatisticas_de(por_dificuldade: Dict[str, int]) -> Dict:
+        return {
+            'total': sum(por_dificuldade.values()),
+            'faceis': por_dificuldade.get(Dificuldade.FACIL.value, 0),
+            'medias': por_dificuldade.get(Dificuldade.MEDIO.value, 0),
+            'dificeis': por_dificuldade.get(Dificuldade.DIFICIL.value, 0)
+        }
+    
     def obter_estatisticas_materia(self, materia: Materia) -> Dict:
         """Obtém estatísticas detalhadas por matéria"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT 
-                    COUNT(*) as total,
-                    SUM(CASE WHEN dificuldade = 'Fácil' THEN 1 ELSE 0 END) as faceis,
-                    SUM(CASE WHEN dificuldade = 'Médio' THEN 1 ELSE 0 END) as medias,
-                    SUM(CASE WHEN dificuldade = 'Difícil' THEN 1 ELSE 0 END) as dificeis
-                FROM questões 
-                WHERE disciplina = ?
-            ''', (materia.value,))
-            
-            resultado = cursor.fetchone()
-            
-            return {
-                'total': resultado[0],
-                'faceis': resultado[1],
-                'medias': resultado[2],
-                'dificeis': resultado[3]
-            }
+        return self._estatisticas_de(self.obter_distribuicao().get(materia.value, {}))
+
+
+class RepositorioQuestoes:
+    """
+    Camada de cache sobre BancoQuestoes com a mesma interface de leitura.
+    
+    - pool de IDs candidatos por (matérias, dificuldade), em LRU;
+    - cache único id -> Questao compartilhado entre os pools;
+    - invalidação automática quando outro processo grava no banco
+      (PRAGMA data_version) ou manual via invalidar().
+    
+    Preparar o mesmo simulado de novo não consulta o banco nem cria Questao:
+    só sorteia IDs do pool e devolve os objetos já em memória.
+    """
+    
+    def __init__(self, banco: BancoQuestoes, max_pools: int = 64):
+        self.banco = banco
+        self.db_path = banco.db_path
+        self.max_pools = max_pools
+        self._pools: "OrderedDict[Tuple, Tuple[int, ...]]" = OrderedDict()
+        self._objetos: Dict[int, Questao] = {}
+        self._invalidos: set = set()
+        self._data_version: Optional[int] = None
+        self._distribuicao: Optional[Dict[str, Dict[str, int]]] = None
+    
+    def invalidar(self) -> None:
+        """Descarta pools e objetos (catálogo reimportado)"""
+        self._pools.clear()
+        self._objetos.clear()
+        self._invalidos.clear()
+        self._distribuicao = None
+    
+    def _verificar_catalogo(self) -> None:
+        # data_version muda quando OUTRA conexão faz commit no arquivo
+        versao = self.banco._conexao().execute("PRAGMA data_version").fetchone()[0]
+        if self._data_version is not None and versao != self._data_version:
+            self.invalidar()
+        self._data_version = versao
+    
+    def _pool(self, materias: Optional[List[Materia]],
+              dificuldade: Optional[Dificuldade]) -> Tuple[int, ...]:
+        chave = (frozenset(materias) if materias else None, dificuldade)
+        pool = self._pools.get(chave)
+        if pool is not None:
+            self._pools.move_to_end(chave)
+            return pool
+        
+        filtro, params = BancoQuestoes._filtro_sql(materias, dificuldade)
+        cursor = self.banco._conexao().execute(f"SELECT id FROM questões WHERE {filtro}", params)
+        pool = tuple(row[0] for row in cursor)
+        self._pools[chave] = pool
+        if len(self._pools) > self.max_pools:
+            self._pools.popitem(last=False)
+        return pool
+    
+    def obter_questoes_por_ids(self, ids: List[int]) -> Dict[int, Questao]:
+        faltando = [i for i in ids if i not in self._objetos and i not in self._invalidos]
+        if faltando:
+            encontradas = self.banco.obter_questoes_por_ids(faltando)
+            self._objetos.update(encontradas)
+            self._invalidos.update(i for i in faltando if i not in encontradas)
+        return {i: self._objetos[i] for i in ids if i in self._objetos}
+    
+    def carregar_questoes(self, 
+                         materias: Optional[List[Materia]] = None,
+                         dificuldade: Optional[Dificuldade] = None,
+                         limite: int = 100) -> List[Questao]:
+        """Mesmo contrato de BancoQuestoes.carregar_questoes, servido do cache"""
+        try:
+            self._verificar_catalogo()
+            pool = self._pool(materias, dificuldade)
+            sorteados = random.sample(pool, min(limite, len(pool)))
+            questoes = self.obter_questoes_por_ids(sorteados)
+            return [questoes[i] for i in sorteados if i in questoes]
+        except Exception as e:
+            raise Exception(f"Erro ao carregar questões: {e}")
+    
+    def obter_distribuicao(self) -> Dict[str, Dict[str, int]]:
+        """Mesma matriz de BancoQuestoes.obter_distribuicao, calculada uma vez por versão do catálogo"""
+        self._verificar_catalogo()
+        if self._distribuicao is None:
+            self._distribuicao = self.banco.obter_distribuicao()
+        return self._distribuicao
+    
+    def obter_estatisticas_materia(self, materia: Materia) -> Dict:
+        return BancoQuestoes._estatisticas_de(self.obter_distribuicao().get(materia.value, {}))
 
 
 class Cronometro:
@@ -240,12 +377,24 @@ class Cronometro:
 class RelatorioDesempenho:
     """Gerador de relatórios detalhados de desempenho"""
     
-    def __init__(self, respostas: List[RespostaUsuario], banco_questoes: BancoQuestoes):
+    def __init__(self, respostas: List[RespostaUsuario], banco_questoes: BancoQuestoes,
+                 questoes: Optional[Dict[int, Questao]] = None):
         self.respostas = respostas
         self.banco_questoes = banco_questoes
+        # Questões já em memória (ex.: as do simulado) evitam qualquer consulta
+        self._questoes: Dict[int, Questao] = dict(questoes or {})
+        self._consultados = set(self._questoes)
+    
+    def _resolver_questoes(self) -> None:
+        """Busca de uma vez só as questões respondidas que ainda não foram consultadas"""
+        faltando = [r.questao_id for r in self.respostas if r.questao_id not in self._consultados]
+        if faltando:
+            self._questoes.update(self.banco_questoes.obter_questoes_por_ids(faltando))
+            self._consultados.update(faltando)
     
     def gerar_relatorio_completo(self) -> Dict:
         """Gera relatório completo de desempenho"""
+        self._resolver_questoes()
         total_questoes = len(self.respostas)
         acertos = sum(1 for r in self.respostas if r.acertou)
         percentual_geral = (acertos / total_questoes) * 100 if total_questoes > 0 else 0
@@ -283,30 +432,10 @@ class RelatorioDesempenho:
         }
     
     def _obter_questao_por_id(self, questao_id: int) -> Optional[Questao]:
-        """Obtém questão pelo ID"""
-        try:
-            with sqlite3.connect(self.banco_questoes.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM questões WHERE id = ?", (questao_id,))
-                row = cursor.fetchone()
-                
-                if row:
-                    return Questao(
-                        id=row['id'],
-                        enunciado=row['enunciado'],
-                        materia=Materia(row['disciplina']),
-                        alternativa_a=row['alt_a'],
-                        alternativa_b=row['alt_b'],
-                        alternativa_c=row['alt_c'],
-                        alternativa_d=row['alt_d'],
-                        resposta_correta=row['gabarito'],
-                        dificuldade=Dificuldade(row.get('dificuldade', 'Médio')),
-                        justificativa=row.get('justificativa')
-                    )
-                return None
-        except:
-            return None
+        """Obtém questão pelo ID (resolvida em lote por _resolver_questoes)"""
+        if questao_id not in self._consultados:
+            self._resolver_questoes()
+        return self._questoes.get(questao_id)
     
     def _gerar_recomendacoes(self, estatisticas_materia: Dict) -> List[str]:
         """Gera recomendações de estudo baseadas no desempenho"""
@@ -476,7 +605,8 @@ class Simulado:
         self.finalizado = True
         
         if not interrompido and self.respostas:
-            relatorio = RelatorioDesempenho(self.respostas, self.banco_questoes)
+            relatorio = RelatorioDesempenho(self.respostas, self.banco_questoes,
+                                            questoes={q.id: q for q in self.questoes})
             dados_relatorio = relatorio.gerar_relatorio_completo()
             
             self._apresentar_relatorio(dados_relatorio)
@@ -515,8 +645,10 @@ class Simulado:
                 print("📖 GABARITO COMENTADO")
                 print(f"{'='*60}")
                 
+                # As questões do simulado já estão em memória: nenhuma consulta ao banco
+                questoes_por_id = {q.id: q for q in self.questoes}
                 for i, resposta in enumerate(self.respostas):
-                    questao = self._obter_questao_por_id(resposta.questao_id)
+                    questao = questoes_por_id.get(resposta.questao_id)
                     if questao:
                         print(f"\n{i+1}. {questao.enunciado[:100]}...")
                         print(f"   Sua resposta: {resposta.alternativa_escolhida}")
@@ -539,8 +671,8 @@ def main():
         print("🎓 SISTEMA DE SIMULADO PARA CONCURSOS - v2.0")
         print("=" * 50)
         
-        # Inicializar banco de questões
-        banco = BancoQuestoes("concurso.db")
+        # Inicializar banco de questões (com cache de pools e objetos)
+        banco = RepositorioQuestoes(BancoQuestoes("concurso.db"))
         
         # Configurar simulado
         tempo_simulado = timedelta(hours=3)  # 3 horas
@@ -574,8 +706,4 @@ def main():
 
 
 if __name__ == "__main__":
-<<<<<<< HEAD
-    main()
-=======
     main()
->>>>>>> 2c20bceafa64cc4055e58c741f726b7d9baa78d8
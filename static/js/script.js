@@ -2,8 +2,68 @@
 
 let simuladoAtual = null;
 let questaoAtual = null;
+let questaoExibidaEm = 0; // performance.now() de quando a questão atual apareceu
 let dadosDisciplinas = []; 
 
+// Questões do simulado em janelas: o /iniciar traz o manifesto + a primeira
+// janela; as próximas são buscadas em segundo plano antes do aluno chegar nelas.
+const TAMANHO_JANELA = 5;
+
+class JanelaQuestoes {
+    constructor(simuladoId, total, primeiras) {
+        this.simuladoId = simuladoId;
+        this.total = total;
+        this.questoes = new Array(total);
+        this.pendentes = new Map(); // inicio da janela -> Promise
+        this.guardar(0, primeiras);
+        this.prefetch(0);
+    }
+
+    guardar(inicio, questoes) {
+        questoes.forEach((q, i) => {
+            this.questoes[inicio + i] = { ...q, enunciado: q.enunciado ?? q.questao };
+        });
+    }
+
+    buscar(inicio) {
+        inicio = Math.floor(inicio / TAMANHO_JANELA) * TAMANHO_JANELA;
+        if (!this.pendentes.has(inicio)) {
+            const url = `/api/simulado/${this.simuladoId}/questoes?inicio=${inicio}&quantidade=${TAMANHO_JANELA}`;
+            const promessa = fetch(url)
+                .then(r => {
+                    if (!r.ok) throw new Error(`HTTP ${r.status}`);
+                    return r.json();
+                })
+                .then(data => this.guardar(data.inicio, data.questoes))
+                .catch(erro => {
+                    this.pendentes.delete(inicio); // tenta de novo na próxima navegação
+                    throw erro;
+                });
+            this.pendentes.set(inicio, promessa);
+        }
+        return this.pendentes.get(inicio);
+    }
+
+    prefetch(indice) {
+        // Alguma das próximas TAMANHO_JANELA questões ainda não carregada: busca sem bloquear a tela atual
+        const limite = Math.min(this.total, indice + 1 + TAMANHO_JANELA);
+        for (let i = indice + 1; i < limite; i++) {
+            if (this.questoes[i] === undefined) {
+                this.buscar(i).catch(erro => console.warn('Prefetch de questões falhou:', erro));
+                return;
+            }
+        }
+    }
+
+    async obter(indice) {
+        if (this.questoes[indice] === undefined) {
+            await this.buscar(indice);
+        }
+        this.prefetch(indice);
+        return this.questoes[indice];
+    }
+}
+
 // Exposição Global de Funções
 const GlobalFunctions = {
     navegarPara: navegarPara,
@@ -150,7 +210,11 @@ function habilitarInteracaoQuestao() {
 // CORREÇÃO: Justificativa apenas para erros
 function mostrarFeedbackQuestao(data) {
     const feedback = document.getElementById('feedback-questao');
-    if (feedback) {
+    if (feedback && data.acertou === undefined) {
+        // Resposta só registrada: a correção sai ao finalizar o simulado
+        feedback.innerHTML = `<div class="feedback"><h4>📝 Resposta registrada</h4></div>`;
+        feedback.style.display = 'block';
+    } else if (feedback) {
         let feedbackHTML = `
             <div class="feedback ${data.acertou ? 'acerto' : 'erro'}">
                 <h4>${data.acertou ? '✅ Acertou!' : '❌ Errou!'}</h4>
@@ -176,7 +240,8 @@ async function carregarMaterias() {
     try {
         mostrarLoading('materias-container', 'Carregando disciplinas...');
         
-        const response = await fetch('/api/materias');
+        // Revalida com If-None-Match: se o catálogo não mudou, o servidor responde 304 e o navegador reusa o cache
+        const response = await fetch('/api/materias', { cache: 'no-cache' });
         
         if (!response.ok) {
             const errorText = await response.text();
@@ -292,6 +357,14 @@ async function iniciarSimulado() {
         
         const data = await response.json();
 
+        if (data.manifesto) { // API em janelas: manifesto + primeiras questões
+            data.success = true;
+            data.janela = new JanelaQuestoes(data.simulado_id, data.total, data.questoes);
+            data.questao = await data.janela.obter(0);
+            data.indice_atual = 0;
+            data.total_questoes = data.total;
+        }
+
         if (data.success) {
             simuladoAtual = data;
             mostrarTelaSimuladoAtivo();
@@ -369,6 +442,14 @@ async function mudarQuestao(direcao) {
     const novoIndice = indiceAtual + direcao;
     
     try {
+        if (simuladoAtual?.janela) {
+            if (novoIndice < 0 || novoIndice >= simuladoAtual.total_questoes) return;
+            const questao = await simuladoAtual.janela.obter(novoIndice); // normalmente já em memória
+            simuladoAtual.indice_atual = novoIndice;
+            exibirQuestao(questao, novoIndice, simuladoAtual.total_questoes, null);
+            return;
+        }
+
         const response = await fetch(`/api/simulado/questao/${novoIndice}`);
         const data = await response.json();
         
@@ -392,6 +473,8 @@ async function responderQuestao() {
         return;
     }
     
+    // O servidor soma os intervalos de cada questão: envia só o tempo desde o último envio aceito
+    const enviadoEm = performance.now();
     try {
         const response = await fetch('/api/simulado/responder', {
             method: 'POST',
@@ -399,8 +482,11 @@ async function responderQuestao() {
                 'Content-Type': 'application/json',
             },
             body: JSON.stringify({
+                simulado_id: simuladoAtual?.simulado_id,
                 questao_id: questaoAtual.id,
-                alternativa: alternativaSelecionada.value
+                alternativa: alternativaSelecionada.value,
+                resposta: alternativaSelecionada.value,
+                tempo_ms: Math.round(enviadoEm - questaoExibidaEm)
             })
         });
         
@@ -415,11 +501,13 @@ async function responderQuestao() {
 
         const data = await response.json();
         
-        if (data.success) {
+        // /api/simulado/responder devolve {status, tempo_restante_segundos}: não há campo success
+        if (response.ok) {
+            questaoExibidaEm = enviadoEm;
             mostrarFeedbackQuestao(data);
             desabilitarInteracaoQuestao(); 
         } else {
-            alert('Erro: ' + data.error);
+            alert('Erro: ' + (data.error || 'Erro desconhecido.'));
         }
     } catch (error) {
         console.error('Erro:', error);
@@ -444,7 +532,8 @@ async function finalizarSimulado() {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
-            }
+            },
+            body: JSON.stringify({ simulado_id: simuladoAtual?.simulado_id })
         });
 
         if (!response.ok) {
@@ -457,8 +546,9 @@ async function finalizarSimulado() {
 
         const data = await response.json();
 
-        if (data.success) {
-            exibirResultado(data.relatorio);
+        // /finalizar devolve o resultado no nível de cima (acertos, total, percentil...)
+        if (data.success || data.simulado_id) {
+            exibirResultado(data.relatorio || data);
             const simuladoAtivo = document.getElementById('simulado-ativo');
             const resultado = document.getElementById('tela-resultado');
             if (simuladoAtivo) simuladoAtivo.classList.add('hidden');
@@ -479,6 +569,7 @@ async function finalizarSimulado() {
 
 function exibirQuestao(questao, indice, total, respostaAnterior) {
     questaoAtual = questao;
+    questaoExibidaEm = performance.now();
     
     const elementos = {
         'questao-numero': `Questão ${indice + 1} de ${total}`,
@@ -611,13 +702,26 @@ function exibirQuestao(questao, indice, total, respostaAnterior) {
     atualizarProgresso(indice, total);
 }
 
-function exibirResultado(relatorio) {
+function exibirResultado(resultado) {
     document.getElementById('resultado-acertos').textContent = 
-        `${relatorio.total_acertos}/${relatorio.total_questoes}`;
+        `${resultado.acertos ?? resultado.total_acertos}/${resultado.total ?? resultado.total_questoes}`;
     document.getElementById('resultado-percentual').textContent = 
-        `${relatorio.percentual_acerto}%`;
+        `${resultado.percentual ?? resultado.percentual_acerto}%`;
     document.getElementById('resultado-nota').textContent = 
-        `${relatorio.nota_final}%`;
+        `${resultado.nota_final}%`;
+
+    // Percentil: entre simulados iguais (mesma matéria e tamanho) e no geral; null sem histórico
+    const card = document.getElementById('resultado-percentil-card');
+    const temBlueprint = resultado.percentil_blueprint !== undefined && resultado.percentil_blueprint !== null;
+    const temGeral = resultado.percentil !== undefined && resultado.percentil !== null;
+    if (card) card.classList.toggle('hidden', !temBlueprint && !temGeral);
+    if (temBlueprint || temGeral) {
+        document.getElementById('resultado-percentil').textContent =
+            `${temBlueprint ? resultado.percentil_blueprint : resultado.percentil}%`;
+        document.getElementById('resultado-percentil-card').title = temGeral
+            ? `Melhor que ${resultado.percentil}% de todos os simulados`
+            : '';
+    }
 }
 
 // ==========================================================
@@ -626,7 +730,7 @@ function exibirResultado(relatorio) {
 
 async function carregarTemasRedacao() {
     try {
-        const response = await fetch('/api/redacao/temas');
+        const response = await fetch('/api/redacao/temas', { cache: 'no-cache' }); // revalida via ETag (304)
         
         if (!response.ok) {
              console.error("Erro ao carregar temas de redação:", response.status);
@@ -681,6 +785,9 @@ async function corrigirRedacao() {
         btnCorrigir.disabled = true;
     }
     
+    // Pré-análise local (instantânea) exibida enquanto a correção completa roda
+    carregarPreAnalise(temaSelect.value, textoRedacao);
+    
     try {
         const response = await fetch('/api/redacao/corrigir-gemini', {
             method: 'POST',
@@ -695,8 +802,10 @@ async function corrigirRedacao() {
         
         const data = await response.json();
         
-        if (data.success) {
+        if (response.ok) {
             exibirCorrecaoRedacao(data.correcao);
+        } else if (data.pre_analise) {
+            exibirPreAnalise(data.pre_analise);
         } else {
             alert('Erro: ' + data.error);
         }
@@ -711,6 +820,45 @@ async function corrigirRedacao() {
     }
 }
 
+async function carregarPreAnalise(tema, texto) {
+    try {
+        const response = await fetch('/api/redacao/pre-analise', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ tema: tema, texto: texto })
+        });
+        if (response.ok) {
+            exibirPreAnalise(await response.json());
+        }
+    } catch (error) {
+        console.error('Erro na pré-análise:', error);
+    }
+}
+
+function exibirPreAnalise(preAnalise) {
+    const resultadoDiv = document.getElementById('resultado-correcao');
+    // A correção completa (ex.: vinda do cache) pode chegar antes da pré-análise
+    if (!resultadoDiv || resultadoDiv.querySelector('.resultado-header')) return;
+    const m = preAnalise.metricas;
+    const itens = [...preAnalise.problemas.map(p => `<li>⛔ ${p}</li>`), ...preAnalise.alertas.map(a => `<li>⚠️ ${a}</li>`)];
+    
+    resultadoDiv.innerHTML = `
+        <div class="card" id="pre-analise">
+            <h4>⚡ Pré-análise ${preAnalise.apta ? '(correção completa em andamento...)' : ''}</h4>
+            <ul class="lista-pontos">
+                <li>Palavras: ${m.palavras} | Parágrafos: ${m.paragrafos} | Frases: ${m.frases}</li>
+                <li>Média de palavras por frase: ${m.media_palavras_frase} (maior: ${m.maior_frase})</li>
+                <li>Conectivos: ${m.conectivos} (${m.densidade_conectivos} a cada 100 palavras)</li>
+                ${m.aderencia_tema !== null ? `<li>Aderência ao tema: ${Math.round(m.aderencia_tema * 100)}%</li>` : ''}
+            </ul>
+            ${itens.length ? `<ul class="lista-pontos">${itens.join('')}</ul>` : ''}
+        </div>
+    `;
+    resultadoDiv.classList.remove('hidden');
+}
+
 function exibirCorrecaoRedacao(correcao) {
     const resultadoDiv = document.getElementById('resultado-correcao');
     
@@ -718,10 +866,10 @@ function exibirCorrecaoRedacao(correcao) {
         <div class="card resultado-header">
             <div class="nota-container">
                 <h3>📊 Resultado da Correção</h3>
-                <div class="nota-final">${correcao.nota_final}/100</div>
+                <div class="nota-final">${correcao.nota_final}/1000</div>
                 <div class="nota-descricao">
-                    ${correcao.nota_final >= 80 ? '🎉 Excelente! Nível competitivo para concursos!' : 
-                      correcao.nota_final >= 60 ? '👍 Bom desempenho, mas pode melhorar!' : 
+                    ${correcao.nota_final >= 800 ? '🎉 Excelente! Nível competitivo para concursos!' : 
+                      correcao.nota_final >= 600 ? '👍 Bom desempenho, mas pode melhorar!' : 
                       '📝 Precisa de mais prática. Continue estudando!'}
                 </div>
             </div>
@@ -732,12 +880,12 @@ function exibirCorrecaoRedacao(correcao) {
     `;
     
     correcao.analise_competencias.forEach(comp => {
-        const percentual = (comp.nota / 20) * 100;
+        const percentual = (comp.nota / 200) * 100;
         html += `
             <div class="competencia-item">
                 <div class="competencia-header">
                     <h5>${comp.competencia}</h5>
-                    <span class="nota-competencia">${comp.nota}/20</span>
+                    <span class="nota-competencia">${comp.nota}/200</span>
                 </div>
                 <div class="progress-bar-competencia">
                     <div class="progress-fill" style="width: ${percentual}%"></div>
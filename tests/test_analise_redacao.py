@@ -0,0 +1,31 @@
+from analise_redacao import analisar_redacao, avaliar_minimos, MIN_PALAVRAS
+
+TEMA = 'Educação pública no Brasil'
+
+
+def _redacao(paragrafos, frases_por_paragrafo):
+    return '\n\n'.join(
+        ' '.join(f'A educação pública no Brasil, além disso, exige investimento {i}{j}; portanto, o país avança.'
+                 for j in range(frases_por_paragrafo))
+        for i in range(paragrafos))
+
+
+def test_texto_curto_e_sem_paragrafos_e_barrado():
+    problemas, _ = avaliar_minimos(analisar_redacao('A educação pública no Brasil.', TEMA))
+    assert len(problemas) == 2
+    assert problemas[0].startswith('Texto muito curto') and 'parágrafo' in problemas[1]
+
+
+def test_texto_dentro_dos_minimos_segue_para_correcao():
+    metricas = analisar_redacao(_redacao(4, 12), TEMA)
+    problemas, _ = avaliar_minimos(metricas)
+    assert problemas == []
+    assert metricas['palavras'] >= MIN_PALAVRAS and metricas['paragrafos'] == 4
+    assert metricas['aderencia_tema'] == 1.0
+
+
+def test_fuga_ao_tema_e_barrada():
+    texto = '\n\n'.join('O futebol de várzea reúne torcedores animados todos os domingos pela manhã. ' * 8
+                        for _ in range(4))
+    problemas, _ = avaliar_minimos(analisar_redacao(texto, TEMA))
+    assert any('fugir do tema' in p for p in problemas)
@@ -0,0 +1,11 @@
+from carga_simulados import percentil
+
+
+def test_percentil_nearest_rank():
+    cem = list(range(1, 101))
+    assert percentil(cem, 95) == 95
+    assert percentil(cem, 99) == 99
+    assert percentil(cem, 100) == 100
+    assert percentil(list(range(1, 11)), 50) == 5
+    assert percentil([7], 99) == 7
+    assert percentil([], 50) is None
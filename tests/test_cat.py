@@ -0,0 +1,24 @@
+import random
+
+import cat
+
+
+def test_dificuldade_rasch_usa_rotulo_ate_a_amostra_ser_confiavel():
+    assert cat.dificuldade_rasch('Difícil') == 1.0
+    assert cat.dificuldade_rasch('Fácil', tentativas=5, acertos=5) == -1.0
+    assert cat.dificuldade_rasch('Fácil', tentativas=100, acertos=20) > 1.0  # 80% de erro: difícil de fato
+
+
+def test_sessao_converge_para_a_habilidade_e_para_antes_do_maximo():
+    aleatorio = random.Random(3)
+    dificuldades = sorted(aleatorio.uniform(-3, 3) for _ in range(300))
+    theta_real = 1.0
+    sessao = cat.SessaoAdaptativa('m')
+    livres = list(range(len(dificuldades)))
+    while not sessao.concluida(len(dificuldades)):
+        i = min(livres, key=lambda k: abs(dificuldades[k] - sessao.theta))
+        livres.remove(i)
+        sessao.registrar(i, dificuldades[i], aleatorio.random() < cat._prob_acerto(theta_real, dificuldades[i]))
+    assert cat.MIN_QUESTOES <= len(sessao.respostas) < cat.MAX_QUESTOES
+    assert sessao.erro_padrao <= cat.ERRO_PADRAO_ALVO
+    assert abs(sessao.theta - theta_real) < 3 * sessao.erro_padrao
@@ -0,0 +1,70 @@
+import random
+import sqlite3
+
+import pytest
+
+from respostas_fato import criar_tabela_respostas_fato, gravar_respostas
+from estatisticas_itens import (criar_tabela_estatisticas_itens, atualizar_estatisticas_itens,
+                                recalcular_estatisticas_itens, listar_estatisticas_itens)
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    criar_tabela_respostas_fato(conn)
+    criar_tabela_estatisticas_itens(conn)
+    yield conn
+    conn.close()
+
+
+def _simulados(n, semente=42):
+    """Simulados sintéticos com questões em branco, sem tempo e provas de uma questão só."""
+    aleatorio = random.Random(semente)
+    simulados = []
+    for s in range(n):
+        linhas = []
+        for questao_id in aleatorio.sample(range(1, 31), aleatorio.choice([1, 2, 5, 10])):
+            resposta = aleatorio.choice(['A', 'B', 'C', None])
+            acertou = int(resposta == 'A')
+            tempo_ms = aleatorio.choice([None, aleatorio.randint(1000, 90000)]) if resposta else None
+            linhas.append(('user_1', f'sim_{s}', questao_id, 'Matéria', resposta, acertou, tempo_ms,
+                           '2026-01-01T00:00:00'))
+        simulados.append(linhas)
+    return simulados
+
+
+def _por_questao(conn):
+    return {e['question_id']: e for e in listar_estatisticas_itens(conn)}
+
+
+def test_incremental_e_recalculo_produzem_as_mesmas_estatisticas(conn):
+    for linhas in _simulados(200):
+        gravar_respostas(conn, linhas)
+        # Mesmo filtro do /finalizar: em branco não é tentativa
+        atualizar_estatisticas_itens(conn, [(l[2], l[5], l[6]) for l in linhas if l[4] is not None])
+    conn.commit()
+    incremental = _por_questao(conn)
+
+    recalcular_estatisticas_itens(conn)
+    recalculado = _por_questao(conn)
+
+    assert incremental.keys() == recalculado.keys()
+    for questao_id, esperado in incremental.items():
+        obtido = recalculado[questao_id]
+        for campo, valor in esperado.items():
+            if isinstance(valor, float):
+                assert obtido[campo] == pytest.approx(valor, abs=1e-4), (questao_id, campo)
+            else:
+                assert obtido[campo] == valor, (questao_id, campo)
+
+
+def test_discriminacao_positiva_quando_quem_acerta_vai_melhor_no_resto(conn):
+    # Questão 1: acertada por quem acerta as demais, errada por quem erra
+    for s in range(40):
+        bom = s % 2 == 0
+        atualizar_estatisticas_itens(conn, [(1, bom, None), (2, bom, None), (3, bom, None)])
+    estatistica = _por_questao(conn)[1]
+    assert estatistica['tentativas'] == 40
+    assert estatistica['taxa_acerto'] == 0.5
+    assert estatistica['discriminacao'] == pytest.approx(1.0)
+    assert not estatistica['suspeita']
@@ -0,0 +1,35 @@
+import time
+import threading
+
+import pytest
+
+from prazos import (tempo_limite_segundos, AgendadorPrazos, MINUTOS_POR_QUESTAO,
+                    TEMPO_MINIMO_MINUTOS, TEMPO_MAXIMO_MINUTOS)
+
+
+@pytest.mark.parametrize('minutos', [None, 'abc', {}, [], float('nan')])
+def test_tempo_invalido_cai_no_padrao_por_questao(minutos):
+    assert tempo_limite_segundos(10, minutos) == 10 * MINUTOS_POR_QUESTAO * 60
+
+
+def test_tempo_pedido_respeita_os_limites():
+    assert tempo_limite_segundos(10, '20') == 20 * 60
+    assert tempo_limite_segundos(10, 0) == TEMPO_MINIMO_MINUTOS * 60
+    assert tempo_limite_segundos(10, 10_000) == TEMPO_MAXIMO_MINUTOS * 60
+
+
+def test_agendador_expira_so_o_que_nao_foi_cancelado():
+    expirados = []
+    pronto = threading.Event()
+
+    def ao_expirar(simulado_id):
+        expirados.append(simulado_id)
+        pronto.set()
+
+    agendador = AgendadorPrazos(ao_expirar)
+    agora = time.time()
+    agendador.agendar('cancelado', agora + 0.05)
+    agendador.agendar('expira', agora + 0.1)
+    agendador.cancelar('cancelado')
+    assert pronto.wait(2)
+    assert expirados == ['expira']
@@ -0,0 +1,39 @@
+from ranking import HistogramaFenwick, RankingNotas, chave_blueprint, GERAL
+
+
+def test_fenwick_prefixo_confere_com_soma_direta():
+    contagens = [3, 0, 5, 1, 0, 2, 7, 0, 4]
+    histograma = HistogramaFenwick(len(contagens))
+    for bucket, n in enumerate(contagens):
+        if n:
+            histograma.adicionar(bucket, n)
+    assert histograma.total == sum(contagens)
+    for bucket in range(len(contagens) + 1):
+        assert histograma.prefixo(bucket) == sum(contagens[:bucket])
+
+
+def test_percentil_conta_empates_pela_metade():
+    ranking = RankingNotas()
+    for i, nota in enumerate([10, 20, 30, 40, 40]):
+        ranking.registrar(f'user_{i}', nota, 'todas:10')
+    assert ranking.percentil(40, 'todas:10') == 80.0   # 3 abaixo + 2 empates / 2
+    assert ranking.percentil(5, 'todas:10') == 0.0
+    assert ranking.percentil(50) == 100.0
+    assert ranking.percentil(50, 'outra:10') is None
+
+
+def test_lideres_guardam_a_melhor_nota_por_usuario():
+    ranking = RankingNotas(tamanho_lideres=2)
+    ranking.registrar('a', 50, None)
+    ranking.registrar('a', 70, None)
+    ranking.registrar('b', 60, None)
+    ranking.registrar('c', 10, None)
+    assert ranking.lideres(5) == [('a', 70), ('b', 60)]
+    assert ranking.total(GERAL) == 4 and ranking.blueprints() == {}
+
+
+def test_blueprint_usa_quantidade_sorteada_e_so_tamanhos_ranqueados():
+    assert chave_blueprint({'materia': 'Direito', 'quantidade': 1000}, 10) == 'Direito:10'
+    assert chave_blueprint({'quantidade': 1000}, 295) is None
+    assert chave_blueprint({'quantidade': -1}, 7) is None
+    assert chave_blueprint({'modo': 'adaptativo', 'materia': 'Direito'}, 17) == 'adaptativo:Direito'
@@ -0,0 +1,42 @@
+import pytest
+
+from redacao_ia import reparar_json, corrigir_redacao, CorrecaoInvalidaError
+
+
+def test_remove_cercas_de_codigo():
+    assert reparar_json('Segue:\n```json\n{"nota": 800}\n```') == {'nota': 800}
+
+
+def test_fecha_json_truncado():
+    raw = '{"pontos_fortes": ["coesão", "repertório"], "sugestoes": ["rever a concl'
+    assert reparar_json(raw) == {'pontos_fortes': ['coesão', 'repertório'], 'sugestoes': ['rever a concl']}
+
+
+def test_descarta_elemento_incompleto_quando_fechar_nao_basta():
+    dados = reparar_json('{"a": 1, "b": {"c": tr')
+    assert dados['a'] == 1
+
+
+@pytest.mark.parametrize('raw', ['[1, 2, 3]', '"texto"', 'sem json nenhum', ''])
+def test_rejeita_o_que_nao_vira_objeto(raw):
+    with pytest.raises(CorrecaoInvalidaError):
+        reparar_json(raw)
+
+
+class _Resposta:
+    def __init__(self, text):
+        self.text = text
+
+
+class _ModeloSoCompetencia1:
+    """Responde só a competência 1, inclusive ao pedido de complemento."""
+
+    def generate_content(self, prompt, **kwargs):
+        return _Resposta('{"analise_competencias": [{"competencia": 1, "nota": 160, "comentario": "bom"}]}')
+
+
+def test_correcao_sem_todas_as_competencias_sai_marcada_como_incompleta():
+    resultado = corrigir_redacao('Tema', 'Texto', model=_ModeloSoCompetencia1())
+    assert resultado['incompleta'] is True
+    assert resultado['nota'] == 160
+    assert [c['nota'] for c in resultado['correcao']['analise_competencias']] == [160, 0, 0, 0, 0]
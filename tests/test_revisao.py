@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from revisao import proximo_estado, FACILIDADE_INICIAL, FACILIDADE_MINIMA
+
+AGORA = datetime(2026, 1, 1, 12, 0)
+
+
+def test_acertos_seguidos_espacam_1_6_e_depois_pela_facilidade():
+    estado, proxima = proximo_estado(None, True, AGORA)
+    assert estado[:2] == (1, 1.0) and proxima == AGORA + timedelta(days=1)
+    estado, _ = proximo_estado(estado, True, AGORA)
+    assert estado[:2] == (2, 6.0)
+    facilidade = estado[2]
+    estado, _ = proximo_estado(estado, True, AGORA)
+    assert estado[1] == pytest.approx(round(6.0 * facilidade, 2))
+
+
+def test_erro_zera_a_sequencia_e_revisa_na_hora():
+    (repeticoes, intervalo, facilidade, erros), proxima = proximo_estado((3, 15.0, FACILIDADE_INICIAL, 0), False, AGORA)
+    assert (repeticoes, intervalo, erros) == (0, 0.0, 1)
+    assert facilidade < FACILIDADE_INICIAL
+    assert proxima == AGORA
+
+
+def test_facilidade_tem_piso():
+    estado = None
+    for _ in range(20):
+        estado, _ = proximo_estado(estado, False, AGORA)
+    assert estado[2] == FACILIDADE_MINIMA
@@ -0,0 +1,21 @@
+from serie_desempenho import lttb
+
+
+def test_lttb_mantem_extremos_e_o_limite():
+    pontos = [(x, x % 7) for x in range(500)]
+    amostra = lttb(pontos, 50)
+    assert len(amostra) == 50
+    assert amostra[0] == pontos[0] and amostra[-1] == pontos[-1]
+    assert [p[0] for p in amostra] == sorted(p[0] for p in amostra)
+
+
+def test_lttb_preserva_pico_isolado():
+    pontos = [(x, 0.0) for x in range(300)]
+    pontos[137] = (137, 100.0)
+    assert (137, 100.0) in lttb(pontos, 20)
+
+
+def test_lttb_nao_reduz_series_curtas():
+    pontos = [(x, x) for x in range(10)]
+    assert lttb(pontos, 50) == pontos
+    assert lttb(pontos, 2) == pontos